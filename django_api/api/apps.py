@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from .cache import invalidate_on_change
+
+        for model in self.get_models():
+            post_save.connect(invalidate_on_change, sender=model)
+            post_delete.connect(invalidate_on_change, sender=model)
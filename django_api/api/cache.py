@@ -0,0 +1,200 @@
+import hashlib
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from .metrics import RESPONSE_CACHE, response_cache_counts
+
+VERSION_KEY = "api:version:{}"
+RESPONSE_KEY = "api:response:{}"
+STATS_OUTCOMES = (("hits", "hit"), ("misses", "miss"), ("not_modified", "not_modified"))
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def model_versions(models):
+    """Current version token of each model, keyed by model label.
+
+    Tokens are random rather than counters: the cache may evict them (or lose
+    them on restart), and a version missing from it is replaced by one never
+    issued before, so responses and ETags built on older versions cannot
+    match again.
+    """
+    cache = get_cache()
+    keys = {VERSION_KEY.format(model._meta.label_lower): model for model in models}
+    stored = cache.get_many(keys)
+    versions = {}
+    for key, model in keys.items():
+        version = stored.get(key)
+        if version is None:
+            version = uuid.uuid4().hex
+            # add() is a no-op when the key exists, so concurrent workers agree
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key, version)
+        versions[model._meta.label_lower] = version
+    return versions
+
+
+def data_version():
+    """Token that changes whenever any model in the api app is written.
+
+    Clients key their own caches of derived data (e.g. LLM answers) on it,
+    so it is built from the random model versions and never goes back to a
+    token already issued, even when the versions are evicted. Like the
+    response cache, it is only consistent across workers with a shared cache
+    backend.
+    """
+    versions = model_versions(apps.get_app_config("api").get_models())
+    return hashlib.sha1(repr(sorted(versions.items())).encode()).hexdigest()
+
+
+def invalidate_models(*models):
+    """Give each model a new version so responses built from it are refetched.
+
+    Cached responses are keyed on these versions, so old entries are never
+    served again and simply expire.
+    """
+    get_cache().set_many(
+        {
+            VERSION_KEY.format(model._meta.label_lower): uuid.uuid4().hex
+            for model in models
+        },
+        timeout=None,
+    )
+
+
+def invalidate_on_change(sender, **kwargs):
+    """post_save/post_delete receiver for every model in the api app."""
+    invalidate_models(sender)
+    # Bump again once the transaction commits, so a response cached by a
+    # concurrent request that read the old rows is not served afterwards.
+    transaction.on_commit(lambda: invalidate_models(sender))
+
+
+def record(route, outcome):
+    RESPONSE_CACHE.labels(route, outcome).inc()
+
+
+def cache_stats(routes):
+    """Hit/miss counters per route plus totals, across all workers."""
+    stored = response_cache_counts()
+    per_route = {}
+    for route in routes:
+        counts = {
+            name: int(stored.get((route, outcome), 0))
+            for name, outcome in STATS_OUTCOMES
+        }
+        if any(counts.values()):
+            per_route[route] = counts
+    totals = {
+        name: sum(r[name] for r in per_route.values()) for name, _ in STATS_OUTCOMES
+    }
+    hits, misses = totals["hits"], totals["misses"]
+    return {
+        "backend": settings.CACHES[settings.API_CACHE_ALIAS]["BACKEND"],
+        **totals,
+        "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        "routes": per_route,
+    }
+
+
+def response_digest(request, versions):
+    """Hash of path, normalized query params, Accept header and model versions.
+
+    Identical inputs always render identical bodies, so the digest serves as
+    both the response cache key and a strong ETag.
+    """
+    params = sorted(
+        (key, sorted(value for value in values if value != ""))
+        for key, values in request.GET.lists()
+    )
+    params = [(key, values) for key, values in params if values]
+    raw = repr(
+        (
+            request.path,
+            params,
+            request.META.get("HTTP_ACCEPT", ""),
+            sorted(versions.items()),
+        )
+    )
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def etag_matches(request, etag):
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    tags = [tag.removeprefix("W/") for tag in parse_etags(header)]
+    return "*" in tags or etag in tags
+
+
+class CachedResponseMixin:
+    """Read-through cache for the GET responses of a view.
+
+    ``cache_models`` lists every model the viewset's responses are built
+    from, including nested serializers and custom actions. Saving or
+    deleting any of them invalidates the cached responses.
+
+    Successful responses carry an ETag derived from the same versions, and a
+    request whose ``If-None-Match`` still matches gets a 304 without touching
+    the database.
+    """
+
+    cache_models = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        if (
+            request.method != "GET"
+            or not self.cache_models
+            or not settings.API_CACHE_ENABLED
+        ):
+            return super().dispatch(request, *args, **kwargs)
+
+        cache = get_cache()
+        route = request.resolver_match.url_name
+        digest = response_digest(request, model_versions(self.cache_models))
+        etag = f'"{digest}"'
+        if etag_matches(request, etag):
+            record(route, "not_modified")
+            response = HttpResponseNotModified()
+            response["ETag"] = etag
+            return response
+
+        key = RESPONSE_KEY.format(digest)
+        cached = cache.get(key)
+        if cached is not None:
+            record(route, "hit")
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response["X-Cache"] = "HIT"
+            response["ETag"] = etag
+            response["Cache-Control"] = "no-cache"
+            return response
+
+        record(route, "miss")
+        response = super().dispatch(request, *args, **kwargs)
+        response["X-Cache"] = "MISS"
+        if response.status_code != 200:
+            return response
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-cache"
+
+        def store(rendered):
+            if rendered.get("Content-Type", "").startswith("application/json"):
+                cache.set(
+                    key,
+                    (rendered.content, rendered["Content-Type"]),
+                    timeout=settings.API_CACHE_TIMEOUT,
+                )
+
+        if hasattr(response, "add_post_render_callback"):
+            response.add_post_render_callback(store)
+        return response
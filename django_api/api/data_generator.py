@@ -0,0 +1,349 @@
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.apps import apps
+from django.db import transaction
+
+from .cache import invalidate_models
+from .models import (
+    ContactDetail,
+    Contract,
+    Customer,
+    Invoice,
+    InvoiceDetail,
+    Item,
+    ItemGroup,
+    Serial,
+    Service,
+    ServiceDetail,
+)
+
+COMPANY_WORDS = [
+    "Pacific",
+    "Golden",
+    "Summit",
+    "Harbour",
+    "Crescent",
+    "Evergreen",
+    "Meridian",
+    "Sterling",
+    "Orchid",
+    "Horizon",
+    "Pinnacle",
+    "Lotus",
+    "Atlas",
+    "Borneo",
+    "Emerald",
+    "Titan",
+    "Zenith",
+    "Coral",
+    "Vertex",
+    "Nusantara",
+]
+COMPANY_TRADES = [
+    "Logistics",
+    "Engineering",
+    "Trading",
+    "Holdings",
+    "Healthcare",
+    "Foods",
+    "Construction",
+    "Properties",
+    "Education",
+    "Manufacturing",
+    "Textiles",
+    "Solutions",
+    "Printing",
+    "Legal",
+    "Accounting",
+    "Retail",
+]
+COMPANY_SUFFIXES = ["Sdn Bhd", "Berhad", "Enterprise", "Group", "Ltd"]
+CITIES = [
+    "Kuala Lumpur",
+    "Petaling Jaya",
+    "Shah Alam",
+    "Penang",
+    "Johor Bahru",
+    "Ipoh",
+    "Melaka",
+    "Kuching",
+    "Kota Kinabalu",
+    "Seremban",
+]
+STREETS = [
+    "Jalan Ampang",
+    "Jalan Tun Razak",
+    "Jalan Sultan",
+    "Jalan Bukit",
+    "Lorong Maju",
+]
+FIRST_NAMES = ["Aisyah", "Wei Ling", "Ravi", "Hafiz", "Mei", "Arjun", "Nurul", "Daniel"]
+LAST_NAMES = ["Tan", "Lim", "Abdullah", "Kumar", "Wong", "Ismail", "Lee", "Raj"]
+ROLES = ["IT Manager", "Office Manager", "Procurement", "Finance Manager"]
+TECHNICIANS = ["Mike Johnson", "Sarah Wilson", "Ahmad Faiz", "Kevin Ong", "Priya Devi"]
+CONTRACT_TYPES = ["Service Agreement", "Lease Agreement", "Maintenance", "Rental"]
+SERVICE_NAMES = [
+    "Quarterly Maintenance",
+    "Paper Jam Repair",
+    "Toner Replacement",
+    "Fuser Replacement",
+    "Installation",
+    "Network Configuration",
+]
+
+# (group, description, model prefix, price range in RM)
+ITEM_GROUPS = [
+    ("Printers", "Office printing equipment", "SP", (800, 9000)),
+    ("Copiers", "Document copying machines", "IM", (6000, 45000)),
+    ("Scanners", "Document scanners", "fi", (600, 7000)),
+    ("Consumables", "Toner, drums and maintenance kits", "TN", (50, 900)),
+]
+BRANDS = ["Ricoh", "Canon", "Brother", "Epson", "Kyocera", "Xerox", "HP", "Sharp"]
+
+
+@dataclass
+class GeneratorScale:
+    customers: int = 1000
+    items: int = 200
+    invoices_per_customer: int = 5
+    details_per_invoice: int = 4
+    contracts_per_customer: int = 1
+    contacts_per_contract: int = 2
+    services_per_customer: int = 2
+    details_per_service: int = 2
+
+
+@dataclass
+class GenerationResult:
+    counts: dict = field(default_factory=dict)
+    seconds: float = 0.0
+
+
+class SyntheticDataGenerator:
+    """Generate realistic, referentially consistent business data in bulk.
+
+    Rows are written with ``bulk_create`` in batches of ``batch_size``
+    customers, each batch in its own transaction, so memory stays flat no
+    matter how large the dataset is. The same ``seed`` and ``reference_date``
+    always produce the same data.
+    """
+
+    def __init__(
+        self,
+        scale=None,
+        seed=42,
+        batch_size=1000,
+        reference_date=None,
+        progress=None,
+    ):
+        self.scale = scale or GeneratorScale()
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.reference_date = reference_date or date.today()
+        self.progress = progress
+        self.counts = {}
+
+    def _bulk_create(self, model, objs):
+        created = model.objects.bulk_create(objs, batch_size=self.batch_size)
+        name = str(model._meta.verbose_name_plural)
+        self.counts[name] = self.counts.get(name, 0) + len(created)
+        return created
+
+    def _days_ago(self, max_days):
+        return self.reference_date - timedelta(days=self.rng.randrange(max_days))
+
+    def _person(self):
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def _phone(self):
+        return f"03-{self.rng.randrange(1000, 9999)} {self.rng.randrange(1000, 9999)}"
+
+    def generate(self):
+        started = time.perf_counter()
+        with transaction.atomic():
+            items = self.generate_catalogue()
+
+        total = self.scale.customers
+        for start in range(0, total, self.batch_size):
+            stop = min(start + self.batch_size, total)
+            with transaction.atomic():
+                self.generate_customer_batch(start, stop, items)
+            if self.progress:
+                self.progress(stop, total, dict(self.counts))
+
+        # bulk_create sends no post_save signals
+        invalidate_models(*apps.get_app_config("api").get_models())
+        return GenerationResult(
+            counts=dict(self.counts), seconds=time.perf_counter() - started
+        )
+
+    def generate_catalogue(self):
+        # Reuse groups that already exist (e.g. from the sample dataset).
+        groups = {}
+        for name, description, _prefix, _prices in ITEM_GROUPS:
+            group = ItemGroup.objects.filter(name=name).order_by("pk").first()
+            if group is None:
+                group = ItemGroup.objects.create(name=name, description=description)
+            groups[name] = group
+
+        items = []
+        for i in range(self.scale.items):
+            name, _description, prefix, (low, high) = self.rng.choice(ITEM_GROUPS)
+            brand = self.rng.choice(BRANDS)
+            items.append(
+                Item(
+                    name=f"{brand} {name[:-1]} {prefix}{i:04d}",
+                    model=f"{prefix} {self.rng.randrange(100, 9999)}{i:04d}",
+                    brand=brand,
+                    item_group=groups[name],
+                    price=Decimal(self.rng.randrange(low * 100, high * 100)) / 100,
+                )
+            )
+        return self._bulk_create(Item, items)
+
+    def generate_customer_batch(self, start, stop, items):
+        scale = self.scale
+        customers = self._bulk_create(
+            Customer,
+            [
+                Customer(
+                    name=(
+                        f"{self.rng.choice(COMPANY_WORDS)} "
+                        f"{self.rng.choice(COMPANY_TRADES)} "
+                        f"{self.rng.choice(COMPANY_SUFFIXES)} {i}"
+                    ),
+                    email=f"accounts{i}@customer{i}.example.com",
+                    phone=self._phone(),
+                    address=(
+                        f"{self.rng.randrange(1, 300)}, {self.rng.choice(STREETS)}, "
+                        f"{self.rng.choice(CITIES)}"
+                    ),
+                )
+                for i in range(start, stop)
+            ],
+        )
+
+        # Plan invoice lines first so each invoice total matches its details.
+        invoices, lines = [], []
+        for customer in customers:
+            for n in range(scale.invoices_per_customer):
+                invoice_lines = []
+                for _ in range(scale.details_per_invoice):
+                    item = self.rng.choice(items)
+                    quantity = self.rng.randint(1, 3)
+                    invoice_lines.append((item, quantity, item.price * quantity))
+                invoices.append(
+                    Invoice(
+                        invoice_number=f"INV-{customer.pk:07d}-{n:03d}",
+                        customer=customer,
+                        invoice_date=self._days_ago(1500),
+                        total_amount=sum(total for _, _, total in invoice_lines),
+                        status=self.rng.choice(["paid", "paid", "paid", "pending"]),
+                    )
+                )
+                lines.append(invoice_lines)
+        invoices = self._bulk_create(Invoice, invoices)
+
+        details = []
+        for invoice, invoice_lines in zip(invoices, lines):
+            for item, quantity, total in invoice_lines:
+                details.append(
+                    InvoiceDetail(
+                        invoice=invoice,
+                        item=item,
+                        quantity=quantity,
+                        unit_price=item.price,
+                        total_price=total,
+                    )
+                )
+        details = self._bulk_create(InvoiceDetail, details)
+
+        # One serialised machine per non-consumable line, owned by the customer.
+        serials, owners = [], []
+        for detail in details:
+            if detail.item.item_group.name == "Consumables":
+                continue
+            manufactured = detail.invoice.invoice_date - timedelta(days=30)
+            serials.append(
+                Serial(
+                    serial_number=f"SN{detail.pk:010d}",
+                    item=detail.item,
+                    status="active",
+                    manufactured_date=manufactured,
+                    warranty_end_date=manufactured + timedelta(days=3 * 365),
+                )
+            )
+            owners.append(detail.invoice.customer_id)
+        serials = self._bulk_create(Serial, serials)
+        serials_by_customer = {}
+        for serial, customer_id in zip(serials, owners):
+            serials_by_customer.setdefault(customer_id, []).append(serial)
+
+        contracts = []
+        for customer in customers:
+            for n in range(scale.contracts_per_customer):
+                start_date = self._days_ago(900)
+                end_date = start_date + timedelta(days=365 * self.rng.randint(1, 3))
+                contracts.append(
+                    Contract(
+                        contract_number=f"CON-{customer.pk:07d}-{n:03d}",
+                        customer=customer,
+                        start_date=start_date,
+                        end_date=end_date,
+                        contract_type=self.rng.choice(CONTRACT_TYPES),
+                        status=(
+                            "active" if end_date >= self.reference_date else "expired"
+                        ),
+                        terms="Monthly maintenance and support",
+                    )
+                )
+        contracts = self._bulk_create(Contract, contracts)
+        self._bulk_create(
+            ContactDetail,
+            [
+                ContactDetail(
+                    contract=contract,
+                    contact_person=self._person(),
+                    role=self.rng.choice(ROLES),
+                    phone=self._phone(),
+                    email=f"contact{n}@customer{contract.customer_id}.example.com",
+                )
+                for contract in contracts
+                for n in range(scale.contacts_per_contract)
+            ],
+        )
+
+        services = []
+        for customer in customers:
+            for _ in range(scale.services_per_customer):
+                services.append(
+                    Service(
+                        service_name=self.rng.choice(SERVICE_NAMES),
+                        customer=customer,
+                        service_date=self._days_ago(700),
+                        technician=self.rng.choice(TECHNICIANS),
+                        status=self.rng.choice(["completed", "completed", "scheduled"]),
+                        notes="Generated service visit",
+                    )
+                )
+        services = self._bulk_create(Service, services)
+
+        service_details = []
+        for service in services:
+            owned = serials_by_customer.get(service.customer_id, [])
+            for _ in range(scale.details_per_service):
+                service_details.append(
+                    ServiceDetail(
+                        service=service,
+                        serial=self.rng.choice(owned) if owned else None,
+                        description="Inspection and cleaning",
+                        parts_used=self.rng.choice(["", "Toner cartridge", "Roller"]),
+                        labor_hours=Decimal(self.rng.randrange(25, 400)) / 100,
+                        cost=Decimal(self.rng.randrange(5000, 90000)) / 100,
+                    )
+                )
+        self._bulk_create(ServiceDetail, service_details)
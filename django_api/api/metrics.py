@@ -0,0 +1,118 @@
+import os
+import time
+
+from django.db import connection
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Under gunicorn, PROMETHEUS_MULTIPROC_DIR is set by gunicorn.conf.py before
+# this module is imported, so every worker writes its samples to files there
+# and /metrics adds them up.
+
+REQUEST_DURATION = Histogram(
+    "django_api_http_request_duration_seconds",
+    "Time to handle a request, by view and status",
+    ["method", "view", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "django_api_http_requests_in_progress",
+    "Requests being handled",
+    multiprocess_mode="livesum",
+)
+WORKER_CAPACITY = Gauge(
+    "django_api_worker_capacity",
+    "Requests the running workers can handle at once",
+    multiprocess_mode="livesum",
+)
+DB_QUERIES = Histogram(
+    "django_api_db_queries_per_request",
+    "SQL statements run to handle one request",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+DB_QUERY_DURATION = Counter(
+    "django_api_db_query_seconds",
+    "Time spent running SQL statements",
+    ["view"],
+)
+RESPONSE_CACHE = Counter(
+    "django_api_response_cache_requests",
+    "Cacheable GET requests by route and outcome (hit, miss, not_modified)",
+    ["route", "outcome"],
+)
+
+
+def view_name(request):
+    match = request.resolver_match
+    return match.view_name if match is not None and match.view_name else "unmatched"
+
+
+class MetricsMiddleware:
+    """Record latency, SQL statement count and concurrency of each request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = {"count": 0, "seconds": 0.0}
+
+        def count_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries["count"] += 1
+                queries["seconds"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        status = 500
+        REQUESTS_IN_PROGRESS.inc()
+        try:
+            with connection.execute_wrapper(count_query):
+                response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+            view = view_name(request)
+            REQUEST_DURATION.labels(request.method, view, status).observe(
+                time.perf_counter() - start
+            )
+            DB_QUERIES.labels(view).observe(queries["count"])
+            DB_QUERY_DURATION.labels(view).inc(queries["seconds"])
+
+
+def registry():
+    """Registry holding the samples of all workers."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        combined = CollectorRegistry()
+        multiprocess.MultiProcessCollector(combined)
+        return combined
+    return REGISTRY
+
+
+def response_cache_counts():
+    """Response cache requests so far, keyed by (route, outcome)."""
+    counts = {}
+    for metric in registry().collect():
+        if metric.name != "django_api_response_cache_requests":
+            continue
+        for sample in metric.samples:
+            if sample.name.endswith("_total"):
+                key = (sample.labels["route"], sample.labels["outcome"])
+                counts[key] = counts.get(key, 0) + sample.value
+    return counts
+
+
+def metrics_view(request):
+    """Prometheus exposition of this service's metrics, across all workers."""
+    return HttpResponse(generate_latest(registry()), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:31
+
+import logging
+
+from django.db import DatabaseError, migrations, models, transaction
+
+logger = logging.getLogger(__name__)
+
+# Django compiles icontains/istartswith on PostgreSQL to
+# UPPER("name"::text) LIKE UPPER(...), so both indexes are built on that
+# expression: a pattern-ops btree for prefix matches and, when the pg_trgm
+# extension is available, a trigram GIN index for substring matches.
+CREATE_PREFIX_INDEX = (
+    "CREATE INDEX IF NOT EXISTS api_customer_name_upper_prefix_idx "
+    "ON api_customer (UPPER(name::text) text_pattern_ops)"
+)
+CREATE_TRIGRAM_INDEX = (
+    "CREATE INDEX IF NOT EXISTS api_customer_name_upper_trgm_idx "
+    "ON api_customer USING gin (UPPER(name::text) gin_trgm_ops)"
+)
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(CREATE_PREFIX_INDEX)
+    # Creating the extension needs it installed on the server and superuser,
+    # or CREATE on the database since PostgreSQL 13 (pg_trgm is a trusted
+    # extension). Without it substring searches still work, only without the
+    # trigram index; the savepoint keeps the failure from aborting the
+    # migration.
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            schema_editor.execute(CREATE_TRIGRAM_INDEX)
+    except DatabaseError as e:
+        logger.warning("Skipping the customer name trigram index: %s", e)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS api_customer_name_upper_trgm_idx")
+    schema_editor.execute("DROP INDEX IF EXISTS api_customer_name_upper_prefix_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['name'], name='api_customer_name_idx'),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
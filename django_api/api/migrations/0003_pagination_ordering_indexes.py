@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_customer_name_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['status', 'id'], name='api_contract_status_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['-invoice_date', '-id'], name='api_invoice_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['customer', '-invoice_date', '-id'], name='api_invoice_cust_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['-service_date', '-id'], name='api_service_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['customer', '-service_date', '-id'], name='api_service_cust_date_idx'),
+        ),
+    ]
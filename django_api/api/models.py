@@ -8,6 +8,9 @@ class Customer(models.Model):
     address = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["name"], name="api_customer_name_idx")]
+
     def __str__(self):
         return self.name
 
@@ -38,6 +41,17 @@ class Invoice(models.Model):
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, default="pending")
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["-invoice_date", "-id"], name="api_invoice_date_id_idx"
+            ),
+            models.Index(
+                fields=["customer", "-invoice_date", "-id"],
+                name="api_invoice_cust_date_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"Invoice {self.invoice_number} - {self.customer.name}"
 
@@ -75,6 +89,11 @@ class Contract(models.Model):
     status = models.CharField(max_length=20, default="active")
     terms = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "id"], name="api_contract_status_id_idx")
+        ]
+
     def __str__(self):
         return f"Contract {self.contract_number} - {self.customer.name}"
 
@@ -100,6 +119,17 @@ class Service(models.Model):
     status = models.CharField(max_length=20, default="scheduled")
     notes = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["-service_date", "-id"], name="api_service_date_id_idx"
+            ),
+            models.Index(
+                fields=["customer", "-service_date", "-id"],
+                name="api_service_cust_date_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.service_name} - {self.customer.name} ({self.service_date})"
 
@@ -0,0 +1,150 @@
+import json
+from base64 import b64decode, b64encode
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+def _name(field):
+    return field.lstrip("-")
+
+
+def _invert(field):
+    return _name(field) if field.startswith("-") else f"-{field}"
+
+
+def _ordering_field(queryset, path):
+    """Field an ordering path such as ``customer__name`` ends on, or the
+    output field of the annotation it names."""
+    if path in queryset.query.annotations:
+        return queryset.query.annotations[path].output_field
+    model, field = queryset.model, None
+    for attr in path.split("__"):
+        field = model._meta.pk if attr == "pk" else model._meta.get_field(attr)
+        model = field.related_model
+    return field
+
+
+class KeysetPagination(CursorPagination):
+    """Keyset pagination on every column of the queryset's own ordering.
+
+    DRF's cursor only holds the first ordering column and skips ties with an
+    offset. Here the cursor holds the last row's value of each column, and
+    the next page is ``WHERE (a, b, id) > (:a, :b, :id)`` (expanded per
+    column, so mixed directions work), which the composite indexes on those
+    columns answer without scanning earlier rows. The ordering is completed
+    with ``id`` so it is unique; its columns must not be NULL. Each viewset
+    orders its queryset, so the same paginator works for list endpoints and
+    for custom actions that paginate querysets of a different model.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    ordering = "id"
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(
+            queryset.query.order_by or queryset.model._meta.ordering or ("id",)
+        )
+        if not {"id", "pk"} & {_name(field) for field in ordering}:
+            ordering += ("-id" if ordering[-1].startswith("-") else "id",)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.fields = [_ordering_field(queryset, _name(f)) for f in self.ordering]
+        self.cursor = self.decode_cursor(request)
+        values, reverse = self.cursor if self.cursor else (None, False)
+
+        # Previous pages are read backwards from the first row shown
+        ordering = tuple(map(_invert, self.ordering)) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.after(ordering, values))
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        if reverse:
+            self.page.reverse()
+        self.has_next = has_more if not reverse else True
+        self.has_previous = has_more if reverse else values is not None
+        return self.page
+
+    @staticmethod
+    def after(ordering, values):
+        """Rows that come after ``values`` in ``ordering``."""
+        conditions = []
+        for i, field in enumerate(ordering):
+            lookup = "lt" if field.startswith("-") else "gt"
+            equal = {_name(f): value for f, value in zip(ordering[:i], values)}
+            conditions.append(Q(**equal, **{f"{_name(field)}__{lookup}": values[i]}))
+        # Lets the index range-scan from the cursor on the first column
+        first = "lte" if ordering[0].startswith("-") else "gte"
+        bound = Q(**{f"{_name(ordering[0])}__{first}": values[0]})
+        return bound & reduce(or_, conditions)
+
+    def row_values(self, row):
+        values = []
+        for field in self.ordering:
+            value = row
+            for attr in _name(field).split("__"):
+                value = getattr(value, "id" if attr == "pk" else attr)
+            values.append(value)
+        return values
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            data = json.loads(b64decode(encoded.encode("ascii")).decode("utf-8"))
+            values, reverse = data["v"], bool(data.get("r"))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            # Ordering columns are never NULL, and values of the wrong type
+            # would otherwise only fail once the query runs
+            if any(v is None or isinstance(v, (dict, list)) for v in values):
+                raise ValueError
+            values = [
+                field.to_python(value) for field, value in zip(self.fields, values)
+            ]
+        except (TypeError, ValueError, KeyError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message) from None
+        return values, reverse
+
+    def encode_cursor(self, values, reverse=False):
+        data = {"v": values, "r": 1} if reverse else {"v": values}
+        encoded = b64encode(json.dumps(data, cls=DjangoJSONEncoder).encode("utf-8"))
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded.decode("ascii")
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.row_values(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.row_values(self.page[0]), reverse=True)
+
+
+class CustomerSearchPagination(KeysetPagination):
+    page_size = 10
+    page_size_query_param = "limit"
+    max_page_size = 50
@@ -14,19 +14,63 @@ from .models import (
 )
 
 
-class CustomerSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """Sparse fieldsets for a ModelSerializer.
+
+    ``fields`` keeps only the named fields, ``exclude`` drops fields and
+    ``expand`` replaces a related id with the nested object listed in
+    ``Meta.expandable``. ``Meta.relations`` maps each field to the lookups it
+    reads, so views can skip joins and prefetches for fields left out.
+    """
+
+    def __init__(self, *args, fields=None, exclude=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        expandable = getattr(self.Meta, "expandable", {})
+        for name in expand or ():
+            if name in expandable and name in self.fields:
+                serializer_class, _lookups = expandable[name]
+                self.fields[name] = serializer_class(read_only=True)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in exclude or ():
+            self.fields.pop(name, None)
+
+    def related_lookups(self, expand=()):
+        """Lookups needed to render the fields this serializer kept."""
+        relations = getattr(self.Meta, "relations", {})
+        expandable = getattr(self.Meta, "expandable", {})
+        lookups = []
+        for name in self.fields:
+            lookups += relations.get(name, [])
+            if name in expand and name in expandable:
+                lookups += expandable[name][1]
+        return lookups
+
+
+class DynamicFieldsModelSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    pass
+
+
+class CustomerSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Customer
         fields = "__all__"
 
 
-class ItemGroupSerializer(serializers.ModelSerializer):
+class CustomerSearchSerializer(DynamicFieldsModelSerializer):
+    class Meta:
+        model = Customer
+        fields = ["id", "name", "email", "phone"]
+
+
+class ItemGroupSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = ItemGroup
         fields = "__all__"
 
 
-class ItemSerializer(serializers.ModelSerializer):
+class ItemSerializer(DynamicFieldsModelSerializer):
     item_group_name = serializers.CharField(source="item_group.name", read_only=True)
     price_formatted = serializers.SerializerMethodField()
 
@@ -42,12 +86,14 @@ class ItemSerializer(serializers.ModelSerializer):
             "price",
             "price_formatted",
         ]
+        relations = {"item_group_name": ["item_group"]}
+        expandable = {"item_group": (ItemGroupSerializer, ["item_group"])}
 
     def get_price_formatted(self, obj):
         return f"RM {obj.price:.2f}"
 
 
-class InvoiceDetailSerializer(serializers.ModelSerializer):
+class InvoiceDetailSerializer(DynamicFieldsModelSerializer):
     item_name = serializers.CharField(source="item.name", read_only=True)
     item_brand = serializers.CharField(source="item.brand", read_only=True)
     item_model = serializers.CharField(source="item.model", read_only=True)
@@ -76,7 +122,7 @@ class InvoiceDetailSerializer(serializers.ModelSerializer):
         return f"RM {obj.total_price:.2f}"
 
 
-class InvoiceSerializer(serializers.ModelSerializer):
+class InvoiceSerializer(DynamicFieldsModelSerializer):
     customer_name = serializers.CharField(source="customer.name", read_only=True)
     details = InvoiceDetailSerializer(many=True, read_only=True)
     total_amount_formatted = serializers.SerializerMethodField()
@@ -94,12 +140,14 @@ class InvoiceSerializer(serializers.ModelSerializer):
             "status",
             "details",
         ]
+        relations = {"customer_name": ["customer"], "details": ["details__item"]}
+        expandable = {"customer": (CustomerSerializer, ["customer"])}
 
     def get_total_amount_formatted(self, obj):
         return f"RM {obj.total_amount:.2f}"
 
 
-class SerialSerializer(serializers.ModelSerializer):
+class SerialSerializer(DynamicFieldsModelSerializer):
     item_name = serializers.CharField(source="item.name", read_only=True)
     item_brand = serializers.CharField(source="item.brand", read_only=True)
     item_model = serializers.CharField(source="item.model", read_only=True)
@@ -117,15 +165,21 @@ class SerialSerializer(serializers.ModelSerializer):
             "manufactured_date",
             "warranty_end_date",
         ]
+        relations = {
+            "item_name": ["item"],
+            "item_brand": ["item"],
+            "item_model": ["item"],
+        }
+        expandable = {"item": (ItemSerializer, ["item__item_group"])}
 
 
-class ContactDetailSerializer(serializers.ModelSerializer):
+class ContactDetailSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = ContactDetail
         fields = "__all__"
 
 
-class ContractSerializer(serializers.ModelSerializer):
+class ContractSerializer(DynamicFieldsModelSerializer):
     customer_name = serializers.CharField(source="customer.name", read_only=True)
     contact_details = ContactDetailSerializer(many=True, read_only=True)
 
@@ -143,9 +197,14 @@ class ContractSerializer(serializers.ModelSerializer):
             "terms",
             "contact_details",
         ]
+        relations = {
+            "customer_name": ["customer"],
+            "contact_details": ["contact_details"],
+        }
+        expandable = {"customer": (CustomerSerializer, ["customer"])}
 
 
-class ServiceDetailSerializer(serializers.ModelSerializer):
+class ServiceDetailSerializer(DynamicFieldsModelSerializer):
     serial_number = serializers.CharField(source="serial.serial_number", read_only=True)
     cost_formatted = serializers.SerializerMethodField()
 
@@ -166,7 +225,7 @@ class ServiceDetailSerializer(serializers.ModelSerializer):
         return f"RM {obj.cost:.2f}"
 
 
-class ServiceSerializer(serializers.ModelSerializer):
+class ServiceSerializer(DynamicFieldsModelSerializer):
     customer_name = serializers.CharField(source="customer.name", read_only=True)
     details = ServiceDetailSerializer(many=True, read_only=True)
 
@@ -183,3 +242,5 @@ class ServiceSerializer(serializers.ModelSerializer):
             "notes",
             "details",
         ]
+        relations = {"customer_name": ["customer"], "details": ["details__serial"]}
+        expandable = {"customer": (CustomerSerializer, ["customer"])}
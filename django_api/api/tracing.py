@@ -0,0 +1,177 @@
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.sampling import ALWAYS_OFF, ALWAYS_ON, ParentBased
+
+logger = logging.getLogger("tracing")
+
+# Longer statements are cut in span attributes and logs
+MAX_STATEMENT_LENGTH = 1000
+
+
+def span_record(span):
+    """One finished span as a flat, JSON-serialisable dict."""
+    parent = span.parent.span_id if span.parent is not None else None
+    return {
+        "service": span.resource.attributes.get("service.name"),
+        "trace_id": trace.format_trace_id(span.context.trace_id),
+        "span_id": trace.format_span_id(span.context.span_id),
+        "parent_id": trace.format_span_id(parent) if parent else None,
+        "name": span.name,
+        "start": span.start_time / 1e9,
+        "duration_ms": round((span.end_time - span.start_time) / 1e6, 3),
+        "status": span.status.status_code.name,
+        "attributes": dict(span.attributes or {}),
+    }
+
+
+class LogSpanExporter(SpanExporter):
+    """Write each span as one JSON log line on the ``tracing`` logger."""
+
+    def __init__(self):
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+
+    def export(self, spans):
+        for span in spans:
+            logger.info(json.dumps(span_record(span), default=str))
+        return SpanExportResult.SUCCESS
+
+
+class FileSpanExporter(SpanExporter):
+    """Append spans to ``path`` as JSON lines, one span per line."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        lines = "".join(
+            json.dumps(span_record(span), default=str) + "\n" for span in spans
+        )
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+        return SpanExportResult.SUCCESS
+
+
+def create_exporter(name):
+    if name == "log":
+        return LogSpanExporter()
+    if name == "file":
+        return FileSpanExporter(settings.TRACING_FILE)
+    if name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    raise ValueError(f"Unknown tracing exporter: {name}")
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """Tracer provider built from the TRACING_* settings on first use.
+
+    When enabled, a request that carries a ``traceparent`` follows the
+    caller's sampling decision. When disabled nothing is recorded, but trace
+    ids are still read from the caller and returned.
+    """
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                enabled = settings.TRACING_ENABLED
+                provider = TracerProvider(
+                    resource=Resource.create(
+                        {"service.name": settings.TRACING_SERVICE_NAME}
+                    ),
+                    sampler=ParentBased(ALWAYS_ON) if enabled else ALWAYS_OFF,
+                )
+                if enabled:
+                    for name in settings.TRACING_EXPORTERS:
+                        provider.add_span_processor(
+                            BatchSpanProcessor(create_exporter(name))
+                        )
+                _provider = provider
+    return _provider
+
+
+def get_tracer():
+    return get_provider().get_tracer("django_api")
+
+
+class TracingMiddleware:
+    """Trace each request, continuing the caller's trace when it sends one.
+
+    The Flask tools send a W3C ``traceparent`` header, so the request span
+    becomes a child of the tool call that made it. Every SQL statement run
+    while handling the request gets its own span, and the request span
+    carries the number of statements and their total time. The trace id is
+    returned in ``X-Trace-Id``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        tracer = get_tracer()
+        queries = {"count": 0, "seconds": 0.0}
+
+        def trace_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            with tracer.start_as_current_span(
+                "db.query",
+                kind=trace.SpanKind.CLIENT,
+                attributes={
+                    "db.system": connection.vendor,
+                    "db.statement": sql[:MAX_STATEMENT_LENGTH],
+                },
+            ):
+                try:
+                    return execute(sql, params, many, context)
+                finally:
+                    queries["count"] += 1
+                    queries["seconds"] += time.perf_counter() - start
+
+        with tracer.start_as_current_span(
+            f"{request.method} {request.path}",
+            context=propagate.extract(request.headers),
+            kind=trace.SpanKind.SERVER,
+            attributes={"http.method": request.method, "http.target": request.path},
+        ) as span:
+            with connection.execute_wrapper(trace_query):
+                response = self.get_response(request)
+            match = request.resolver_match
+            if match is not None and match.view_name:
+                # Name by view so requests for different ids group together
+                span.update_name(f"{request.method} {match.view_name}")
+            span.set_attributes(
+                {
+                    "http.status_code": response.status_code,
+                    "db.queries": queries["count"],
+                    "db.duration_ms": round(queries["seconds"] * 1000, 3),
+                }
+            )
+            response["X-Trace-Id"] = trace.format_trace_id(
+                span.get_span_context().trace_id
+            )
+        return response
@@ -1,6 +1,7 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from .metrics import metrics_view
 from .views import (
     ContractViewSet,
     CustomerViewSet,
@@ -8,6 +9,8 @@ from .views import (
     ItemViewSet,
     SerialViewSet,
     ServiceViewSet,
+    cache_stats_view,
+    data_version_view,
     health_check,
 )
 
@@ -22,4 +25,7 @@ router.register(r"services", ServiceViewSet)
 urlpatterns = [
     path("api/", include(router.urls)),
     path("api/health/", health_check, name="health_check"),
+    path("api/cache/stats/", cache_stats_view, name="cache_stats"),
+    path("api/cache/version/", data_version_view, name="data_version"),
+    path("metrics", metrics_view, name="metrics"),
 ]
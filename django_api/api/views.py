@@ -1,13 +1,28 @@
-from django.db.models import Q
+from django.db.models import Case, IntegerField, Q, Value, When
 from django.http import JsonResponse
 from rest_framework import viewsets
 from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
 
-from .models import Contract, Customer, Invoice, Item, Serial, Service
+from .cache import CachedResponseMixin, cache_stats, data_version
+from .models import (
+    ContactDetail,
+    Contract,
+    Customer,
+    Invoice,
+    InvoiceDetail,
+    Item,
+    ItemGroup,
+    Serial,
+    Service,
+    ServiceDetail,
+)
+from .pagination import CustomerSearchPagination
 from .serializers import (
     ContractSerializer,
+    CustomerSearchSerializer,
     CustomerSerializer,
+    DynamicFieldsMixin,
     InvoiceSerializer,
     ItemSerializer,
     SerialSerializer,
@@ -15,53 +30,151 @@ from .serializers import (
 )
 
 
-class CustomerViewSet(viewsets.ModelViewSet):
-    queryset = Customer.objects.all()
+class SparseFieldsetMixin:
+    """Apply ``?fields=``, ``?exclude=`` and ``?expand=`` to GET responses.
+
+    Each parameter takes comma-separated field names. The queryset's
+    ``select_related``/``prefetch_related`` are rebuilt from the fields that
+    remain, so relations that are not rendered are never queried.
+    """
+
+    sparse_params = ("fields", "exclude", "expand")
+
+    def sparse_fieldset(self):
+        if self.request.method != "GET":
+            return {}
+        fieldset = {}
+        for param in self.sparse_params:
+            value = self.request.query_params.get(param, "")
+            names = [name.strip() for name in value.split(",") if name.strip()]
+            if names:
+                fieldset[param] = names
+        return fieldset
+
+    def prune_queryset(self, queryset, serializer_class):
+        fieldset = self.sparse_fieldset()
+        if not fieldset or not issubclass(serializer_class, DynamicFieldsMixin):
+            return queryset
+
+        serializer = serializer_class(context=self.get_serializer_context(), **fieldset)
+        select, prefetch = [], []
+        for lookup in serializer.related_lookups(fieldset.get("expand", ())):
+            field = queryset.model._meta.get_field(lookup.split("__")[0])
+            if field.one_to_many or field.many_to_many:
+                prefetch.append(lookup)
+            else:
+                select.append(lookup)
+
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return self.prune_queryset(queryset, self.get_serializer_class())
+
+    def get_serializer(self, *args, **kwargs):
+        if issubclass(self.get_serializer_class(), DynamicFieldsMixin):
+            kwargs.update(self.sparse_fieldset())
+        return super().get_serializer(*args, **kwargs)
+
+
+class PaginatedActionMixin(SparseFieldsetMixin):
+    """Paginate the querysets built by custom actions like the list view."""
+
+    def paginated_response(self, queryset, serializer_class=None):
+        serializer_class = serializer_class or self.get_serializer_class()
+        queryset = self.prune_queryset(queryset, serializer_class)
+        page = self.paginate_queryset(queryset)
+        serializer = serializer_class(
+            page,
+            many=True,
+            context=self.get_serializer_context(),
+            **self.sparse_fieldset(),
+        )
+        return self.get_paginated_response(serializer.data)
+
+
+class CustomerViewSet(CachedResponseMixin, PaginatedActionMixin, viewsets.ModelViewSet):
+    queryset = Customer.objects.all().order_by("id")
     serializer_class = CustomerSerializer
+    cache_models = (
+        Customer,
+        Invoice,
+        InvoiceDetail,
+        Item,
+        Contract,
+        ContactDetail,
+        Service,
+        ServiceDetail,
+        Serial,
+    )
+
+    @action(detail=False, methods=["get"], pagination_class=CustomerSearchPagination)
+    def search(self, request):
+        name = request.query_params.get("name", "").strip()
+
+        queryset = Customer.objects.only("id", "name", "email", "phone")
+        if name:
+            # Prefix matches rank ahead of substring matches.
+            queryset = queryset.filter(name__icontains=name).annotate(
+                prefix_rank=Case(
+                    When(name__istartswith=name, then=Value(0)),
+                    default=Value(1),
+                    output_field=IntegerField(),
+                )
+            )
+            queryset = queryset.order_by("prefix_rank", "name", "id")
+        else:
+            queryset = queryset.order_by("name", "id")
+
+        return self.paginated_response(queryset, CustomerSearchSerializer)
 
     @action(detail=True, methods=["get"])
     def invoices(self, request, pk=None):
         customer = self.get_object()
-        invoices = Invoice.objects.filter(customer=customer)
-        serializer = InvoiceSerializer(invoices, many=True)
-        return Response(serializer.data)
+        invoices = InvoiceViewSet.queryset.filter(customer=customer)
+        return self.paginated_response(invoices, InvoiceSerializer)
 
     @action(detail=True, methods=["get"])
     def contracts(self, request, pk=None):
         customer = self.get_object()
-        contracts = Contract.objects.filter(customer=customer)
-        serializer = ContractSerializer(contracts, many=True)
-        return Response(serializer.data)
+        contracts = ContractViewSet.queryset.filter(customer=customer)
+        return self.paginated_response(contracts, ContractSerializer)
 
     @action(detail=True, methods=["get"])
     def services(self, request, pk=None):
         customer = self.get_object()
-        services = Service.objects.filter(customer=customer)
-        serializer = ServiceSerializer(services, many=True)
-        return Response(serializer.data)
+        services = ServiceViewSet.queryset.filter(customer=customer)
+        return self.paginated_response(services, ServiceSerializer)
 
 
-class InvoiceViewSet(viewsets.ModelViewSet):
+class InvoiceViewSet(CachedResponseMixin, PaginatedActionMixin, viewsets.ModelViewSet):
     queryset = (
         Invoice.objects.all()
         .select_related("customer")
         .prefetch_related("details__item")
+        .order_by("-invoice_date", "-id")
     )
     serializer_class = InvoiceSerializer
+    cache_models = (Invoice, InvoiceDetail, Customer, Item)
 
     @action(detail=False, methods=["get"])
     def by_customer(self, request):
         customer_name = request.query_params.get("customer_name", "")
         if customer_name:
             invoices = self.queryset.filter(customer__name__icontains=customer_name)
-            serializer = self.get_serializer(invoices, many=True)
-            return Response(serializer.data)
+            return self.paginated_response(invoices)
         return Response({"error": "customer_name parameter required"}, status=400)
 
 
-class ItemViewSet(viewsets.ModelViewSet):
-    queryset = Item.objects.all().select_related("item_group")
+class ItemViewSet(CachedResponseMixin, PaginatedActionMixin, viewsets.ModelViewSet):
+    queryset = Item.objects.all().select_related("item_group").order_by("id")
     serializer_class = ItemSerializer
+    cache_models = (Item, ItemGroup)
 
     @action(detail=False, methods=["get"])
     def search(self, request):
@@ -78,46 +191,48 @@ class ItemViewSet(viewsets.ModelViewSet):
         if brand:
             queryset = queryset.filter(brand__icontains=brand)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(queryset)
 
 
-class ContractViewSet(viewsets.ModelViewSet):
+class ContractViewSet(CachedResponseMixin, PaginatedActionMixin, viewsets.ModelViewSet):
     queryset = (
         Contract.objects.all()
         .select_related("customer")
         .prefetch_related("contact_details")
+        .order_by("id")
     )
     serializer_class = ContractSerializer
+    cache_models = (Contract, ContactDetail, Customer)
 
     @action(detail=False, methods=["get"])
     def active(self, request):
         contracts = self.queryset.filter(status="active")
-        serializer = self.get_serializer(contracts, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(contracts)
 
 
-class SerialViewSet(viewsets.ModelViewSet):
-    queryset = Serial.objects.all().select_related("item")
+class SerialViewSet(CachedResponseMixin, PaginatedActionMixin, viewsets.ModelViewSet):
+    queryset = Serial.objects.all().select_related("item").order_by("id")
     serializer_class = SerialSerializer
+    cache_models = (Serial, Item)
 
     @action(detail=False, methods=["get"])
     def by_item(self, request):
         item_id = request.query_params.get("item_id", "")
         if item_id:
             serials = self.queryset.filter(item_id=item_id)
-            serializer = self.get_serializer(serials, many=True)
-            return Response(serializer.data)
+            return self.paginated_response(serials)
         return Response({"error": "item_id parameter required"}, status=400)
 
 
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(CachedResponseMixin, PaginatedActionMixin, viewsets.ModelViewSet):
     queryset = (
         Service.objects.all()
         .select_related("customer")
         .prefetch_related("details__serial")
+        .order_by("-service_date", "-id")
     )
     serializer_class = ServiceSerializer
+    cache_models = (Service, ServiceDetail, Customer, Serial)
 
     @action(detail=False, methods=["get"])
     def by_date_range(self, request):
@@ -130,11 +245,34 @@ class ServiceViewSet(viewsets.ModelViewSet):
         if end_date:
             queryset = queryset.filter(service_date__lte=end_date)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(queryset)
 
 
 @api_view(["GET"])
 def health_check(request):
     """Health check endpoint for Docker container monitoring"""
     return JsonResponse({"status": "healthy", "service": "django-api"})
+
+
+@api_view(["GET"])
+def cache_stats_view(request):
+    """Hit/miss counters of the response cache"""
+    routes = []
+    for viewset in (
+        CustomerViewSet,
+        InvoiceViewSet,
+        ItemViewSet,
+        ContractViewSet,
+        SerialViewSet,
+        ServiceViewSet,
+    ):
+        basename = viewset.queryset.model._meta.object_name.lower()
+        routes += [f"{basename}-list", f"{basename}-detail"]
+        routes += [f"{basename}-{a.url_name}" for a in viewset.get_extra_actions()]
+    return Response(cache_stats(routes))
+
+
+@api_view(["GET"])
+def data_version_view(request):
+    """Token that changes whenever any business data is written"""
+    return Response({"version": data_version()})
@@ -0,0 +1,259 @@
+"""
+Query-count, latency and payload-size benchmark for the Django API.
+
+Seeds a synthetic dataset into a throwaway test database, requests every GET
+route in api/urls.py (router routes and plain views alike) and writes a JSON report with the query count,
+p50/p95 latency and response size of each route. Exits non-zero when a route
+exceeds the thresholds file or regresses against a previous report.
+
+Runs against the configured PostgreSQL server, or against SQLite with
+DATABASE_ENGINE=sqlite. No other services are needed.
+
+    python benchmark.py --customers 50000 --invoices-per-customer 5 \\
+        --details-per-invoice 4 --report benchmark_report.json
+    python benchmark.py --compare benchmark_report.json
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mock_api.settings")
+django.setup()
+
+from api.data_generator import GeneratorScale, SyntheticDataGenerator
+from api.models import Customer, Item
+from api.urls import router, urlpatterns
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import URLPattern, reverse
+
+DEFAULT_THRESHOLDS = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "benchmark_thresholds.json"
+)
+
+
+def route_params():
+    """Query parameters for routes that need them to return data."""
+    first_item = Item.objects.order_by("pk").first()
+    first_customer = Customer.objects.order_by("pk").first()
+    # Search on the first word of a real name so searches match many rows
+    name = first_customer.name.split()[0] if first_customer else "Company"
+    return {
+        "customer-search": {"name": name},
+        "invoice-by-customer": {"customer_name": name},
+        "item-search": {"brand": first_item.brand if first_item else "Ricoh"},
+        "serial-by-item": {"item_id": first_item.pk if first_item else 0},
+        "service-by-date-range": {
+            "start_date": (date.today() - timedelta(days=90)).isoformat()
+        },
+    }
+
+
+def discover_routes():
+    """Every GET route registered on the API router, plus the API's other
+    views (health check, cache stats and version, metrics)."""
+    routes = []
+    for _prefix, viewset, basename in router.registry:
+        model = viewset.queryset.model
+        for route in router.get_routes(viewset):
+            if "get" not in router.get_method_map(viewset, route.mapping):
+                continue
+            name = route.name.format(basename=basename)
+            kwargs = {}
+            if route.detail:
+                pk = model.objects.order_by("pk").values_list("pk", flat=True).first()
+                kwargs = {"pk": pk}
+            routes.append((name, reverse(name, kwargs=kwargs)))
+    for pattern in urlpatterns:
+        # The router's include() is covered above; other views take no arguments
+        if isinstance(pattern, URLPattern) and not pattern.pattern.converters:
+            routes.append((pattern.name, reverse(pattern.name)))
+    return routes
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+@override_settings(API_CACHE_ENABLED=False)
+def measure_routes(repeat=20, warmup=2):
+    """Measure each route uncached, so repeats see the real query cost."""
+    client = Client()
+    params = route_params()
+    results = {}
+    for name, url in discover_routes():
+        query = params.get(name, {})
+        for _ in range(warmup):
+            client.get(url, query)
+
+        timings, queries = [], 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = client.get(url, query)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = max(queries, len(ctx.captured_queries))
+
+        results[name] = {
+            "url": url,
+            "params": query,
+            "status": response.status_code,
+            "queries": queries,
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "bytes": len(response.content),
+        }
+    return results
+
+
+def check_thresholds(report, thresholds):
+    """Failures for routes that exceed absolute budgets."""
+    failures = []
+    for name, result in report["routes"].items():
+        if result["status"] != 200:
+            failures.append(f"{name}: HTTP {result['status']}")
+        budget = thresholds.get(name, {})
+        for metric, limit_key in (
+            ("queries", "max_queries"),
+            ("p95_ms", "max_p95_ms"),
+            ("bytes", "max_bytes"),
+        ):
+            limit = budget.get(limit_key)
+            if limit is not None and result[metric] > limit:
+                failures.append(f"{name}: {metric} {result[metric]} > {limit}")
+    return failures
+
+
+def compare_reports(report, previous, latency_tolerance=0.25, bytes_tolerance=0.1):
+    """Failures for routes that regressed against a previous report."""
+    failures = []
+    for name, result in report["routes"].items():
+        before = previous.get("routes", {}).get(name)
+        if not before:
+            continue
+        if result["queries"] > before["queries"]:
+            failures.append(
+                f"{name}: queries {before['queries']} -> {result['queries']}"
+            )
+        if result["p95_ms"] > before["p95_ms"] * (1 + latency_tolerance):
+            failures.append(f"{name}: p95 {before['p95_ms']}ms -> {result['p95_ms']}ms")
+        if result["bytes"] > before["bytes"] * (1 + bytes_tolerance):
+            failures.append(f"{name}: bytes {before['bytes']} -> {result['bytes']}")
+    return failures
+
+
+def run_benchmark(args):
+    report = {
+        "meta": {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "database": connection.vendor,
+            "scale": {
+                "customers": args.customers,
+                "items": args.items,
+                "invoices_per_customer": args.invoices_per_customer,
+                "details_per_invoice": args.details_per_invoice,
+                "contracts_per_customer": args.contracts_per_customer,
+                "services_per_customer": args.services_per_customer,
+                "seed": args.seed,
+            },
+            "repeat": args.repeat,
+        }
+    }
+    if not args.skip_seed:
+        print(f"Seeding {args.customers} customers...")
+        generator = SyntheticDataGenerator(
+            scale=GeneratorScale(
+                customers=args.customers,
+                items=args.items,
+                invoices_per_customer=args.invoices_per_customer,
+                details_per_invoice=args.details_per_invoice,
+                contracts_per_customer=args.contracts_per_customer,
+                services_per_customer=args.services_per_customer,
+            ),
+            seed=args.seed,
+            batch_size=args.batch_size,
+            progress=lambda done, total, counts: print(
+                f"  {done}/{total} customers, {sum(counts.values())} rows"
+            ),
+        )
+        result = generator.generate()
+        report["meta"]["rows"] = result.counts
+
+    report["routes"] = measure_routes(repeat=args.repeat)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--invoices-per-customer", type=int, default=5)
+    parser.add_argument("--details-per-invoice", type=int, default=4)
+    parser.add_argument("--contracts-per-customer", type=int, default=1)
+    parser.add_argument("--services-per-customer", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20, help="Requests per route")
+    parser.add_argument("--report", default="benchmark_report.json")
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS)
+    parser.add_argument("--compare", help="Previous report to check regressions")
+    parser.add_argument("--latency-tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--keepdb", action="store_true", help="Keep the test database between runs"
+    )
+    parser.add_argument(
+        "--skip-seed", action="store_true", help="Reuse data kept with --keepdb"
+    )
+    args = parser.parse_args(argv)
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb)
+    try:
+        report = run_benchmark(args)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+        teardown_test_environment()
+
+    failures = []
+    if args.thresholds and os.path.exists(args.thresholds):
+        with open(args.thresholds) as f:
+            failures += check_thresholds(report, json.load(f))
+    if args.compare:
+        with open(args.compare) as f:
+            failures += compare_reports(
+                report, json.load(f), latency_tolerance=args.latency_tolerance
+            )
+    report["failures"] = failures
+
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for name, result in report["routes"].items():
+        print(
+            f"{name:32} {result['queries']:3d} queries  "
+            f"p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  "
+            f"{result['bytes']:9d} bytes"
+        )
+    print(f"Report written to {args.report}")
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,15 @@
 import multiprocessing
 import os
+import shutil
+import tempfile
+
+# Workers write Prometheus samples to files in this directory and /metrics
+# adds them up; must be set before the app (and prometheus_client) is loaded
+metrics_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), "django_api_metrics"),
+)
+os.makedirs(metrics_dir, exist_ok=True)
 
 # Calculate workers based on CPU cores: (2 * CPU cores) + 1
 workers = (2 * multiprocessing.cpu_count()) + 1
@@ -30,3 +40,32 @@ proc_name = "django_api_gunicorn"
 
 # Worker processes will be restarted after this many requests
 worker_connections = 1000
+
+
+def on_starting(server):
+    # Each worker would keep its own cache and data version, so writes seen
+    # by one worker would leave the others serving stale responses
+    from django.conf import settings
+
+    if settings.API_CACHE_BACKEND == "locmem" and server.cfg.workers > 1:
+        raise RuntimeError(
+            "API_CACHE_BACKEND=locmem is per process; use file, redis or "
+            "memcached with more than one worker"
+        )
+
+    # Samples left by a previous run would be added to this one's. Runs after
+    # preload_app; workers open their own files once forked.
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def post_fork(server, worker):
+    from api.metrics import WORKER_CAPACITY
+
+    WORKER_CAPACITY.set(1)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
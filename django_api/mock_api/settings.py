@@ -50,6 +50,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so the request span covers every other middleware
+    "api.tracing.TracingMiddleware",
+    "api.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -93,6 +96,15 @@ DATABASES = {
     }
 }
 
+# Local SQLite database, e.g. for running benchmark.py without PostgreSQL
+if os.getenv("DATABASE_ENGINE", "postgresql").lower() == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.getenv("SQLITE_PATH", str(BASE_DIR / "db.sqlite3")),
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -113,6 +125,81 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Django REST Framework
+# https://www.django-rest-framework.org/api-guide/pagination/#cursorpagination
+
+REST_FRAMEWORK = {
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.KeysetPagination",
+    "PAGE_SIZE": int(os.getenv("API_PAGE_SIZE", "50")),
+}
+
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "200"))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# API_CACHE_BACKEND selects where GET responses are cached: "file" (shared by
+# workers on one host), "redis" or "memcached" (a locally run cache server,
+# needs the redis or pymemcache package), or "locmem" (per process, so only
+# for a single worker: writes in one worker would not invalidate the others'
+# responses or data version; gunicorn.conf.py refuses it with more workers).
+
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "memcached": "django.core.cache.backends.memcached.PyMemcacheCache",
+    "dummy": "django.core.cache.backends.dummy.DummyCache",
+}
+CACHE_LOCATIONS = {
+    "locmem": "api-responses",
+    "file": "/tmp/django_api_cache",
+    "redis": "redis://127.0.0.1:6379/1",
+    "memcached": "127.0.0.1:11211",
+    "dummy": "",
+}
+API_CACHE_BACKEND = os.getenv("API_CACHE_BACKEND", "file").lower()
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[API_CACHE_BACKEND],
+        "LOCATION": os.getenv("API_CACHE_LOCATION", CACHE_LOCATIONS[API_CACHE_BACKEND]),
+        "OPTIONS": (
+            {"MAX_ENTRIES": int(os.getenv("API_CACHE_MAX_ENTRIES", "5000"))}
+            if API_CACHE_BACKEND in ("locmem", "file")
+            else {}
+        ),
+    }
+}
+
+API_CACHE_ENABLED = os.getenv("API_CACHE_ENABLED", "True").lower() == "true"
+API_CACHE_ALIAS = "default"
+API_CACHE_TIMEOUT = int(os.getenv("API_CACHE_TIMEOUT", "300"))
+
+
+# Tracing
+#
+# Each request gets a span (continuing the Flask service's trace when it
+# sends a traceparent header) with a child span per SQL statement.
+# TRACING_EXPORTERS is a comma list of "log" (JSON lines on the "tracing"
+# logger), "file" (JSON lines in TRACING_FILE) and "otlp" (an OpenTelemetry
+# collector over HTTP). Off by default, like the Flask service whose question
+# traces these spans continue.
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "False").lower() == "true"
+TRACING_EXPORTERS = [
+    name.strip().lower()
+    for name in os.getenv("TRACING_EXPORTERS", "log").split(",")
+    if name.strip()
+]
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "django_api")
+TRACING_FILE = os.getenv("TRACING_FILE", "/tmp/django_api_traces.jsonl")
+TRACING_OTLP_ENDPOINT = os.getenv(
+    "TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"
+)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
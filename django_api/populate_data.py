@@ -1,3 +1,16 @@
+"""
+Load business data into the Django API database.
+
+With no arguments, creates the small named sample dataset (Company A,
+Enterprise B, ...) used by the example questions. Scale options add a
+synthetic, referentially consistent dataset on top for load testing:
+
+    python populate_data.py
+    python populate_data.py --customers 50000 --invoices-per-customer 5 \
+        --details-per-invoice 4 --seed 7
+"""
+
+import argparse
 import os
 from datetime import date
 from decimal import Decimal
@@ -7,6 +20,8 @@ import django
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mock_api.settings")
 django.setup()
 
+from api.cache import invalidate_models
+from api.data_generator import GeneratorScale, SyntheticDataGenerator
 from api.models import (
     ContactDetail,
     Contract,
@@ -19,6 +34,7 @@ from api.models import (
     Service,
     ServiceDetail,
 )
+from django.apps import apps
 
 
 def populate_data():
@@ -189,6 +205,10 @@ def populate_data():
         cost=Decimal("85.00"),
     )
 
+    # Responses cached by the running API, in this or another process, are
+    # keyed on the data version; make sure none survive the load
+    invalidate_models(*apps.get_app_config("api").get_models())
+
     print("Sample data created successfully!")
     print(f"Created {Customer.objects.count()} customers")
     print(f"Created {Item.objects.count()} items")
@@ -197,5 +217,72 @@ def populate_data():
     print(f"Created {Service.objects.count()} services")
 
 
+def report_progress(done, total, counts):
+    rows = sum(counts.values())
+    print(f"  {done}/{total} customers ({done * 100 // total}%), {rows} rows")
+
+
+def generate_data(args):
+    scale = GeneratorScale(
+        customers=args.customers,
+        items=args.items,
+        invoices_per_customer=args.invoices_per_customer,
+        details_per_invoice=args.details_per_invoice,
+        contracts_per_customer=args.contracts_per_customer,
+        contacts_per_contract=args.contacts_per_contract,
+        services_per_customer=args.services_per_customer,
+        details_per_service=args.details_per_service,
+    )
+    print(f"Generating synthetic data for {scale.customers} customers...")
+    generator = SyntheticDataGenerator(
+        scale=scale,
+        seed=args.seed,
+        batch_size=args.batch_size,
+        reference_date=args.reference_date,
+        progress=report_progress,
+    )
+    result = generator.generate()
+
+    print(f"Synthetic data created in {result.seconds:.1f}s:")
+    for name, count in result.counts.items():
+        print(f"  {count} {name}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load business data")
+    parser.add_argument(
+        "--customers",
+        type=int,
+        default=0,
+        help="Synthetic customers to generate (0 = sample data only)",
+    )
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--invoices-per-customer", type=int, default=5)
+    parser.add_argument("--details-per-invoice", type=int, default=4)
+    parser.add_argument("--contracts-per-customer", type=int, default=1)
+    parser.add_argument("--contacts-per-contract", type=int, default=2)
+    parser.add_argument("--services-per-customer", type=int, default=2)
+    parser.add_argument("--details-per-service", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--batch-size", type=int, default=1000, help="Customers per transaction"
+    )
+    parser.add_argument(
+        "--reference-date",
+        type=date.fromisoformat,
+        default=None,
+        help="Date generated history is relative to (default: today)",
+    )
+    parser.add_argument(
+        "--no-sample", action="store_true", help="Skip the named sample dataset"
+    )
+    args = parser.parse_args(argv)
+
+    if not args.no_sample:
+        populate_data()
+    if args.customers:
+        generate_data(args)
+
+
 if __name__ == "__main__":
-    populate_data()
+    main()
@@ -11,6 +11,7 @@ if not settings.configured:
     os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mock_api.settings")
     django.setup()
 
+from api.metrics import RESPONSE_CACHE
 from api.models import (
     ContactDetail,
     Contract,
@@ -23,6 +24,19 @@ from api.models import (
     Service,
     ServiceDetail,
 )
+from django.core.cache import cache
+
+# Record spans without exporting them; tests attach their own exporter
+settings.TRACING_ENABLED = True
+settings.TRACING_EXPORTERS = []
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    """Cached responses and their hit/miss counters outlive the rolled-back
+    test data, so start empty."""
+    cache.clear()
+    RESPONSE_CACHE.clear()
 
 
 @pytest.fixture
@@ -0,0 +1,85 @@
+import json
+
+from api.data_generator import GeneratorScale, SyntheticDataGenerator
+from api.models import Customer, InvoiceDetail
+from benchmark import (
+    DEFAULT_THRESHOLDS,
+    check_thresholds,
+    compare_reports,
+    discover_routes,
+    measure_routes,
+    percentile,
+)
+from django.test import TestCase
+
+
+class BenchmarkSuiteTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        SyntheticDataGenerator(
+            scale=GeneratorScale(
+                customers=6, items=5, invoices_per_customer=2, details_per_invoice=3
+            ),
+            batch_size=4,
+        ).generate()
+
+    def test_seed_dataset_scale(self):
+        self.assertEqual(Customer.objects.count(), 6)
+        self.assertEqual(InvoiceDetail.objects.count(), 6 * 2 * 3)
+
+    def test_every_route_is_measured(self):
+        routes = dict(discover_routes())
+        for name in (
+            "customer-list",
+            "customer-detail",
+            "customer-invoices",
+            "invoice-by-customer",
+            "service-by-date-range",
+            "health_check",
+            "cache_stats",
+            "data_version",
+            "metrics",
+        ):
+            self.assertIn(name, routes)
+
+        report = {"routes": measure_routes(repeat=2, warmup=0)}
+        self.assertEqual(set(report["routes"]), set(routes))
+        for result in report["routes"].values():
+            self.assertEqual(result["status"], 200)
+            self.assertLessEqual(result["p50_ms"], result["p95_ms"])
+
+        with open(DEFAULT_THRESHOLDS) as f:
+            self.assertEqual(check_thresholds(report, json.load(f)), [])
+
+
+class BenchmarkReportTest(TestCase):
+    def test_percentile(self):
+        self.assertEqual(percentile([5, 1, 3, 2, 4], 50), 3)
+        self.assertEqual(percentile(list(range(1, 101)), 95), 95)
+
+    def test_threshold_failures(self):
+        report = {"routes": {"invoice-list": _result(queries=40)}}
+        failures = check_thresholds(report, {"invoice-list": {"max_queries": 3}})
+        self.assertEqual(failures, ["invoice-list: queries 40 > 3"])
+
+    def test_compare_reports_flags_regressions(self):
+        previous = {"routes": {"invoice-list": _result(p95_ms=10.0, bytes=1000)}}
+        report = {"routes": {"invoice-list": _result(p95_ms=20.0, bytes=1000)}}
+        failures = compare_reports(report, previous, latency_tolerance=0.25)
+        self.assertEqual(len(failures), 1)
+        self.assertIn("p95", failures[0])
+
+    def test_compare_reports_within_tolerance(self):
+        previous = {"routes": {"invoice-list": _result(p95_ms=10.0)}}
+        report = {"routes": {"invoice-list": _result(p95_ms=11.0)}}
+        self.assertEqual(compare_reports(report, previous), [])
+
+
+def _result(queries=3, p95_ms=1.0, bytes=100):
+    return {
+        "status": 200,
+        "queries": queries,
+        "p50_ms": p95_ms,
+        "p95_ms": p95_ms,
+        "bytes": bytes,
+    }
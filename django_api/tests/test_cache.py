@@ -0,0 +1,172 @@
+from datetime import date, timedelta
+
+from api.cache import invalidate_models
+from api.models import Contract, Customer, Item, ItemGroup
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+
+class ResponseCacheTest(APITestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Company A")
+        self.contract = Contract.objects.create(
+            contract_number="CON-001",
+            customer=self.customer,
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=365),
+            contract_type="SLA",
+            status="active",
+        )
+        self.url = reverse("contract-active")
+
+    def get(self, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+        return response, len(ctx.captured_queries)
+
+    def test_repeat_request_is_served_from_cache(self):
+        first, _ = self.get(self.url)
+        second, queries = self.get(self.url)
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(queries, 0)
+        self.assertEqual(first.content, second.content)
+
+    def test_query_params_are_normalized(self):
+        url = reverse("item-search")
+        self.get(url, {"q": "printer", "brand": "Ricoh", "page_size": ""})
+        response, _ = self.get(url, {"brand": "Ricoh", "q": "printer"})
+        self.assertEqual(response["X-Cache"], "HIT")
+        response, _ = self.get(url, {"brand": "Canon", "q": "printer"})
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    def test_save_invalidates_dependent_responses(self):
+        self.get(self.url)
+        self.customer.name = "Company B"
+        self.customer.save()
+
+        response, _ = self.get(self.url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["customer_name"], "Company B")
+
+    def test_delete_invalidates_dependent_responses(self):
+        self.get(self.url)
+        self.contract.delete()
+
+        response, _ = self.get(self.url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"], [])
+
+    def test_unrelated_model_change_keeps_cache(self):
+        self.get(self.url)
+        ItemGroup.objects.create(name="Printers")
+        response, _ = self.get(self.url)
+        self.assertEqual(response["X-Cache"], "HIT")
+
+    def test_invalidate_models_after_bulk_writes(self):
+        url = reverse("item-list")
+        self.get(url)
+        group = ItemGroup.objects.create(name="Printers")
+        Item.objects.bulk_create([Item(name="P1", item_group=group, price=1)])
+        invalidate_models(Item)
+
+        response, _ = self.get(url)
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_data_version_changes_on_any_write(self):
+        url = reverse("data_version")
+        version = self.client.get(url).data["version"]
+        self.assertEqual(self.client.get(url).data["version"], version)
+
+        ItemGroup.objects.create(name="Printers")
+        self.assertNotEqual(self.client.get(url).data["version"], version)
+
+    def test_data_version_is_not_reissued_after_eviction(self):
+        url = reverse("data_version")
+        issued = {self.client.get(url).data["version"]}
+        ItemGroup.objects.create(name="Printers")
+        issued.add(self.client.get(url).data["version"])
+
+        cache.clear()
+        self.assertNotIn(self.client.get(url).data["version"], issued)
+
+    def test_error_responses_are_not_cached(self):
+        url = reverse("invoice-by-customer")
+        self.get(url)
+        response, _ = self.get(url)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    @override_settings(API_CACHE_ENABLED=False)
+    def test_cache_can_be_disabled(self):
+        self.get(self.url)
+        response, queries = self.get(self.url)
+        self.assertNotIn("X-Cache", response)
+        self.assertGreater(queries, 0)
+
+    def test_stats_count_hits_and_misses(self):
+        self.get(self.url)
+        self.get(self.url)
+        self.get(self.url)
+
+        stats = self.client.get(reverse("cache_stats")).json()
+        self.assertEqual(
+            stats["routes"]["contract-active"],
+            {"hits": 2, "misses": 1, "not_modified": 0},
+        )
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 1)
+        self.assertAlmostEqual(stats["hit_ratio"], 0.6667)
+
+
+class ConditionalGetTest(APITestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Company A")
+        self.url = reverse("customer-detail", kwargs={"pk": self.customer.pk})
+
+    def test_responses_carry_strong_etag(self):
+        first = self.client.get(self.url)
+        second = self.client.get(self.url)
+        self.assertTrue(first["ETag"].startswith('"'))
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_matching_etag_returns_304_without_queries(self):
+        etag = self.client.get(self.url)["ETag"]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_etag_not_reused_after_versions_are_evicted(self):
+        etag = self.client.get(self.url)["ETag"]
+        # Versions live in the response cache, which may evict or lose them
+        cache.clear()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_weak_and_listed_etags_match(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"other", W/{etag}')
+        self.assertEqual(response.status_code, 304)
+
+    def test_change_produces_new_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.customer.phone = "03-1234 5678"
+        self.customer.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["phone"], "03-1234 5678")
+
+    def test_error_responses_have_no_etag(self):
+        response = self.client.get(reverse("customer-detail", kwargs={"pk": 0}))
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn("ETag", response)
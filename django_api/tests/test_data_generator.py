@@ -0,0 +1,79 @@
+from datetime import date
+
+from api.cache import data_version
+from api.data_generator import GeneratorScale, SyntheticDataGenerator
+from api.models import (
+    ContactDetail,
+    Customer,
+    Invoice,
+    InvoiceDetail,
+    ServiceDetail,
+)
+from django.db.models import Sum
+from django.test import TestCase
+
+SCALE = GeneratorScale(
+    customers=5,
+    items=8,
+    invoices_per_customer=3,
+    details_per_invoice=2,
+    contracts_per_customer=1,
+    contacts_per_contract=2,
+    services_per_customer=2,
+    details_per_service=2,
+)
+
+
+def generate(seed=1, progress=None):
+    return SyntheticDataGenerator(
+        scale=SCALE,
+        seed=seed,
+        batch_size=2,
+        reference_date=date(2025, 1, 1),
+        progress=progress,
+    ).generate()
+
+
+class SyntheticDataGeneratorTest(TestCase):
+    def test_row_counts_follow_scale(self):
+        calls = []
+        result = generate(progress=lambda done, total, counts: calls.append(done))
+        self.assertEqual(calls, [2, 4, 5])
+        self.assertEqual(Customer.objects.count(), 5)
+        self.assertEqual(Invoice.objects.count(), 15)
+        self.assertEqual(InvoiceDetail.objects.count(), 30)
+        self.assertEqual(ContactDetail.objects.count(), 10)
+        self.assertEqual(result.counts["invoices"], 15)
+
+    def test_generation_changes_data_version(self):
+        # bulk_create skips the signals that normally invalidate the cache
+        before = data_version()
+        generate()
+        self.assertNotEqual(data_version(), before)
+
+    def test_invoice_totals_match_details(self):
+        generate()
+        for invoice in Invoice.objects.annotate(lines=Sum("details__total_price")):
+            self.assertEqual(invoice.total_amount, invoice.lines)
+
+    def test_service_serials_belong_to_customer(self):
+        generate()
+        details = ServiceDetail.objects.exclude(serial=None).select_related(
+            "service", "serial"
+        )
+        self.assertTrue(details.exists())
+        for detail in details:
+            self.assertTrue(
+                InvoiceDetail.objects.filter(
+                    invoice__customer_id=detail.service.customer_id,
+                    item_id=detail.serial.item_id,
+                ).exists()
+            )
+
+    def test_same_seed_produces_same_data(self):
+        generate(seed=3)
+        first = list(Customer.objects.order_by("pk").values_list("name", "phone"))
+        Customer.objects.all().delete()
+        generate(seed=3)
+        second = list(Customer.objects.order_by("pk").values_list("name", "phone"))
+        self.assertEqual(first, second)
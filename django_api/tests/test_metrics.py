@@ -0,0 +1,90 @@
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from api.models import Customer
+from django.urls import reverse
+from prometheus_client.parser import text_string_to_metric_families
+from rest_framework.test import APITestCase
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def scrape(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(response.content.decode())
+        for sample in family.samples
+    }
+
+
+class MetricsEndpointTest(APITestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Company A")
+        self.url = reverse("customer-detail", args=[self.customer.id])
+
+    def test_request_latency_and_queries_per_view(self):
+        """Each request is timed and its SQL statements counted by view."""
+        before = scrape(self.client)
+        self.client.get(self.url)
+        after = scrape(self.client)
+
+        key = (
+            "django_api_http_request_duration_seconds_count",
+            (("method", "GET"), ("status", "200"), ("view", "customer-detail")),
+        )
+        queries = (
+            "django_api_db_queries_per_request_sum",
+            (("view", "customer-detail"),),
+        )
+        self.assertEqual(after[key] - before.get(key, 0), 1)
+        self.assertGreaterEqual(after[queries] - before.get(queries, 0), 1)
+
+    def test_response_cache_outcomes(self):
+        """Cache hits and misses are counted per route."""
+        before = scrape(self.client)
+        self.client.get(self.url)
+        self.client.get(self.url)
+        after = scrape(self.client)
+
+        def delta(outcome):
+            key = (
+                "django_api_response_cache_requests_total",
+                (("outcome", outcome), ("route", "customer-detail")),
+            )
+            return after[key] - before.get(key, 0)
+
+        self.assertEqual(delta("miss"), 1)
+        self.assertEqual(delta("hit"), 1)
+
+
+class MultiprocessMetricsTest(APITestCase):
+    def test_samples_from_all_workers_are_added_up(self):
+        """Counters written by separate worker processes are summed."""
+        script = (
+            "from api.metrics import RESPONSE_CACHE, WORKER_CAPACITY\n"
+            "RESPONSE_CACHE.labels('customer-list', 'hit').inc(3)\n"
+            "WORKER_CAPACITY.set(1)\n"
+        )
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": metrics_dir}
+            for _ in range(2):
+                subprocess.run(
+                    [sys.executable, "-c", script], cwd=BASE_DIR, env=env, check=True
+                )
+
+            with patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": metrics_dir}):
+                samples = scrape(self.client)
+
+        hits = (
+            "django_api_response_cache_requests_total",
+            (("outcome", "hit"), ("route", "customer-list")),
+        )
+        self.assertEqual(samples[hits], 6)
+        # Each worker reports its own capacity until it is marked dead
+        self.assertEqual(samples[("django_api_worker_capacity", ())], 2)
@@ -0,0 +1,39 @@
+from importlib import import_module
+from unittest import skipUnless
+from unittest.mock import patch
+
+from api.models import Customer
+from django.db import connection
+from django.test import TestCase
+
+customer_name_search = import_module("api.migrations.0002_customer_name_search")
+
+
+def index_names():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname FROM pg_indexes WHERE tablename = 'api_customer'"
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+@skipUnless(connection.vendor == "postgresql", "PostgreSQL indexes")
+class CustomerNameSearchMigrationTest(TestCase):
+    def test_trigram_index_skipped_without_extension_privilege(self):
+        with connection.schema_editor() as editor:
+            editor.execute("DROP INDEX IF EXISTS api_customer_name_upper_trgm_idx")
+            execute = editor.execute
+
+            def no_privilege(sql, params=()):
+                # A real error, so the transaction is aborted as it would be
+                if sql.startswith("CREATE EXTENSION"):
+                    sql = "CREATE EXTENSION no_such_extension"
+                return execute(sql, params)
+
+            with patch.object(editor, "execute", side_effect=no_privilege):
+                customer_name_search.create_search_indexes(None, editor)
+
+        names = index_names()
+        self.assertIn("api_customer_name_upper_prefix_idx", names)
+        self.assertNotIn("api_customer_name_upper_trgm_idx", names)
+        self.assertEqual(Customer.objects.count(), 0)
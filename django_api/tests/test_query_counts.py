@@ -0,0 +1,136 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from api.models import (
+    ContactDetail,
+    Contract,
+    Customer,
+    Invoice,
+    InvoiceDetail,
+    Item,
+    ItemGroup,
+    Serial,
+    Service,
+    ServiceDetail,
+)
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+
+class QueryBudgetMixin:
+    """Assert that an endpoint stays within a fixed number of SQL queries."""
+
+    def assertQueryBudget(self, url, max_queries, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        executed = len(ctx.captured_queries)
+        self.assertLessEqual(
+            executed,
+            max_queries,
+            f"{url} ran {executed} queries (budget {max_queries}):\n"
+            + "\n".join(q["sql"] for q in ctx.captured_queries),
+        )
+        return response
+
+
+class EndpointQueryCountTest(QueryBudgetMixin, APITestCase):
+    """Query counts must not grow with the number of related rows."""
+
+    ROWS = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = Customer.objects.create(name="Company A")
+        group = ItemGroup.objects.create(name="Printers")
+        cls.items = [
+            Item.objects.create(
+                name=f"Printer {i}",
+                brand="Ricoh",
+                item_group=group,
+                price=Decimal("100.00"),
+            )
+            for i in range(3)
+        ]
+        cls.serials = [
+            Serial.objects.create(serial_number=f"SN{i:04d}", item=item)
+            for i, item in enumerate(cls.items)
+        ]
+        for i in range(cls.ROWS):
+            invoice = Invoice.objects.create(
+                invoice_number=f"INV-{i:03d}",
+                customer=cls.customer,
+                invoice_date=date.today() - timedelta(days=i),
+                total_amount=Decimal("300.00"),
+            )
+            for item in cls.items:
+                InvoiceDetail.objects.create(
+                    invoice=invoice,
+                    item=item,
+                    unit_price=Decimal("100.00"),
+                    total_price=Decimal("100.00"),
+                )
+
+            contract = Contract.objects.create(
+                contract_number=f"CON-{i:03d}",
+                customer=cls.customer,
+                start_date=date.today(),
+                end_date=date.today() + timedelta(days=365),
+                contract_type="SLA",
+            )
+            for n in range(2):
+                ContactDetail.objects.create(
+                    contract=contract, contact_person=f"Contact {n}"
+                )
+
+            service = Service.objects.create(
+                service_name=f"Maintenance {i}",
+                customer=cls.customer,
+                service_date=date.today() - timedelta(days=i),
+            )
+            for serial in cls.serials:
+                ServiceDetail.objects.create(
+                    service=service, serial=serial, description="Checked"
+                )
+
+    def test_customer_invoices_queries(self):
+        url = reverse("customer-invoices", kwargs={"pk": self.customer.pk})
+        response = self.assertQueryBudget(url, 4)
+        self.assertEqual(len(response.data["results"]), self.ROWS)
+
+    def test_customer_contracts_queries(self):
+        url = reverse("customer-contracts", kwargs={"pk": self.customer.pk})
+        response = self.assertQueryBudget(url, 3)
+        self.assertEqual(len(response.data["results"]), self.ROWS)
+
+    def test_customer_services_queries(self):
+        url = reverse("customer-services", kwargs={"pk": self.customer.pk})
+        response = self.assertQueryBudget(url, 4)
+        self.assertEqual(len(response.data["results"]), self.ROWS)
+
+    def test_customer_search_queries(self):
+        self.assertQueryBudget(reverse("customer-search"), 1, {"name": "Company"})
+
+    def test_invoice_list_queries(self):
+        self.assertQueryBudget(reverse("invoice-list"), 3)
+
+    def test_invoice_by_customer_queries(self):
+        url = reverse("invoice-by-customer")
+        self.assertQueryBudget(url, 3, {"customer_name": "Company"})
+
+    def test_item_search_queries(self):
+        self.assertQueryBudget(reverse("item-search"), 1, {"brand": "Ricoh"})
+
+    def test_contract_active_queries(self):
+        self.assertQueryBudget(reverse("contract-active"), 2)
+
+    def test_serial_list_queries(self):
+        self.assertQueryBudget(reverse("serial-list"), 1)
+
+    def test_service_by_date_range_queries(self):
+        url = reverse("service-by-date-range")
+        start_date = (date.today() - timedelta(days=30)).strftime("%Y-%m-%d")
+        self.assertQueryBudget(url, 3, {"start_date": start_date})
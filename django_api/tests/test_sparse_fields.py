@@ -0,0 +1,109 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from api.models import (
+    ContactDetail,
+    Contract,
+    Customer,
+    Invoice,
+    InvoiceDetail,
+    Item,
+    ItemGroup,
+    Serial,
+)
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from tests.test_query_counts import QueryBudgetMixin
+
+
+class SparseFieldsetTest(QueryBudgetMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = Customer.objects.create(name="Company A")
+        group = ItemGroup.objects.create(name="Printers")
+        cls.item = Item.objects.create(
+            name="Printer", brand="Ricoh", item_group=group, price=Decimal("100.00")
+        )
+        Serial.objects.create(serial_number="SN0001", item=cls.item)
+        for i in range(3):
+            invoice = Invoice.objects.create(
+                invoice_number=f"INV-{i:03d}",
+                customer=cls.customer,
+                invoice_date=date.today() - timedelta(days=i),
+                total_amount=Decimal("100.00"),
+            )
+            InvoiceDetail.objects.create(
+                invoice=invoice,
+                item=cls.item,
+                unit_price=Decimal("100.00"),
+                total_price=Decimal("100.00"),
+            )
+        contract = Contract.objects.create(
+            contract_number="CON-001",
+            customer=cls.customer,
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=365),
+            contract_type="SLA",
+            status="active",
+        )
+        ContactDetail.objects.create(contract=contract, contact_person="John Doe")
+
+    def test_fields_limits_output_and_skips_relations(self):
+        response = self.assertQueryBudget(
+            reverse("invoice-list"),
+            1,
+            {"fields": "invoice_number,invoice_date,total_amount"},
+        )
+        for invoice in response.data["results"]:
+            self.assertEqual(
+                set(invoice), {"invoice_number", "invoice_date", "total_amount"}
+            )
+
+    def test_exclude_drops_nested_relation(self):
+        response = self.assertQueryBudget(
+            reverse("contract-active"), 1, {"exclude": "contact_details"}
+        )
+        contract = response.data["results"][0]
+        self.assertNotIn("contact_details", contract)
+        self.assertEqual(contract["customer_name"], "Company A")
+
+    def test_expand_nests_related_object(self):
+        response = self.assertQueryBudget(reverse("serial-list"), 1, {"expand": "item"})
+        item = response.data["results"][0]["item"]
+        self.assertEqual(item["name"], "Printer")
+        self.assertEqual(item["item_group_name"], "Printers")
+
+    def test_expand_combined_with_fields(self):
+        response = self.assertQueryBudget(
+            reverse("invoice-list"),
+            1,
+            {"fields": "invoice_number,customer", "expand": "customer"},
+        )
+        invoice = response.data["results"][0]
+        self.assertEqual(invoice["customer"]["name"], "Company A")
+        self.assertNotIn("details", invoice)
+
+    def test_custom_actions_honour_fields(self):
+        url = reverse("customer-invoices", kwargs={"pk": self.customer.pk})
+        response = self.assertQueryBudget(url, 2, {"fields": "invoice_number"})
+        self.assertEqual(
+            [set(invoice) for invoice in response.data["results"]],
+            [{"invoice_number"}] * 3,
+        )
+
+    def test_detail_view_honours_fields(self):
+        url = reverse("item-detail", kwargs={"pk": self.item.pk})
+        response = self.client.get(url, {"fields": "name,price_formatted"})
+        self.assertEqual(
+            response.data, {"name": "Printer", "price_formatted": "RM 100.00"}
+        )
+
+    def test_unknown_fields_are_ignored(self):
+        response = self.client.get(reverse("item-list"), {"fields": "name,bogus"})
+        self.assertEqual(response.data["results"], [{"name": "Printer"}])
+
+    def test_default_output_unchanged(self):
+        response = self.client.get(reverse("invoice-list"))
+        self.assertIn("details", response.data["results"][0])
+        self.assertIn("customer_name", response.data["results"][0])
@@ -0,0 +1,78 @@
+import json
+import tempfile
+
+from api.models import Customer, Invoice
+from api.tracing import FileSpanExporter, get_provider
+from django.urls import reverse
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from rest_framework.test import APITestCase
+
+exporter = InMemorySpanExporter()
+get_provider().add_span_processor(SimpleSpanProcessor(exporter))
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+class TracingMiddlewareTest(APITestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Company A")
+        Invoice.objects.create(
+            invoice_number="INV-001",
+            customer=self.customer,
+            invoice_date="2025-01-01",
+            total_amount="100.00",
+        )
+        self.url = reverse("customer-invoices", args=[self.customer.id])
+        exporter.clear()
+
+    def get_traced(self, traceparent=None):
+        headers = {"traceparent": traceparent} if traceparent else {}
+        response = self.client.get(self.url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        return response, exporter.get_finished_spans()
+
+    def test_request_continues_caller_trace(self):
+        """The request span is a child of the span named in traceparent."""
+        response, spans = self.get_traced(f"00-{TRACE_ID}-{PARENT_ID}-01")
+
+        request_span = spans[-1]
+        self.assertEqual(response["X-Trace-Id"], TRACE_ID)
+        self.assertEqual(request_span.name, "GET customer-invoices")
+        self.assertEqual(format(request_span.parent.span_id, "016x"), PARENT_ID)
+        self.assertEqual(format(request_span.context.trace_id, "032x"), TRACE_ID)
+
+    def test_each_query_gets_a_span(self):
+        """Every SQL statement is recorded under the request span."""
+        _, spans = self.get_traced()
+
+        request_span = spans[-1]
+        queries = [span for span in spans if span.name == "db.query"]
+        self.assertTrue(queries)
+        self.assertEqual(request_span.attributes["db.queries"], len(queries))
+        for span in queries:
+            self.assertEqual(span.parent.span_id, request_span.context.span_id)
+            self.assertIn("SELECT", span.attributes["db.statement"])
+
+    def test_request_without_traceparent_starts_a_trace(self):
+        """Requests from other clients still get a trace id of their own."""
+        first, _ = self.get_traced()
+        second, spans = self.get_traced()
+
+        self.assertNotEqual(first["X-Trace-Id"], second["X-Trace-Id"])
+        self.assertIsNone(spans[-1].parent)
+
+    def test_file_exporter_writes_json_lines(self):
+        """Spans exported to a file carry the ids needed to join the trace."""
+        _, spans = self.get_traced(f"00-{TRACE_ID}-{PARENT_ID}-01")
+
+        with tempfile.NamedTemporaryFile("r", suffix=".jsonl") as f:
+            FileSpanExporter(f.name).export(spans)
+            records = [json.loads(line) for line in f.read().splitlines()]
+
+        self.assertEqual({record["trace_id"] for record in records}, {TRACE_ID})
+        self.assertEqual(records[-1]["parent_id"], PARENT_ID)
+        self.assertEqual(records[-1]["service"], "django_api")
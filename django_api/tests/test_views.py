@@ -1,3 +1,5 @@
+import json
+from base64 import b64encode
 from datetime import date, timedelta
 from decimal import Decimal
 
@@ -10,6 +12,8 @@ from api.models import (
     Serial,
     Service,
 )
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -29,8 +33,8 @@ class CustomerViewSetTest(APITestCase):
         url = reverse("customer-list")
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["name"], "Test Company")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["name"], "Test Company")
 
     def test_customer_detail(self):
         url = reverse("customer-detail", kwargs={"pk": self.customer.pk})
@@ -51,8 +55,8 @@ class CustomerViewSetTest(APITestCase):
         url = reverse("customer-invoices", kwargs={"pk": self.customer.pk})
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["invoice_number"], "INV-001")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["invoice_number"], "INV-001")
 
     def test_customer_contracts_action(self):
         # Create a contract for the customer
@@ -67,8 +71,8 @@ class CustomerViewSetTest(APITestCase):
         url = reverse("customer-contracts", kwargs={"pk": self.customer.pk})
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["contract_number"], "CON-001")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["contract_number"], "CON-001")
 
     def test_customer_services_action(self):
         # Create a service for the customer
@@ -81,8 +85,41 @@ class CustomerViewSetTest(APITestCase):
         url = reverse("customer-services", kwargs={"pk": self.customer.pk})
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["service_name"], "Maintenance")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["service_name"], "Maintenance")
+
+    def test_customer_search_by_name(self):
+        Customer.objects.create(name="Another Test Company")
+        Customer.objects.create(name="Unrelated Ltd")
+
+        url = reverse("customer-search")
+        response = self.client.get(url, {"name": "test company"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+        # Prefix matches are ranked first
+        self.assertEqual(response.data["results"][0]["name"], "Test Company")
+        self.assertEqual(
+            set(response.data["results"][0].keys()), {"id", "name", "email", "phone"}
+        )
+
+    def test_customer_search_limit(self):
+        for i in range(5):
+            Customer.objects.create(name=f"Test Company {i}")
+
+        url = reverse("customer-search")
+        response = self.client.get(url, {"name": "Test", "limit": 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 3)
+
+    def test_customer_search_limit_is_capped(self):
+        for i in range(60):
+            Customer.objects.create(name=f"Test Company {i}")
+
+        url = reverse("customer-search")
+        response = self.client.get(url, {"name": "Test", "limit": 1000})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 50)
+        self.assertIsNotNone(response.data["next"])
 
     def test_customer_create(self):
         url = reverse("customer-list")
@@ -129,14 +166,14 @@ class InvoiceViewSetTest(APITestCase):
         url = reverse("invoice-list")
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
 
     def test_invoice_by_customer_action(self):
         url = reverse("invoice-by-customer")
         response = self.client.get(url, {"customer_name": "Company A"})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["customer_name"], "Company A")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["customer_name"], "Company A")
 
     def test_invoice_by_customer_no_param(self):
         url = reverse("invoice-by-customer")
@@ -148,7 +185,7 @@ class InvoiceViewSetTest(APITestCase):
         url = reverse("invoice-by-customer")
         response = self.client.get(url, {"customer_name": "Company"})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
 
 
 class ItemViewSetTest(APITestCase):
@@ -173,34 +210,34 @@ class ItemViewSetTest(APITestCase):
         url = reverse("item-list")
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
 
     def test_item_search_by_name(self):
         url = reverse("item-search")
         response = self.client.get(url, {"q": "Printer"})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["name"], "Color Printer")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["name"], "Color Printer")
 
     def test_item_search_by_brand(self):
         url = reverse("item-search")
         response = self.client.get(url, {"brand": "Canon"})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["brand"], "Canon")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["brand"], "Canon")
 
     def test_item_search_by_model(self):
         url = reverse("item-search")
         response = self.client.get(url, {"q": "P3000"})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["model"], "P3000")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["model"], "P3000")
 
     def test_item_search_no_results(self):
         url = reverse("item-search")
         response = self.client.get(url, {"q": "Nonexistent"})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 0)
+        self.assertEqual(len(response.data["results"]), 0)
 
 
 class ContractViewSetTest(APITestCase):
@@ -227,15 +264,15 @@ class ContractViewSetTest(APITestCase):
         url = reverse("contract-list")
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
 
     def test_contract_active_action(self):
         url = reverse("contract-active")
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["status"], "active")
-        self.assertEqual(response.data[0]["contract_number"], "CON-001")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["status"], "active")
+        self.assertEqual(response.data["results"][0]["contract_number"], "CON-001")
 
 
 class SerialViewSetTest(APITestCase):
@@ -254,14 +291,14 @@ class SerialViewSetTest(APITestCase):
         url = reverse("serial-list")
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
 
     def test_serial_by_item_action(self):
         url = reverse("serial-by-item")
         response = self.client.get(url, {"item_id": self.item1.id})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["serial_number"], "SN123456789")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["serial_number"], "SN123456789")
 
     def test_serial_by_item_no_param(self):
         url = reverse("serial-by-item")
@@ -290,21 +327,21 @@ class ServiceViewSetTest(APITestCase):
         url = reverse("service-list")
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
 
     def test_service_by_date_range_start(self):
         url = reverse("service-by-date-range")
         start_date = date.today().strftime("%Y-%m-%d")
         response = self.client.get(url, {"start_date": start_date})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
 
     def test_service_by_date_range_end(self):
         url = reverse("service-by-date-range")
         end_date = (date.today() - timedelta(days=15)).strftime("%Y-%m-%d")
         response = self.client.get(url, {"end_date": end_date})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
 
     def test_service_by_date_range_both(self):
         url = reverse("service-by-date-range")
@@ -314,4 +351,93 @@ class ServiceViewSetTest(APITestCase):
             url, {"start_date": start_date, "end_date": end_date}
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
+
+
+class PaginationTest(APITestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Test Company")
+        for i in range(5):
+            Invoice.objects.create(
+                invoice_number=f"INV-{i:03d}",
+                customer=self.customer,
+                invoice_date=date.today() - timedelta(days=i),
+                total_amount=Decimal("100.00"),
+            )
+
+    def test_list_is_cursor_paginated(self):
+        url = reverse("invoice-list")
+        response = self.client.get(url, {"page_size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data.keys()), {"next", "previous", "results"})
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNone(response.data["previous"])
+        self.assertIn("cursor=", response.data["next"])
+
+    def test_following_next_links_visits_every_row_once(self):
+        url = reverse("invoice-list") + "?page_size=2"
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(row["invoice_number"] for row in response.data["results"])
+            url = response.data["next"]
+
+        # Newest invoices first, no duplicates or gaps across pages
+        self.assertEqual(seen, [f"INV-{i:03d}" for i in range(5)])
+
+    def test_pages_are_keyed_on_every_ordering_column(self):
+        # Every invoice has the same date, so only the id tells them apart
+        Invoice.objects.filter(customer=self.customer).update(invoice_date=date.today())
+        url = reverse("invoice-list") + "?page_size=2"
+        pages = []
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                pages.append(
+                    [row["invoice_number"] for row in response.data["results"]]
+                )
+                url = response.data["next"]
+
+        self.assertEqual(
+            pages, [["INV-004", "INV-003"], ["INV-002", "INV-001"], ["INV-000"]]
+        )
+        self.assertFalse(any("OFFSET" in query["sql"] for query in queries))
+
+    def test_previous_link_returns_the_page_before(self):
+        for i in range(5):
+            Customer.objects.create(name=f"Test Company {i}")
+        url = reverse("customer-search")
+        first = self.client.get(url, {"name": "Test", "limit": 2})
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+
+        self.assertEqual(back.data["results"], first.data["results"])
+        self.assertIsNone(back.data["previous"])
+        self.assertNotEqual(second.data["results"], first.data["results"])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse("invoice-list"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_values_of_the_wrong_type_are_rejected(self):
+        for name, values in (
+            ("customer-list", ["abc"]),
+            ("customer-list", [{"x": 1}]),
+            ("customer-list", [None]),
+            ("invoice-list", ["2020-13-45", 1]),
+            ("invoice-list", ["2020-01-01", "x"]),
+        ):
+            cursor = b64encode(json.dumps({"v": values}).encode()).decode()
+            response = self.client.get(reverse(name), {"cursor": cursor})
+            self.assertEqual(
+                response.status_code, status.HTTP_404_NOT_FOUND, (name, values)
+            )
+
+    def test_custom_action_is_paginated(self):
+        url = reverse("customer-invoices", kwargs={"pk": self.customer.pk})
+        response = self.client.get(url, {"page_size": 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertIsNotNone(response.data["next"])
@@ -0,0 +1,167 @@
+import contextlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Iterator, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from metrics import observe_question, token_usage
+from models import QuestionUsage, db
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class UsageHandler(BaseCallbackHandler):
+    """Tokens and latency of each LLM call made to answer one question."""
+
+    def __init__(self):
+        self.source = None
+        self.calls = []
+        self._started = {}
+
+    def _start(self, run_id):
+        self._started[run_id] = time.perf_counter()
+
+    def _end(self, run_id, prompt: int, completion: int):
+        start = self._started.pop(run_id, None)
+        latency = time.perf_counter() - start if start is not None else 0
+        self.calls.append(
+            {
+                "prompt_tokens": prompt,
+                "completion_tokens": completion,
+                "latency_ms": round(latency * 1000),
+            }
+        )
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id, *token_usage(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, 0, 0)
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(call["prompt_tokens"] for call in self.calls)
+
+    @property
+    def completion_tokens(self) -> int:
+        return sum(call["completion_tokens"] for call in self.calls)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def cost(self) -> float:
+        """Price of the tokens used, from the per-1K prices in the settings."""
+        return (
+            self.prompt_tokens * settings.LLM_PROMPT_PRICE_PER_1K
+            + self.completion_tokens * settings.LLM_COMPLETION_PRICE_PER_1K
+        ) / 1000
+
+    def observe(self):
+        """Add this question's LLM calls and tokens to the metrics."""
+        observe_question(len(self.calls), self.prompt_tokens, self.completion_tokens)
+
+
+_current: ContextVar[Optional[UsageHandler]] = ContextVar("usage", default=None)
+
+
+@contextmanager
+def track_usage(usage: Optional[UsageHandler] = None) -> Iterator[UsageHandler]:
+    """Collect the LLM usage of the question the agent answers in the block."""
+    usage = usage if usage is not None else UsageHandler()
+    token = _current.set(usage)
+    try:
+        yield usage
+    finally:
+        _current.reset(token)
+
+
+def question_usage() -> UsageHandler:
+    """The handler of the enclosing :func:`track_usage`, or a new one."""
+    usage = _current.get()
+    return usage if usage is not None else UsageHandler()
+
+
+class UsageLog:
+    """Per-question usage rows, written to ``question_usage`` in batches.
+
+    Rows are buffered in the worker and sent in one multi-row INSERT once
+    ``batch_size`` are waiting or ``flush_interval`` seconds have passed (and
+    when the worker exits). A batch that fails is retried with the next one;
+    beyond ``10 * batch_size`` waiting rows the oldest are dropped.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.USAGE_BATCH_SIZE,
+        flush_interval: float = settings.USAGE_FLUSH_INTERVAL,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_rows = 10 * batch_size
+        self._rows = []
+        self._lock = threading.Lock()
+        self._next_flush = time.monotonic() + flush_interval
+
+    def __len__(self):
+        return len(self._rows)
+
+    def record(self, user_id: int, usage: UsageHandler):
+        row = {
+            "user_id": user_id,
+            "source": usage.source or "agent",
+            "llm_calls": len(usage.calls),
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "latency_ms": sum(call["latency_ms"] for call in usage.calls),
+            "cost": usage.cost,
+            "calls": usage.calls,
+            "created_at": datetime.utcnow(),
+        }
+        with self._lock:
+            self._rows.append(row)
+            due = (
+                len(self._rows) >= self.batch_size
+                or time.monotonic() >= self._next_flush
+            )
+        if due:
+            # On failure the rows stay buffered and are sent with the next batch
+            with contextlib.suppress(Exception):
+                self.flush()
+
+    def flush(self) -> int:
+        """Insert the buffered rows; returns how many were written."""
+        with self._lock:
+            rows, self._rows = self._rows, []
+            self._next_flush = time.monotonic() + self.flush_interval
+        if not rows:
+            return 0
+        try:
+            db.session.execute(db.insert(QuestionUsage).values(rows))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            with self._lock:
+                self._rows[:0] = rows
+                dropped = len(self._rows) - self.max_rows
+                if dropped > 0:
+                    del self._rows[:dropped]
+                    logger.warning("Dropped %d question usage rows", dropped)
+            raise
+        return len(rows)
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
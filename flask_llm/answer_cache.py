@@ -0,0 +1,146 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import http_client
+from settings import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    key TEXT PRIMARY KEY,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return " ".join(question.lower().split()).rstrip("?.! ")
+
+
+class AnswerCache:
+    """Agent answers keyed on the normalized question and the data version.
+
+    Entries live in a SQLite file, so every gunicorn worker on the host
+    shares them. Entries expire ``ttl`` seconds after they were written and
+    the least recently read are evicted beyond ``max_entries``. A new data
+    version changes every key, and the API never issues a version twice (not
+    even after a restart), so answers about changed data are never served;
+    the old rows simply age out.
+    """
+
+    def __init__(
+        self,
+        path: str = settings.ANSWER_CACHE_PATH,
+        ttl: float = settings.ANSWER_CACHE_TTL,
+        max_entries: int = settings.ANSWER_CACHE_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # A short-lived connection per call is fork- and thread-safe
+        connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        if not self._ready:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(SCHEMA)
+            self._ready = True
+        return connection
+
+    @staticmethod
+    def key(question: str, version: str) -> str:
+        raw = f"{version}\0{normalize_question(question)}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, question: str, version: str) -> Optional[str]:
+        now = time.time()
+        connection = self._connect()
+        try:
+            row = connection.execute(
+                "SELECT answer FROM answers WHERE key = ? AND created_at > ?",
+                (self.key(question, version), now - self.ttl),
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE answers SET accessed_at = ? WHERE key = ?",
+                (now, self.key(question, version)),
+            )
+            return row[0]
+        finally:
+            connection.close()
+
+    def set(self, question: str, version: str, answer: str):
+        now = time.time()
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                connection.execute(
+                    "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?)",
+                    (self.key(question, version), question, answer, now, now),
+                )
+                connection.execute(
+                    "DELETE FROM answers WHERE created_at <= ?", (now - self.ttl,)
+                )
+                connection.execute(
+                    "DELETE FROM answers WHERE key IN (SELECT key FROM answers "
+                    "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        finally:
+            connection.close()
+
+    def clear(self):
+        connection = self._connect()
+        try:
+            connection.execute("DELETE FROM answers")
+        finally:
+            connection.close()
+
+    def __len__(self):
+        connection = self._connect()
+        try:
+            return connection.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        finally:
+            connection.close()
+
+
+_version = {"value": None, "expires": 0.0}
+_version_lock = threading.Lock()
+
+
+def data_version() -> Optional[str]:
+    """Current data version token of the Django API, or None if unavailable.
+
+    The token is reused for ``DATA_VERSION_TTL`` seconds, so a write in the
+    API can take that long to invalidate cached answers.
+    """
+    now = time.monotonic()
+    with _version_lock:
+        if now < _version["expires"]:
+            return _version["value"]
+    try:
+        response = http_client.get(f"{settings.DJANGO_API_URL}/api/cache/version/")
+        version = response.json()["version"] if response.status_code == 200 else None
+    except Exception:
+        version = None
+    with _version_lock:
+        _version["value"] = version
+        _version["expires"] = now + settings.DATA_VERSION_TTL if version else 0.0
+    return version
+
+
+def reset_data_version():
+    with _version_lock:
+        _version["value"] = None
+        _version["expires"] = 0.0
@@ -1,10 +1,274 @@
+import csv
+import io
+import logging
+import re
+from abc import abstractmethod
+from functools import lru_cache
 from typing import Optional, Type
 
-import requests
-from firecrawl import FirecrawlApp
+import http_client
+from firecrawl import AsyncFirecrawl, FirecrawlApp
 from langchain.tools import BaseTool
+from metrics import tool_timer
 from pydantic import BaseModel, Field
 from settings import settings
+from tracing import tool_result, tool_span
+
+logger = logging.getLogger(__name__)
+
+
+class APIError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"Error: {status_code}")
+        self.status_code = status_code
+
+
+def fetch_results(
+    url: str,
+    params: Optional[dict] = None,
+    max_pages: int = settings.DJANGO_API_MAX_PAGES,
+    page_size: int = settings.DJANGO_API_PAGE_SIZE,
+):
+    """GET a cursor-paginated endpoint, following ``next`` links up to a budget.
+
+    Returns ``(results, has_more)``. Unpaginated responses (plain lists or
+    single objects) are returned as-is with ``has_more`` False.
+    """
+    params = {**(params or {}), "page_size": page_size}
+    results = []
+    pages = 0
+    while url:
+        response = http_client.get(url, params=params)
+        if response.status_code != 200:
+            raise APIError(response.status_code)
+        data = response.json()
+        if not (isinstance(data, dict) and "results" in data):
+            return data, False
+
+        results.extend(data["results"])
+        pages += 1
+        url = data.get("next")
+        # The next link already carries the cursor and original query string
+        params = None
+        if pages >= max_pages:
+            break
+
+    return results, bool(url)
+
+
+async def afetch_results(
+    url: str,
+    params: Optional[dict] = None,
+    max_pages: int = settings.DJANGO_API_MAX_PAGES,
+    page_size: int = settings.DJANGO_API_PAGE_SIZE,
+):
+    """Async :func:`fetch_results` over the pooled ``httpx`` client."""
+    params = {**(params or {}), "page_size": page_size}
+    results = []
+    pages = 0
+    while url:
+        response = await http_client.aget(url, params=params)
+        if response.status_code != 200:
+            raise APIError(response.status_code)
+        data = response.json()
+        if not (isinstance(data, dict) and "results" in data):
+            return data, False
+
+        results.extend(data["results"])
+        pages += 1
+        url = data.get("next")
+        params = None
+        if pages >= max_pages:
+            break
+
+    return results, bool(url)
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(settings.TOOL_RESULT_TOKENIZER)
+    except Exception:
+        # Tokenizer files are downloaded on first use; fall back offline
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+
+def _flatten(row: dict, prefix: str = "") -> dict:
+    """Flatten nested objects into dotted keys, keeping lists of objects."""
+    flat = {}
+    for key, value in row.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def _columns(rows: list) -> list:
+    """Non-empty columns in first-seen order, minus redundant formatted copies.
+
+    ``price_formatted`` ("RM 10.00") is dropped when ``price`` is present and
+    its unit moves into the header as ``price (RM)``.
+    """
+    columns = {}
+    for row in rows:
+        for key, value in row.items():
+            if value not in (None, "", []):
+                columns.setdefault(key, key)
+    for key in list(columns):
+        raw = key[: -len("_formatted")] if key.endswith("_formatted") else None
+        if raw in columns:
+            del columns[key]
+            sample = next((row[key] for row in rows if row.get(key)), "")
+            unit = str(sample).rsplit(" ", 1)[0] if " " in str(sample) else ""
+            if unit:
+                columns[raw] = f"{raw} ({unit})"
+    return list(columns.items())
+
+
+def _csv_line(values) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow(values)
+    return buffer.getvalue()
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, list):
+        return "; ".join(_cell(item) for item in value)
+    return str(value)
+
+
+def _table(rows: list, parent_ids=None) -> list:
+    columns = _columns(rows)
+    if parent_ids is not None:
+        # Drop back-references (e.g. contact.contract) that repeat parent_id
+        columns = [
+            (key, label)
+            for key, label in columns
+            if any(row.get(key) != pid for row, pid in zip(rows, parent_ids))
+        ]
+    header = [label for _, label in columns]
+    if parent_ids is not None:
+        header = ["parent_id", *header]
+    lines = [_csv_line(header)]
+    for i, row in enumerate(rows):
+        values = [_cell(row.get(key)) for key, _ in columns]
+        if parent_ids is not None:
+            values = [_cell(parent_ids[i]), *values]
+        lines.append(_csv_line(values))
+    return lines
+
+
+def encode_results(
+    results,
+    has_more: bool = False,
+    token_budget: int = settings.TOOL_RESULT_TOKEN_BUDGET,
+) -> str:
+    """Encode API rows as compact CSV for the LLM.
+
+    Nested objects become dotted columns and nested lists of objects (invoice
+    details, contract contacts) become a child table keyed by ``parent_id``.
+    Empty columns are dropped. Rows are added until ``token_budget`` is
+    reached; the rest are summarised as "N more rows".
+    """
+    if isinstance(results, dict):
+        results = [results]
+    if not results:
+        return "No results."
+    if not all(isinstance(row, dict) for row in results):
+        return str(results)
+
+    rows = [_flatten(row) for row in results]
+    nested = [
+        key
+        for key in dict.fromkeys(key for row in rows for key in row)
+        if any(
+            isinstance(row.get(key), list)
+            and row[key]
+            and isinstance(row[key][0], dict)
+            for row in rows
+        )
+    ]
+
+    # Keep whole rows (with their children) while they fit the budget
+    kept, used = 0, count_tokens(",".join(rows[0]))
+    for row in rows:
+        row_lines = [[_cell(v) for k, v in row.items() if k not in nested]]
+        for key in nested:
+            row_lines += [
+                list(map(_cell, _flatten(c).values())) for c in row.get(key) or []
+            ]
+        cost = sum(count_tokens(_csv_line(line)) for line in row_lines)
+        if kept and used + cost > token_budget:
+            break
+        used += cost
+        kept += 1
+
+    included = rows[:kept]
+    lines = _table(
+        [{k: v for k, v in row.items() if k not in nested} for row in included]
+    )
+    for key in nested:
+        children, parent_ids = [], []
+        for row in included:
+            for child in row.get(key) or []:
+                children.append(_flatten(child))
+                parent_ids.append(row.get("id"))
+        if children:
+            lines.append(f"[{key}]")
+            lines += _table(children, parent_ids)
+
+    remaining = len(rows) - kept
+    if remaining:
+        lines.append(f"... {remaining} more rows not shown.")
+    if has_more or remaining:
+        lines.append(
+            f"(Showing the first {kept} results; more are available, narrow "
+            "the search to see them.)"
+        )
+    return "\n".join(lines)
+
+
+def format_results(results, has_more: bool = False) -> str:
+    if settings.TOOL_RESULT_FORMAT == "compact":
+        return encode_results(results, has_more)
+    if has_more:
+        return (
+            f"{results}\n(Showing the first {len(results)} results; more are "
+            "available, narrow the search to see them.)"
+        )
+    return str(results)
+
+
+def run_api_query(url: str, params: Optional[dict] = None, **budget) -> str:
+    try:
+        return format_results(*fetch_results(url, params, **budget))
+    except APIError as e:
+        return str(e)
+    except Exception as e:
+        return f"Error connecting to API: {str(e)}"
+
+
+async def arun_api_query(url: str, params: Optional[dict] = None, **budget) -> str:
+    try:
+        return format_results(*await afetch_results(url, params, **budget))
+    except APIError as e:
+        return str(e)
+    except Exception as e:
+        return f"Error connecting to API: {str(e)}"
 
 
 class CustomerSearchInput(BaseModel):
@@ -28,81 +292,102 @@ class InvoiceSearchInput(BaseModel):
     )
 
 
-class CustomerSearchTool(BaseTool):
+class DjangoAPITool(BaseTool):
+    """Base for tools that make one (paginated) Django API query.
+
+    Subclasses implement ``_request`` with the tool's arguments, returning
+    the ``run_api_query`` keyword arguments; ``_run`` and ``_arun`` share it.
+    """
+
+    @abstractmethod
+    def _request(self, *args, **kwargs) -> dict:
+        """``run_api_query`` keyword arguments for the tool's arguments."""
+
+    def _run(self, *args, **kwargs) -> str:
+        with tool_span(self.name, kwargs) as span, tool_timer(self.name) as timer:
+            result = run_api_query(**self._request(*args, **kwargs))
+            return timer.done(tool_result(span, result))
+
+    async def _arun(self, *args, **kwargs) -> str:
+        with tool_span(self.name, kwargs) as span, tool_timer(self.name) as timer:
+            result = await arun_api_query(**self._request(*args, **kwargs))
+            return timer.done(tool_result(span, result))
+
+
+class CustomerIdInput(BaseModel):
+    customer_id: int = Field(description="ID of the customer")
+
+
+class NoInput(BaseModel):
+    pass
+
+
+class SerialLookupInput(BaseModel):
+    item_id: Optional[int] = Field(None, description="Filter serials by item ID")
+
+
+class ServiceHistoryInput(BaseModel):
+    start_date: Optional[str] = Field(
+        None, description="Only services on or after this date (YYYY-MM-DD)"
+    )
+    end_date: Optional[str] = Field(
+        None, description="Only services on or before this date (YYYY-MM-DD)"
+    )
+
+
+class CustomerSearchTool(DjangoAPITool):
     name: str = "customer_search"
     description: str = "Search for customers and get their basic information"
     args_schema: Type[BaseModel] = CustomerSearchInput
 
-    def _run(self, customer_name: Optional[str] = None) -> str:
-        url = f"{settings.DJANGO_API_URL}/api/customers/"
-        try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                customers = response.json()
-                if customer_name:
-                    filtered = [
-                        c
-                        for c in customers
-                        if customer_name.lower() in c["name"].lower()
-                    ]
-                    return str(filtered)
-                return str(customers)
-            return f"Error: {response.status_code}"
-        except Exception as e:
-            return f"Error connecting to API: {str(e)}"
+    def _request(self, customer_name: Optional[str] = None) -> dict:
+        url = f"{settings.DJANGO_API_URL}/api/customers/search/"
+        params = {"limit": settings.CUSTOMER_SEARCH_LIMIT}
+        if customer_name:
+            params["name"] = customer_name
+
+        # The search endpoint is bounded by ``limit``; never follow its pages
+        return {"url": url, "params": params, "max_pages": 1}
 
 
-class CustomerInvoicesTool(BaseTool):
+class CustomerInvoicesTool(DjangoAPITool):
     name: str = "customer_invoices"
     description: str = "Get all invoices for a specific customer by customer ID"
+    args_schema: Type[BaseModel] = CustomerIdInput
 
-    def _run(self, customer_id: int) -> str:
+    def _request(self, customer_id: int) -> dict:
         url = f"{settings.DJANGO_API_URL}/api/customers/{customer_id}/invoices/"
-        try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                return str(response.json())
-            return f"Error: {response.status_code}"
-        except Exception as e:
-            return f"Error connecting to API: {str(e)}"
+        return {"url": url}
 
 
-class CustomerContractsTool(BaseTool):
+class CustomerContractsTool(DjangoAPITool):
     name: str = "customer_contracts"
     description: str = "Get all contracts for a specific customer by customer ID"
+    args_schema: Type[BaseModel] = CustomerIdInput
 
-    def _run(self, customer_id: int) -> str:
+    def _request(self, customer_id: int) -> dict:
         url = f"{settings.DJANGO_API_URL}/api/customers/{customer_id}/contracts/"
-        try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                return str(response.json())
-            return f"Error: {response.status_code}"
-        except Exception as e:
-            return f"Error connecting to API: {str(e)}"
+        return {"url": url}
 
 
-class CustomerServicesTool(BaseTool):
+class CustomerServicesTool(DjangoAPITool):
     name: str = "customer_services"
     description: str = "Get all services for a specific customer by customer ID"
+    args_schema: Type[BaseModel] = CustomerIdInput
 
-    def _run(self, customer_id: int) -> str:
+    def _request(self, customer_id: int) -> dict:
         url = f"{settings.DJANGO_API_URL}/api/customers/{customer_id}/services/"
-        try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                return str(response.json())
-            return f"Error: {response.status_code}"
-        except Exception as e:
-            return f"Error connecting to API: {str(e)}"
+        return {"url": url}
 
 
-class ItemSearchTool(BaseTool):
+class ItemSearchTool(DjangoAPITool):
     name: str = "item_search"
     description: str = "Search for items/products by name, model, or brand"
     args_schema: Type[BaseModel] = ItemSearchInput
 
-    def _run(self, query: Optional[str] = None, brand: Optional[str] = None) -> str:
+    def _request(
+        self, query: Optional[str] = None, brand: Optional[str] = None
+    ) -> dict:
         url = f"{settings.DJANGO_API_URL}/api/items/search/"
         params = {}
         if query:
@@ -110,76 +395,55 @@ class ItemSearchTool(BaseTool):
         if brand:
             params["brand"] = brand
 
-        try:
-            response = requests.get(url, params=params)
-            if response.status_code == 200:
-                return str(response.json())
-            return f"Error: {response.status_code}"
-        except Exception as e:
-            return f"Error connecting to API: {str(e)}"
+        return {"url": url, "params": params}
 
 
-class InvoiceSearchTool(BaseTool):
+class InvoiceSearchTool(DjangoAPITool):
     name: str = "invoice_search"
     description: str = "Search for invoices, optionally filtered by customer name"
     args_schema: Type[BaseModel] = InvoiceSearchInput
 
-    def _run(self, customer_name: Optional[str] = None) -> str:
+    def _request(self, customer_name: Optional[str] = None) -> dict:
         if customer_name:
             url = f"{settings.DJANGO_API_URL}/api/invoices/by_customer/?customer_name={customer_name}"
-        else:
-            url = f"{settings.DJANGO_API_URL}/api/invoices/"
+            return {"url": url}
 
-        try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                return str(response.json())
-            return f"Error: {response.status_code}"
-        except Exception as e:
-            return f"Error connecting to API: {str(e)}"
+        # Unfiltered listing: only the most recent page is useful to the agent
+        url = f"{settings.DJANGO_API_URL}/api/invoices/"
+        return {"url": url, "max_pages": 1}
 
 
-class ActiveContractsTool(BaseTool):
+class ActiveContractsTool(DjangoAPITool):
     name: str = "active_contracts"
     description: str = "Get all active contracts with SLA details"
+    args_schema: Type[BaseModel] = NoInput
 
-    def _run(self) -> str:
-        url = f"{settings.DJANGO_API_URL}/api/contracts/active/"
-        try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                return str(response.json())
-            return f"Error: {response.status_code}"
-        except Exception as e:
-            return f"Error connecting to API: {str(e)}"
+    def _request(self) -> dict:
+        return {"url": f"{settings.DJANGO_API_URL}/api/contracts/active/"}
 
 
-class SerialLookupTool(BaseTool):
+class SerialLookupTool(DjangoAPITool):
     name: str = "serial_lookup"
     description: str = "Look up serial numbers and machine information"
+    args_schema: Type[BaseModel] = SerialLookupInput
 
-    def _run(self, item_id: Optional[int] = None) -> str:
+    def _request(self, item_id: Optional[int] = None) -> dict:
         url = f"{settings.DJANGO_API_URL}/api/serials/"
         params = {}
         if item_id:
             params["item_id"] = item_id
 
-        try:
-            response = requests.get(url, params=params)
-            if response.status_code == 200:
-                return str(response.json())
-            return f"Error: {response.status_code}"
-        except Exception as e:
-            return f"Error connecting to API: {str(e)}"
+        return {"url": url, "params": params}
 
 
-class ServiceHistoryTool(BaseTool):
+class ServiceHistoryTool(DjangoAPITool):
     name: str = "service_history"
     description: str = "Get service history and machine maintenance records"
+    args_schema: Type[BaseModel] = ServiceHistoryInput
 
-    def _run(
+    def _request(
         self, start_date: Optional[str] = None, end_date: Optional[str] = None
-    ) -> str:
+    ) -> dict:
         url = f"{settings.DJANGO_API_URL}/api/services/"
         if start_date or end_date:
             url += "by_date_range/"
@@ -188,16 +452,10 @@ class ServiceHistoryTool(BaseTool):
                 params["start_date"] = start_date
             if end_date:
                 params["end_date"] = end_date
-        else:
-            params = {}
+            return {"url": url, "params": params}
 
-        try:
-            response = requests.get(url, params=params)
-            if response.status_code == 200:
-                return str(response.json())
-            return f"Error: {response.status_code}"
-        except Exception as e:
-            return f"Error connecting to API: {str(e)}"
+        # Unfiltered listing: only the most recent page is useful to the agent
+        return {"url": url, "max_pages": 1}
 
 
 class WebSearchInput(BaseModel):
@@ -211,6 +469,9 @@ class WebSearchInput(BaseModel):
     )
 
 
+URL_PATTERN = re.compile(r"^https?://[^\s]+")
+
+
 class WebSearchTool(BaseTool):
     name: str = "web_search"
     description: str = """Search the web or scrape specific URLs for information using Firecrawl.
@@ -218,17 +479,10 @@ class WebSearchTool(BaseTool):
     Use search_type='search' (default) for general web searches and queries."""
     args_schema: Type[BaseModel] = WebSearchInput
 
-    def _run(
-        self, query: str, search_type: str = "search", max_results: int = 5
-    ) -> str:
-        import re
-
-        if not settings.FIRECRAWL_API_KEY:
-            return "Error: Firecrawl API key not configured. Please set FIRECRAWL_API_KEY environment variable."
-
-        # Debug: Check what we're receiving
-        print(f"DEBUG: Received query type: {type(query)}, value: {query}")
-        print(f"DEBUG: search_type: {search_type}, max_results: {max_results}")
+    @staticmethod
+    def _plan(query, search_type: str):
+        """Return ``(query, action)`` where action is scrape, search or invalid."""
+        logger.debug("web_search received %s: %r", type(query).__name__, query)
 
         # Ensure query is a string
         if not isinstance(query, str):
@@ -238,117 +492,170 @@ class WebSearchTool(BaseTool):
             else:
                 query = str(query)
 
+        # Auto-detect if this should be a scrape or search
+        is_url = URL_PATTERN.match(query.strip())
+
+        # If search_type is scrape but query isn't a URL, check if there's a URL in the query
+        if search_type == "scrape" and not is_url:
+            # Look for URLs within the query text
+            url_in_text = re.search(r"https?://[^\s]+", query)
+            if url_in_text:
+                query = url_in_text.group()
+                is_url = URL_PATTERN.match(query.strip())
+
+        if search_type == "scrape":
+            return query, "scrape" if is_url else "invalid"
+        return query, "search"
+
+    @staticmethod
+    def _format_scrape(query: str, result) -> str:
+        logger.debug("Scrape result type: %s", type(result).__name__)
+
+        # Handle different response formats from Firecrawl
+        if hasattr(result, "markdown") and result.markdown:
+            # New format: Document object with markdown attribute
+            return f"Content from {query}:\n\n{result.markdown}"
+        elif isinstance(result, dict):
+            # Old format: Dictionary response
+            if result.get("success"):
+                data = result.get("data", {})
+                if isinstance(data, dict):
+                    content = data.get("markdown", "No content available")
+                else:
+                    content = str(data)
+                return f"Content from {query}:\n\n{content}"
+            else:
+                error_msg = result.get("error", "Unknown error")
+                return f"Error: Could not scrape URL {query}. {error_msg}"
+        elif hasattr(result, "data") and result.data:
+            # Alternative format: Object with data attribute
+            if hasattr(result.data, "markdown"):
+                content = result.data.markdown
+            else:
+                content = str(result.data)
+            return f"Content from {query}:\n\n{content}"
+        else:
+            return f"Error: Could not scrape URL {query}. Unexpected response format: {type(result)}"
+
+    @staticmethod
+    def _format_search(query: str, search_result, max_results: int) -> str:
+        # Handle different response formats
+        if hasattr(search_result, "web") and search_result.web:
+            # New format: SearchResponse object with web results
+            formatted_results = []
+            for i, item in enumerate(search_result.web[:max_results], 1):
+                title = getattr(item, "title", "No title")
+                url = getattr(item, "url", "No URL")
+                description = getattr(item, "description", "No description")[:300]
+                formatted_results.append(
+                    f"{i}. **{title}**\n   URL: {url}\n   Content: {description}..."
+                )
+
+            return f"Search results for '{query}':\n\n" + "\n\n".join(formatted_results)
+
+        elif isinstance(search_result, dict) and "success" in search_result:
+            # Old format: Dictionary response
+            if search_result["success"]:
+                data = search_result.get("data", [])
+                if data and len(data) > 0:
+                    formatted_results = []
+                    for i, item in enumerate(data[:max_results], 1):
+                        title = item.get("title", "No title")
+                        url = item.get("url", "No URL")
+                        snippet = item.get(
+                            "markdown",
+                            item.get("description", "No description"),
+                        )[:300]
+                        formatted_results.append(
+                            f"{i}. **{title}**\n   URL: {url}\n   Content: {snippet}..."
+                        )
+
+                    return f"Search results for '{query}':\n\n" + "\n\n".join(
+                        formatted_results
+                    )
+
+        return f"No search results found for: {query}"
+
+    def _run(
+        self, query: str, search_type: str = "search", max_results: int = 5
+    ) -> str:
+        arguments = {"query": query, "search_type": search_type}
+        with tool_span(self.name, arguments) as span, tool_timer(self.name) as timer:
+            result = self._search(query, search_type, max_results)
+            return timer.done(tool_result(span, result))
+
+    async def _arun(
+        self, query: str, search_type: str = "search", max_results: int = 5
+    ) -> str:
+        arguments = {"query": query, "search_type": search_type}
+        with tool_span(self.name, arguments) as span, tool_timer(self.name) as timer:
+            result = await self._asearch(query, search_type, max_results)
+            return timer.done(tool_result(span, result))
+
+    def _search(
+        self, query: str, search_type: str = "search", max_results: int = 5
+    ) -> str:
+        if not settings.FIRECRAWL_API_KEY:
+            return "Error: Firecrawl API key not configured. Please set FIRECRAWL_API_KEY environment variable."
+
         try:
             firecrawl = FirecrawlApp(api_key=settings.FIRECRAWL_API_KEY)
+            query, action = self._plan(query, search_type)
 
-            # Auto-detect if this should be a scrape or search
-            url_pattern = re.compile(r"^https?://[^\s]+")
-            is_url = url_pattern.match(query.strip())
-
-            # If search_type is scrape but query isn't a URL, check if there's a URL in the query
-            if search_type == "scrape" and not is_url:
-                # Look for URLs within the query text
-                url_in_text = re.search(r"https?://[^\s]+", query)
-                if url_in_text:
-                    query = url_in_text.group()
-                    is_url = url_pattern.match(query.strip())
-
-            if search_type == "scrape" and is_url:
-                # Scrape a specific URL
-                print(f"DEBUG: About to scrape URL: {query.strip()}")
+            if action == "scrape":
                 try:
                     result = firecrawl.scrape(
                         url=query.strip(), formats=["markdown"], only_main_content=True
                     )
-                    print(f"DEBUG: Scrape result: {result}")
-                    print(f"DEBUG: Result type: {type(result)}")
-
-                    # Handle different response formats from Firecrawl
-                    if hasattr(result, "markdown") and result.markdown:
-                        # New format: Document object with markdown attribute
-                        content = result.markdown
-                        return f"Content from {query}:\n\n{content}"
-                    elif isinstance(result, dict):
-                        # Old format: Dictionary response
-                        if result.get("success"):
-                            data = result.get("data", {})
-                            if isinstance(data, dict):
-                                content = data.get("markdown", "No content available")
-                            else:
-                                content = str(data)
-                            return f"Content from {query}:\n\n{content}"
-                        else:
-                            error_msg = result.get("error", "Unknown error")
-                            return f"Error: Could not scrape URL {query}. {error_msg}"
-                    elif hasattr(result, "data") and result.data:
-                        # Alternative format: Object with data attribute
-                        if hasattr(result.data, "markdown"):
-                            content = result.data.markdown
-                        else:
-                            content = str(result.data)
-                        return f"Content from {query}:\n\n{content}"
-                    else:
-                        return f"Error: Could not scrape URL {query}. Unexpected response format: {type(result)}"
+                    return self._format_scrape(query, result)
                 except Exception as scrape_error:
-                    print(f"DEBUG: Scrape exception: {scrape_error}")
                     return f"Error scraping {query}: {str(scrape_error)}"
 
-            elif search_type == "scrape" and not is_url:
+            elif action == "invalid":
                 return f"Error: Cannot scrape '{query}' - no valid URL found. Please provide a URL starting with http:// or https://"
 
             else:
                 # Perform web search (default behavior)
-                print(f"DEBUG: About to search for: {query.strip()}")
                 try:
                     search_result = firecrawl.search(
                         query=query.strip(), limit=max_results
                     )
-                    print(f"DEBUG: Search result: {search_result}")
-
-                    # Handle different response formats
-                    if hasattr(search_result, "web") and search_result.web:
-                        # New format: SearchResponse object with web results
-                        data = search_result.web
-                        formatted_results = []
-                        for i, item in enumerate(data[:max_results], 1):
-                            title = getattr(item, "title", "No title")
-                            url = getattr(item, "url", "No URL")
-                            description = getattr(
-                                item, "description", "No description"
-                            )[:300]
-                            formatted_results.append(
-                                f"{i}. **{title}**\n   URL: {url}\n   Content: {description}..."
-                            )
-
-                        return f"Search results for '{query}':\n\n" + "\n\n".join(
-                            formatted_results
-                        )
+                    return self._format_search(query, search_result, max_results)
+                except Exception as search_error:
+                    return f"Error searching for {query}: {str(search_error)}"
+
+        except Exception as e:
+            return f"Error performing web search: {str(e)}"
+
+    async def _asearch(
+        self, query: str, search_type: str = "search", max_results: int = 5
+    ) -> str:
+        if not settings.FIRECRAWL_API_KEY:
+            return "Error: Firecrawl API key not configured. Please set FIRECRAWL_API_KEY environment variable."
+
+        try:
+            firecrawl = AsyncFirecrawl(api_key=settings.FIRECRAWL_API_KEY)
+            query, action = self._plan(query, search_type)
 
-                    elif isinstance(search_result, dict) and "success" in search_result:
-                        # Old format: Dictionary response
-                        if search_result["success"]:
-                            data = search_result.get("data", [])
-                            if data and len(data) > 0:
-                                formatted_results = []
-                                for i, item in enumerate(data[:max_results], 1):
-                                    title = item.get("title", "No title")
-                                    url = item.get("url", "No URL")
-                                    snippet = item.get(
-                                        "markdown",
-                                        item.get("description", "No description"),
-                                    )[:300]
-                                    formatted_results.append(
-                                        f"{i}. **{title}**\n   URL: {url}\n   Content: {snippet}..."
-                                    )
-
-                                return (
-                                    f"Search results for '{query}':\n\n"
-                                    + "\n\n".join(formatted_results)
-                                )
-
-                    return f"No search results found for: {query}"
+            if action == "scrape":
+                try:
+                    result = await firecrawl.scrape(
+                        url=query.strip(), formats=["markdown"], only_main_content=True
+                    )
+                    return self._format_scrape(query, result)
+                except Exception as scrape_error:
+                    return f"Error scraping {query}: {str(scrape_error)}"
+
+            elif action == "invalid":
+                return f"Error: Cannot scrape '{query}' - no valid URL found. Please provide a URL starting with http:// or https://"
+
+            else:
+                try:
+                    search_result = await firecrawl.search(
+                        query=query.strip(), limit=max_results
+                    )
+                    return self._format_search(query, search_result, max_results)
                 except Exception as search_error:
-                    print(f"DEBUG: Search exception: {search_error}")
                     return f"Error searching for {query}: {str(search_error)}"
 
         except Exception as e:
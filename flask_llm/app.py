@@ -1,16 +1,21 @@
+import json
 import os
+import threading
 from datetime import datetime
 
-from auth_utils import login_required_redirect
+from accounting import UsageHandler, UsageLog, track_usage
+from auth_utils import login_required_redirect, user_cache
 from dotenv import load_dotenv
 from flask import (
     Flask,
+    Response,
     flash,
     get_flashed_messages,
     jsonify,
     redirect,
     render_template,
     request,
+    stream_with_context,
     url_for,
 )
 from flask_login import (
@@ -22,8 +27,14 @@ from flask_login import (
 )
 from flask_migrate import Migrate
 from llm_agent import create_agent
-from models import User, Counter, db
+from metrics import init_app as init_metrics
+from metrics import metrics_response
+from models import User, db
+from opentelemetry import trace
+from quota import create_quota
 from settings import settings
+from tool_cache import tool_cache
+from tracing import question_span, start_question, trace_id
 
 load_dotenv()
 
@@ -31,6 +42,7 @@ app = Flask(__name__)
 app.config["SECRET_KEY"] = settings.SECRET_KEY
 app.config["SQLALCHEMY_DATABASE_URI"] = settings.SQLALCHEMY_DATABASE_URI
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = settings.SQLALCHEMY_TRACK_MODIFICATIONS
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = settings.SQLALCHEMY_ENGINE_OPTIONS
 
 db.init_app(app)
 migrate = Migrate(app, db)
@@ -39,45 +51,87 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = "login"
 
+# Request latency, concurrency and DB statement counts for /metrics
+init_metrics(app)
+
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return user_cache.load(int(user_id))
+
+
+# Daily question and token limits, counted in PostgreSQL or a host-local store
+quota = create_quota()
+LIMIT_EXCEEDED = "Today's request limit has been exceeded. Please try again tomorrow."
+# Tokens, latency and cost of each answered question, inserted in batches
+usage_log = UsageLog()
+
+
+def charge(user_id, usage: UsageHandler):
+    """Record the LLM usage of a question answered without the cache."""
+    usage_log.record(user_id, usage)
+    if usage.total_tokens:
+        quota.charge(user_id, usage.total_tokens)
 
 
 # Initialize the agent
 agent = None
+agent_lock = threading.Lock()
+
+# Set by warm_up(); /ready answers 503 until the agent is built
+warmup_status = {"ready": False, "checks": {}}
 
 
 def get_agent():
     global agent
     if agent is None:
-        api_key = os.getenv("AZURE_OPENAI_API_KEY")
-        endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-        api_version = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
+        with agent_lock:
+            if agent is None:
+                api_key = os.getenv("AZURE_OPENAI_API_KEY")
+                endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
+                deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+                api_version = os.getenv(
+                    "AZURE_OPENAI_API_VERSION", "2024-02-15-preview"
+                )
 
-        if not all([api_key, endpoint, deployment]):
-            raise ValueError("Missing required Azure OpenAI configuration")
+                if not all([api_key, endpoint, deployment]):
+                    raise ValueError("Missing required Azure OpenAI configuration")
 
-        agent = create_agent(api_key, endpoint, deployment, api_version)
+                agent = create_agent(api_key, endpoint, deployment, api_version)
 
     return agent
 
 
+def warm_up() -> bool:
+    """Build this process's agent and open its connections before traffic.
+
+    Called from gunicorn's post_fork hook, so no worker's first question pays
+    for it. Returns whether the worker is ready; unreachable backends are
+    recorded in the checks but do not block readiness.
+    """
+    try:
+        checks = {"agent": "ok", **get_agent().warm_up()}
+        ready = True
+    except Exception as e:
+        checks = {"agent": f"error: {e}"}
+        ready = False
+    warmup_status.update(ready=ready, checks=checks)
+    return ready
+
+
 @app.route("/", methods=["GET"])
 @login_required_redirect
 def index():
 
-    today = datetime.utcnow().date()
-    
-    counter_data = Counter.query.filter_by(user_id = current_user.id, date=today).first()
-    user_usage_count = counter_data.count if counter_data else 0
+    user_usage_count, user_token_count = quota.today(current_user.id)
 
     return render_template(
         "index.html",
         ai_model = settings.AZURE_OPENAI_DEPLOYMENT_NAME,
         user_usage_count = user_usage_count,
+        daily_limit = quota.limit,
+        user_token_count = user_token_count,
+        daily_token_limit = quota.token_limit,
     )
 
 
@@ -119,6 +173,8 @@ def login():
 @app.route("/logout")
 @login_required
 def logout():
+    if current_user.is_authenticated:
+        user_cache.invalidate(current_user.id)
     logout_user()
     flash("You have been logged out.", "success")
     return redirect(url_for("login"))
@@ -131,12 +187,39 @@ def health_check():
             "status": "healthy",
             "message": "LLM Business Data API is running",
             "endpoints": {
-                "/query": "POST - Send natural language queries about business data"
+                "/query": "POST - Send natural language queries about business data",
+                "/query/stream": "POST - Same as /query, streamed as Server-Sent Events",
+                "/tools/cache": "GET - Tool result cache hits and misses per tool",
+                "/ready": "GET - 200 once this worker has warmed up, else 503",
+                "/metrics": "GET - Prometheus metrics of all workers",
             },
         }
     )
 
 
+@app.route("/ready", methods=["GET"])
+def readiness_check():
+    return jsonify(warmup_status), 200 if warmup_status["ready"] else 503
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    body, content_type = metrics_response()
+    return Response(body, content_type=content_type)
+
+
+@app.route("/tools/cache", methods=["GET"])
+def tool_cache_stats():
+    return jsonify(
+        {
+            "enabled": settings.TOOL_CACHE_ENABLED,
+            "entries": len(tool_cache),
+            "max_entries": tool_cache.max_entries,
+            "tools": tool_cache.stats(),
+        }
+    )
+
+
 @app.route("/query", methods=["POST"])
 @login_required
 def query_data():
@@ -145,22 +228,103 @@ def query_data():
         if not data or "question" not in data:
             return jsonify({"error": "Missing 'question' in request body"}), 400
         
-        today = datetime.utcnow().date()
-        current_count = Counter.query.filter_by(user_id = current_user.id, date =today).first()
-        if current_count and current_count.count >= 50:
-            return jsonify({"error": "Today's request limit has been exceeded. Please try again tomorrow."}), 403
+        # Check the limit and count the question in one statement
+        user_id = current_user.id
+        if quota.reserve(user_id) is None:
+            return jsonify({"error": LIMIT_EXCEEDED}), 403
 
         question = data["question"]
-        agent = get_agent()
-        response = agent.query(question)
+        # One trace per question, continued by every tool call and Django request
+        with question_span("query", **{"user.id": user_id}) as span:
+            try:
+                agent = get_agent()
+                # Return the DB connection to the pool while the agent runs
+                db.session.close()
+                with track_usage() as usage:
+                    response, cached = agent.answer(question)
+            except Exception:
+                quota.release(user_id)
+                raise
+
+        # Cached answers cost no LLM call, so they do not count against the quota
+        if cached:
+            quota.release(user_id)
+        else:
+            charge(user_id, usage)
+
+        return (
+            jsonify({"question": question, "answer": response, "cached": cached}),
+            200,
+            {"X-Trace-Id": trace_id(span)},
+        )
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-        Counter.increment(current_user.id)
 
-        return jsonify({"question": question, "answer": response})
+@app.route("/query/stream", methods=["POST"])
+@login_required
+def query_stream():
+    data = request.get_json(silent=True)
+    if not data or "question" not in data:
+        return jsonify({"error": "Missing 'question' in request body"}), 400
+
+    user_id = current_user.id
+    if quota.reserve(user_id) is None:
+        return jsonify({"error": LIMIT_EXCEEDED}), 403
 
+    try:
+        agent = get_agent()
     except Exception as e:
+        quota.release(user_id)
         return jsonify({"error": str(e)}), 500
 
+    question = data["question"]
+    # Return the DB connection to the pool while the agent runs
+    db.session.close()
+    span = start_question("query_stream", **{"user.id": user_id})
+    usage = UsageHandler()
+
+    def generate():
+        # Answers not served from the cache keep the question counted
+        charged = False
+        events = agent.stream(question)
+        try:
+            with trace.use_span(span, end_on_exit=True), track_usage(usage):
+                # Sent before the agent starts so the first byte arrives immediately
+                yield sse_event("start", {"question": question})
+                for event in events:
+                    event_type = event.pop("type")
+                    if event_type == "answer" and not event.get("cached"):
+                        charged = True
+                    yield sse_event(event_type, event)
+                yield sse_event("done", {})
+        finally:
+            # On a disconnect or error this stops the agent, and the tokens it
+            # already spent are charged; only a question that cost nothing is
+            # given back
+            if hasattr(events, "close"):
+                events.close()
+            if charged or usage.calls:
+                charge(user_id, usage)
+            else:
+                quota.release(user_id)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "X-Trace-Id": trace_id(span),
+        },
+    )
+
 
 @app.route("/examples", methods=["GET"])
 def get_examples():
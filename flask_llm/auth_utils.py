@@ -1,8 +1,84 @@
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
+from typing import Optional
 
 from flask import flash, redirect, request, url_for
 from flask_login import current_user
 from models import User, db
+from settings import settings
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+
+
+class UserCache:
+    """Per-worker cache of the users Flask-Login loads on every request.
+
+    A snapshot of the user's columns is kept for ``ttl`` seconds and merged
+    into the request's session without a query. Entries are dropped when
+    the user row is updated through the ORM in this worker (e.g.
+    ``last_login`` on login, ``is_active``) and on logout; changes made by
+    other workers are seen after at most ``ttl`` seconds.
+    """
+
+    def __init__(
+        self,
+        ttl: float = settings.USER_CACHE_TTL,
+        max_entries: int = settings.USER_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _snapshot(user: User) -> User:
+        copy = User(**{c.key: getattr(user, c.key) for c in User.__table__.columns})
+        make_transient_to_detached(copy)
+        return copy
+
+    def load(self, user_id: int) -> Optional[User]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                snapshot = entry[1]
+            else:
+                snapshot = None
+        if snapshot is not None:
+            return db.session.merge(snapshot, load=False)
+
+        user = db.session.get(User, user_id)
+        if user is not None and self.ttl > 0:
+            with self._lock:
+                self._entries[user_id] = (now + self.ttl, self._snapshot(user))
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+user_cache = UserCache()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, user):
+    user_cache.invalidate(user.id)
 
 
 def login_required_redirect(f):
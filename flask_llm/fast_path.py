@@ -0,0 +1,133 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple
+
+from langchain_core.tools import BaseTool
+
+# Optional leading verb and articles shared by the listing patterns
+_LIST = r"(?:(?:find|show(?: me)?|list|get|search for) )?(?:all )?(?:the )?"
+
+
+@dataclass(frozen=True)
+class Route:
+    """A question shape answered by one tool call and a template.
+
+    Named groups of the patterns become the tool arguments and are also
+    available to ``template`` next to ``{result}``.
+    """
+
+    tool: str
+    patterns: Tuple[Pattern, ...]
+    template: str
+
+
+def _patterns(*patterns: str) -> Tuple[Pattern, ...]:
+    return tuple(re.compile(pattern, re.IGNORECASE) for pattern in patterns)
+
+
+ROUTES = (
+    Route(
+        tool="active_contracts",
+        patterns=_patterns(
+            r"(?:what|which) (?:contracts are|are the) (?:currently )?active"
+            r"(?: contracts)?",
+            _LIST + r"(?:currently )?active contracts",
+        ),
+        template="Currently active contracts:\n\n{result}",
+    ),
+    Route(
+        tool="item_search",
+        patterns=_patterns(
+            _LIST + r"(?:items|products|machines|models) (?:from|by|of) (?:the )?"
+            r"(?P<brand>[\w&.-]+)(?: brand)?",
+            _LIST + r"(?P<brand>[\w&.-]+) brand (?:items|products|machines|models)",
+        ),
+        template="Items from {brand}:\n\n{result}",
+    ),
+    Route(
+        tool="invoice_search",
+        patterns=_patterns(
+            _LIST + r"invoices (?:for|of|from) (?:customer )?(?P<customer_name>.+)"
+        ),
+        template="Invoices for {customer_name}:\n\n{result}",
+    ),
+    Route(
+        tool="customer_search",
+        patterns=_patterns(
+            r"(?:find|search for|look up|show(?: me)?) (?:the )?customers? "
+            r"(?:named |called )?(?P<customer_name>.+)"
+        ),
+        template='Customers matching "{customer_name}":\n\n{result}',
+    ),
+    Route(
+        tool="service_history",
+        patterns=_patterns(_LIST + r"(?:recent )?service (?:history|records)"),
+        template="Recent service records:\n\n{result}",
+    ),
+    Route(
+        tool="serial_lookup",
+        patterns=_patterns(_LIST + r"serial numbers"),
+        template="Serial numbers:\n\n{result}",
+    ),
+)
+
+SUMMARY_PROMPT = """Answer the question using only the data below. Be concise.
+
+Question: {question}
+
+Data from {tool}:
+{result}"""
+
+
+class FastPathRouter:
+    """Answers common single-lookup questions without the agent.
+
+    A question matching one of ``routes`` (the whole question, ignoring case,
+    spacing and trailing punctuation) is answered by calling its tool
+    directly and filling in the route's template, or with one summarising
+    call to ``llm`` when given. Anything else, and any lookup that errors or
+    finds nothing, returns None so that the caller falls back to the agent.
+    """
+
+    def __init__(
+        self,
+        tools: List[BaseTool],
+        routes: Sequence[Route] = ROUTES,
+        llm=None,
+    ):
+        self.tools = {tool.name: tool for tool in tools}
+        self.routes = [route for route in routes if route.tool in self.tools]
+        self.llm = llm
+
+    def match(self, question: str) -> Optional[Tuple[Route, Dict[str, str]]]:
+        text = " ".join(question.split()).rstrip("?.! ")
+        for route in self.routes:
+            for pattern in route.patterns:
+                matched = pattern.fullmatch(text)
+                if matched:
+                    args = {k: v.strip() for k, v in matched.groupdict().items() if v}
+                    return route, args
+        return None
+
+    def answer(self, question: str, callbacks=None) -> Optional[str]:
+        matched = self.match(question)
+        if matched is None:
+            return None
+        route, args = matched
+        try:
+            result = self.tools[route.tool].invoke(
+                args, config={"callbacks": callbacks}
+            )
+        except Exception:
+            return None
+        if not result or result.startswith("Error") or result in ("No results.", "[]"):
+            return None
+        if self.llm is not None:
+            try:
+                prompt = SUMMARY_PROMPT.format(
+                    question=question, tool=route.tool, result=result
+                )
+                return self.llm.invoke(prompt, config={"callbacks": callbacks}).content
+            except Exception:
+                pass
+        return route.template.format(result=result, **args)
@@ -1,8 +1,41 @@
 import multiprocessing
 import os
+import shutil
+import tempfile
 
-# Calculate workers based on CPU cores: (2 * CPU cores) + 1
-workers = (2 * multiprocessing.cpu_count()) + 1
+# Workers write Prometheus samples to files in this directory and /metrics
+# adds them up; must be set before the app (and prometheus_client) is loaded
+metrics_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), "flask_llm_metrics"),
+)
+os.makedirs(metrics_dir, exist_ok=True)
+
+# Worker class: "sync" (one request per process) or "gevent" (cooperative,
+# hundreds of in-flight requests per process while they wait on Azure OpenAI
+# and the Django API)
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+
+if worker_class == "gevent":
+    # Patch before preload_app imports the app, so requests, the OpenAI
+    # client, threading and psycopg2 all yield to other greenlets while
+    # waiting on I/O.
+    from gevent import monkey
+
+    monkey.patch_all()
+
+    from psycogreen.gevent import patch_psycopg
+
+    patch_psycopg()
+
+# Calculate workers based on CPU cores: (2 * CPU cores) + 1 for sync workers;
+# gevent workers are not blocked by I/O, so one per core is enough
+default_workers = (
+    multiprocessing.cpu_count()
+    if worker_class == "gevent"
+    else (2 * multiprocessing.cpu_count()) + 1
+)
+workers = int(os.getenv("GUNICORN_WORKERS", default_workers))
 
 # Bind to all interfaces on port 5000
 bind = "0.0.0.0:5000"
@@ -10,9 +43,6 @@ bind = "0.0.0.0:5000"
 # Worker timeout
 timeout = 120
 
-# Worker class
-worker_class = "sync"
-
 # Maximum requests per worker before restart (helps prevent memory leaks)
 max_requests = 1000
 max_requests_jitter = 50
@@ -28,5 +58,70 @@ errorlog = "-"
 # Process naming
 proc_name = "flask_llm_gunicorn"
 
-# Worker processes will be restarted after this many requests
-worker_connections = 1000
+# Maximum concurrent requests per gevent worker
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+
+
+def serves_llm_app(server):
+    # The same config serves load_test.py's probe app, which has no agent
+    return getattr(server.app, "app_uri", None) == "app:app"
+
+
+def on_starting(server):
+    # Samples left by a previous run would be added to this one's. Runs after
+    # preload_app; workers open their own files once forked.
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def post_fork(server, worker):
+    # preload_app imports the app in the master; make sure each worker opens
+    # its own keep-alive connections to the Django API instead of sharing
+    # sockets inherited from the master.
+    import http_client
+
+    http_client.reset_client()
+
+    # Saturation is flask_llm_http_requests_in_progress over this
+    from metrics import WORKER_CAPACITY
+
+    WORKER_CAPACITY.set(worker_connections if worker_class == "gevent" else 1)
+
+    # Build the agent and open connections to Django and Azure OpenAI now,
+    # rather than on each worker's first question
+    if not serves_llm_app(server):
+        return
+    from app import warm_up
+
+    if warm_up():
+        server.log.info("Worker %s warmed up", worker.pid)
+    else:
+        server.log.warning("Worker %s failed to warm up", worker.pid)
+
+
+def worker_exit(server, worker):
+    # Send usage buffered by QUOTA_ENGINE=local before the worker goes away;
+    # anything not sent is picked up by the next flush on this host
+    if not serves_llm_app(server):
+        return
+    from app import app, quota, usage_log
+
+    try:
+        with app.app_context():
+            quota.flush()
+    except Exception as e:
+        server.log.warning("Worker %s could not flush quota usage: %s", worker.pid, e)
+    # Question usage rows still buffered in this worker are lost otherwise
+    try:
+        with app.app_context():
+            usage_log.flush()
+    except Exception as e:
+        server.log.warning(
+            "Worker %s could not write question usage: %s", worker.pid, e
+        )
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,352 @@
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from settings import settings
+from tracing import inject_headers
+from urllib3.util.retry import Retry
+
+# Bodies are stored decoded, so replayed responses must not claim an encoding
+_REPLAY_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def _cache_key(url: str, params=None) -> str:
+    return requests.Request("GET", url, params=params).prepare().url
+
+
+class ValidatorCache:
+    """ETag and body of recent responses, least recently used evicted first.
+
+    Shared by the sync and async clients, so a body fetched by either one can
+    answer a ``304`` received by the other.
+    """
+
+    def __init__(self, size: int = settings.DJANGO_API_VALIDATOR_CACHE_SIZE):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._entries))
+
+    def lookup(self, key: str):
+        with self._lock:
+            return self._entries.get(key)
+
+    def touch(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+    def store(self, key: str, status_code: int, response):
+        """Remember a 200 with an ETag, or forget the URL otherwise."""
+        etag = response.headers.get("ETag") if status_code == 200 else None
+        with self._lock:
+            if not etag:
+                self._entries.pop(key, None)
+                return
+            self._entries[key] = {
+                "etag": etag,
+                "content": response.content,
+                "headers": {
+                    name: value
+                    for name, value in response.headers.items()
+                    if name.lower() not in _REPLAY_DROP_HEADERS
+                },
+                "encoding": response.encoding,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def reset(self):
+        self._lock = threading.Lock()
+
+
+def _with_validator(kwargs: dict, cached) -> dict:
+    if cached is not None:
+        headers = dict(kwargs.get("headers") or {})
+        headers.setdefault("If-None-Match", cached["etag"])
+        kwargs["headers"] = headers
+    return kwargs
+
+
+def _with_trace(kwargs: dict) -> dict:
+    # Django continues the current trace from the traceparent header
+    headers = inject_headers(kwargs.get("headers"))
+    if headers:
+        kwargs["headers"] = headers
+    return kwargs
+
+
+class PooledHTTPClient:
+    """Keep-alive HTTP client shared by every tool in a worker process.
+
+    The underlying ``requests.Session`` is created lazily and re-created when
+    the process id changes, so a session built in the gunicorn master before
+    ``preload_app`` forks is never shared between workers.
+
+    Responses that carry an ``ETag`` are remembered (up to
+    ``validator_cache_size`` URLs). Repeat requests send ``If-None-Match``
+    and a ``304 Not Modified`` is answered from the stored body.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = settings.DJANGO_API_POOL_CONNECTIONS,
+        pool_maxsize: int = settings.DJANGO_API_POOL_MAXSIZE,
+        pool_block: bool = settings.DJANGO_API_POOL_BLOCK,
+        connect_timeout: float = settings.DJANGO_API_CONNECT_TIMEOUT,
+        read_timeout: float = settings.DJANGO_API_READ_TIMEOUT,
+        max_retries: int = settings.DJANGO_API_MAX_RETRIES,
+        validator_cache_size: int = settings.DJANGO_API_VALIDATOR_CACHE_SIZE,
+        validators: ValidatorCache = None,
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.validator_cache_size = validator_cache_size
+        self.validators = validators or ValidatorCache(validator_cache_size)
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        # pool_connections is the number of per-host pools kept alive and
+        # pool_maxsize the number of connections kept open to each host.
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+            max_retries=Retry(
+                total=self.max_retries,
+                connect=self.max_retries,
+                read=0,
+                backoff_factor=0.1,
+                allowed_methods=frozenset(["GET", "HEAD"]),
+            ),
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    @property
+    def session(self) -> requests.Session:
+        pid = os.getpid()
+        if self._session is None or self._pid != pid:
+            with self._lock:
+                if self._session is None or self._pid != pid:
+                    self._session = self._build_session()
+                    self._pid = pid
+        return self._session
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        kwargs = _with_trace(kwargs)
+        kwargs.setdefault("timeout", self.timeout)
+        if not self.validator_cache_size:
+            return self.session.get(url, **kwargs)
+
+        key = _cache_key(url, kwargs.get("params"))
+        cached = self.validators.lookup(key)
+        response = self.session.get(url, **_with_validator(kwargs, cached))
+        if response.status_code == 304 and cached is not None:
+            self.validators.touch(key)
+            return self._replay(cached, response)
+
+        self.validators.store(key, response.status_code, response)
+        return response
+
+    @staticmethod
+    def _replay(cached: dict, not_modified: requests.Response) -> requests.Response:
+        """Build the 200 response a 304 stands for from the stored body."""
+        response = requests.Response()
+        response.status_code = 200
+        response._content = cached["content"]
+        response.headers = CaseInsensitiveDict(cached["headers"])
+        response.encoding = cached["encoding"]
+        response.url = not_modified.url
+        response.request = not_modified.request
+        response.elapsed = not_modified.elapsed
+        return response
+
+    def close(self):
+        with self._lock:
+            if self._session is not None and self._pid == os.getpid():
+                self._session.close()
+            self._session = None
+            self._pid = None
+
+    def clear_validators(self):
+        self.validators.clear()
+
+    def reset(self):
+        """Drop the session without closing it (safe to call in a forked child)."""
+        self._lock = threading.Lock()
+        self.validators.reset()
+        self._session = None
+        self._pid = None
+
+
+class AsyncPooledHTTPClient:
+    """``httpx.AsyncClient`` counterpart of :class:`PooledHTTPClient`.
+
+    Used by the tools' ``_arun`` so ``AgentExecutor.ainvoke`` awaits the
+    Django API on the event loop instead of a thread. Each event loop gets its
+    own client, closed when ``asyncio.run`` finishes that loop (it cancels
+    the loop's remaining tasks, including the one that holds the client), so
+    one ``asyncio.run`` per request does not leave connections open. Clients
+    are rebuilt after a fork.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = settings.DJANGO_API_POOL_CONNECTIONS,
+        pool_maxsize: int = settings.DJANGO_API_POOL_MAXSIZE,
+        connect_timeout: float = settings.DJANGO_API_CONNECT_TIMEOUT,
+        read_timeout: float = settings.DJANGO_API_READ_TIMEOUT,
+        max_retries: int = settings.DJANGO_API_MAX_RETRIES,
+        validator_cache_size: int = settings.DJANGO_API_VALIDATOR_CACHE_SIZE,
+        validators: ValidatorCache = None,
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.validator_cache_size = validator_cache_size
+        self.validators = validators or ValidatorCache(validator_cache_size)
+        # event loop -> its client, and the task closing it when the loop's
+        # tasks end; both entries are removed by that task
+        self._clients = {}
+        self._closers = {}
+        self._pid = None
+
+    def _build_client(self) -> httpx.AsyncClient:
+        # Like the sync adapter: keep pool_maxsize connections per host alive
+        # and retry only failed connects, never a request that was sent.
+        limits = httpx.Limits(
+            max_connections=self.pool_connections * self.pool_maxsize,
+            max_keepalive_connections=self.pool_maxsize,
+        )
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            transport=httpx.AsyncHTTPTransport(limits=limits, retries=self.max_retries),
+        )
+
+    async def _close_with_loop(self, loop, client: httpx.AsyncClient):
+        try:
+            await asyncio.Event().wait()
+        finally:
+            if self._clients.get(loop) is client:
+                del self._clients[loop]
+                del self._closers[loop]
+            await client.aclose()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        pid, loop = os.getpid(), asyncio.get_running_loop()
+        if self._pid != pid:
+            self.reset()
+            self._pid = pid
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = self._build_client()
+            # The loop only holds a weak reference to its tasks
+            self._closers[loop] = loop.create_task(self._close_with_loop(loop, client))
+        return client
+
+    async def _loop_client(self) -> httpx.AsyncClient:
+        fresh = asyncio.get_running_loop() not in self._clients
+        client = self.client
+        if fresh:
+            # A task cancelled before it starts skips its finally, so let the
+            # closer start before the loop can end
+            await asyncio.sleep(0)
+        return client
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        kwargs = _with_trace(kwargs)
+        client = await self._loop_client()
+        if not self.validator_cache_size:
+            return await client.get(url, **kwargs)
+
+        key = _cache_key(url, kwargs.get("params"))
+        cached = self.validators.lookup(key)
+        response = await client.get(url, **_with_validator(kwargs, cached))
+        if response.status_code == 304 and cached is not None:
+            self.validators.touch(key)
+            return self._replay(cached, response)
+
+        self.validators.store(key, response.status_code, response)
+        return response
+
+    @staticmethod
+    def _replay(cached: dict, not_modified: httpx.Response) -> httpx.Response:
+        response = httpx.Response(
+            200,
+            content=cached["content"],
+            headers=cached["headers"],
+            request=not_modified.request,
+        )
+        if cached["encoding"]:
+            response.encoding = cached["encoding"]
+        return response
+
+    async def aclose(self):
+        """Close the running loop's client."""
+        loop = asyncio.get_running_loop()
+        if loop in self._clients and self._pid == os.getpid():
+            client = self._clients.pop(loop)
+            self._closers.pop(loop).cancel()
+            await client.aclose()
+
+    def reset(self):
+        """Drop the clients without closing them (safe in a forked child)."""
+        self._clients = {}
+        self._closers = {}
+        self._pid = None
+
+
+_client = PooledHTTPClient()
+_async_client = AsyncPooledHTTPClient(validators=_client.validators)
+
+
+def get_client() -> PooledHTTPClient:
+    return _client
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return _client.get(url, **kwargs)
+
+
+async def aget(url: str, **kwargs) -> httpx.Response:
+    return await _async_client.get(url, **kwargs)
+
+
+def get_async_client() -> AsyncPooledHTTPClient:
+    return _async_client
+
+
+def reset_client():
+    """Forget the inherited clients; called after gunicorn forks a worker."""
+    _client.reset()
+    _async_client.reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_client)
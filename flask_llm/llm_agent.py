@@ -1,3 +1,17 @@
+import asyncio
+import contextvars
+import hashlib
+import queue
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import openai
+from accounting import UsageHandler, question_usage
+from answer_cache import AnswerCache, data_version, normalize_question
 from api_tools import (
     ActiveContractsTool,
     CustomerContractsTool,
@@ -9,10 +23,236 @@ from api_tools import (
     SerialLookupTool,
     ServiceHistoryTool,
     WebSearchTool,
+    count_tokens,
 )
-from langchain.agents import AgentExecutor, create_openai_tools_agent
+from fast_path import FastPathRouter
+from langchain.agents import create_openai_tools_agent
 from langchain.prompts import ChatPromptTemplate
-from langchain_openai import AzureChatOpenAI
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
+from metrics import QUESTIONS, record_cache
+from opentelemetry import trace
+from parallel_executor import ParallelAgentExecutor
+from settings import settings
+from tool_cache import memoize_tools
+from tracing import LLMTracingHandler
+
+# Characters of each tool result included in streamed tool_end events
+TOOL_OUTPUT_PREVIEW = 500
+
+
+class StreamingEventHandler(BaseCallbackHandler):
+    """Forward tool calls and LLM tokens to ``emit`` as event dicts."""
+
+    def __init__(self, emit):
+        self.emit = emit
+        self.tool_names = {}
+
+    def on_llm_new_token(self, token: str, **kwargs):
+        # Tool-call chunks arrive as empty tokens
+        if token:
+            self.emit({"type": "token", "text": token})
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name")
+        self.tool_names[run_id] = name
+        self.emit({"type": "tool_start", "tool": name, "input": input_str})
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        output = getattr(output, "content", output)
+        self.emit(
+            {
+                "type": "tool_end",
+                "tool": self.tool_names.pop(run_id, None),
+                "output": str(output)[:TOOL_OUTPUT_PREVIEW],
+            }
+        )
+
+
+class StopHandler(BaseCallbackHandler):
+    """Abort the agent at its next LLM or tool call once ``stopped`` is set."""
+
+    raise_error = True
+
+    def __init__(self, stopped: threading.Event):
+        self.stopped = stopped
+
+    def _check(self):
+        if self.stopped.is_set():
+            raise RuntimeError("Question abandoned by the client")
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self._check()
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._check()
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        self._check()
+
+
+Embedder = Callable[[Sequence[str]], Sequence[Sequence[float]]]
+
+
+def _answered_by(source: str, usage: UsageHandler):
+    """Record whether a question was answered by a cache, the fast path or
+    the agent, on its trace, in the metrics and in its usage."""
+    trace.get_current_span().set_attribute("answer.source", source)
+    QUESTIONS.labels(source).inc()
+    usage.source = source
+
+
+def hashing_embedder(texts: Sequence[str], dimensions: int = 512) -> np.ndarray:
+    """Local embedder: signed feature hashing of words and character trigrams.
+
+    Needs no model or network and is deterministic, but only captures
+    wording overlap; use an embedding model for real paraphrases.
+    """
+    vectors = np.zeros((len(texts), dimensions), dtype=np.float32)
+    for row, text in enumerate(texts):
+        text = normalize_question(text)
+        padded = f" {text} "
+        features = text.split() + [padded[i : i + 3] for i in range(len(padded) - 2)]
+        for feature in features:
+            digest = hashlib.md5(feature.encode()).digest()
+            index = int.from_bytes(digest[:4], "little") % dimensions
+            vectors[row, index] += 1.0 if digest[4] & 1 else -1.0
+    return vectors
+
+
+# Words that never change what a question asks for. Negations, prepositions
+# of time and place, and single letters ("Company A") are deliberately absent.
+STOPWORDS = frozenset(
+    "an the is are was were be been being do does did can could would will "  # noqa: SIM905
+    "please me my our us i we you show list tell give get find what which "
+    "of for".split()
+)
+
+
+def key_terms(question: str) -> frozenset:
+    """Lowercased content words of a question, singular.
+
+    Questions about different customers, IDs or statuses ("active" vs
+    "inactive") embed almost identically, so a semantic match also requires
+    every word other than :data:`STOPWORDS` to be the same.
+    """
+    words = re.findall(r"[\w'-]+", question.lower())
+    return frozenset(
+        word[:-1] if len(word) > 3 and word.endswith("s") and word[-2] != "s" else word
+        for word in words
+        if word not in STOPWORDS
+    )
+
+
+class SemanticAnswerCache:
+    """Reuse the answer of a previously asked question with the same meaning.
+
+    Questions are embedded with ``embedder`` and kept, L2-normalised, in a
+    NumPy matrix. A question whose cosine similarity to a stored one is at
+    least ``threshold`` (and whose :func:`key_terms` match) gets its answer.
+    Entries expire after ``ttl`` seconds, are dropped when the data version
+    changes, and the least recently used are evicted beyond ``max_size``.
+    The index lives in the worker's memory.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder = hashing_embedder,
+        threshold: float = settings.SEMANTIC_CACHE_THRESHOLD,
+        max_size: int = settings.SEMANTIC_CACHE_MAX_SIZE,
+        ttl: float = settings.ANSWER_CACHE_TTL,
+    ):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version = None
+        self.vectors = None
+        self.entries: List[dict] = []
+        self._lock = threading.Lock()
+        # A missed question is embedded again when its answer is stored
+        self._embed = lru_cache(maxsize=64)(self._embed)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.embedder([question]), dtype=np.float32)[0]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _reset(self, version: str):
+        self.version = version
+        self.vectors = None
+        self.entries = []
+
+    def _drop(self, keep: np.ndarray):
+        self.entries = [e for e, kept in zip(self.entries, keep) if kept]
+        self.vectors = self.vectors[keep] if self.entries else None
+
+    def get(self, question: str, version: str) -> Optional[str]:
+        vector = self._embed(question)
+        now = time.time()
+        with self._lock:
+            if version != self.version:
+                self._reset(version)
+            if self.vectors is None:
+                return None
+            expired = np.array(
+                [e["created_at"] <= now - self.ttl for e in self.entries]
+            )
+            if expired.any():
+                self._drop(~expired)
+                if self.vectors is None:
+                    return None
+
+            scores = self.vectors @ vector
+            terms = key_terms(question)
+            for index in np.argsort(-scores):
+                if scores[index] < self.threshold:
+                    break
+                entry = self.entries[index]
+                if entry["terms"] == terms:
+                    entry["used_at"] = now
+                    return entry["answer"]
+        return None
+
+    def set(self, question: str, version: str, answer: str):
+        vector = self._embed(question)
+        now = time.time()
+        with self._lock:
+            if version != self.version:
+                self._reset(version)
+            entry = {
+                "question": question,
+                "answer": answer,
+                "terms": key_terms(question),
+                "created_at": now,
+                "used_at": now,
+            }
+            if self.vectors is None:
+                self.vectors = vector[np.newaxis, :]
+            else:
+                self.vectors = np.vstack([self.vectors, vector])
+            self.entries.append(entry)
+            if len(self.entries) > self.max_size:
+                used = np.array([e["used_at"] for e in self.entries])
+                keep = np.ones(len(self.entries), dtype=bool)
+                keep[np.argsort(used)[: len(self.entries) - self.max_size]] = False
+                self._drop(keep)
+
+
+def create_embedder(name: str = settings.SEMANTIC_CACHE_EMBEDDER) -> Embedder:
+    """``hashing`` (local) or ``azure`` (AZURE_OPENAI_EMBEDDING_DEPLOYMENT)."""
+    if name == "azure":
+        embeddings = AzureOpenAIEmbeddings(
+            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+            api_key=settings.AZURE_OPENAI_API_KEY,
+            api_version=settings.AZURE_OPENAI_API_VERSION,
+            azure_deployment=settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT,
+        )
+        return embeddings.embed_documents
+    return hashing_embedder
 
 
 class BusinessDataAgent:
@@ -31,7 +271,7 @@ class BusinessDataAgent:
             temperature=0,
         )
 
-        self.tools = [
+        tools = [
             CustomerSearchTool(),
             CustomerInvoicesTool(),
             CustomerContractsTool(),
@@ -43,6 +283,7 @@ class BusinessDataAgent:
             ServiceHistoryTool(),
             WebSearchTool(),
         ]
+        self.tools = memoize_tools(tools) if settings.TOOL_CACHE_ENABLED else tools
 
         self.prompt = ChatPromptTemplate.from_messages(
             [
@@ -76,16 +317,218 @@ class BusinessDataAgent:
         )
 
         self.agent = create_openai_tools_agent(self.llm, self.tools, self.prompt)
-        self.agent_executor = AgentExecutor(
+        self.agent_executor = ParallelAgentExecutor(
             agent=self.agent, tools=self.tools, verbose=True, handle_parsing_errors=True
         )
+        self._streaming_executor = None
+        self.answer_cache: Optional[AnswerCache] = None
+        self.semantic_cache: Optional[SemanticAnswerCache] = None
+        self.fast_path: Optional[FastPathRouter] = None
+
+    def cached_answer(self, question: str) -> Tuple[Optional[str], Optional[str]]:
+        """Return ``(cached answer or None, data version)`` for ``question``.
+
+        The exact-match cache is tried first, then the semantic one. The
+        version is None when caching is off or the API is unreachable, in
+        which case the answer must not be stored either.
+        """
+        caches = [
+            (name, cache)
+            for name, cache in (
+                ("answer", self.answer_cache),
+                ("semantic", self.semantic_cache),
+            )
+            if cache is not None
+        ]
+        if not caches:
+            return None, None
+        version = data_version()
+        if version is None:
+            return None, None
+        for name, cache in caches:
+            answer = cache.get(question, version)
+            record_cache(name, hit=answer is not None)
+            if answer is not None:
+                return answer, version
+        return None, version
+
+    def store_answer(self, question: str, version: Optional[str], answer: str):
+        if version is None:
+            return
+        for cache in (self.answer_cache, self.semantic_cache):
+            if cache is not None:
+                cache.set(question, version, answer)
+
+    def answer(self, question: str) -> Tuple[str, bool]:
+        """Answer ``question``, returning ``(answer, served from cache)``.
+
+        LLM calls are recorded in the handler of the caller's
+        :func:`accounting.track_usage` block, if any.
+        """
+        usage = question_usage()
+        cached, version = self.cached_answer(question)
+        if cached is not None:
+            _answered_by("cache", usage)
+            return cached, True
+        if self.fast_path is not None:
+            answer = self.fast_path.answer(question, callbacks=[usage])
+            if answer is not None:
+                _answered_by("fast_path", usage)
+                self.store_answer(question, version, answer)
+                return answer, False
+        _answered_by("agent", usage)
+        try:
+            result = self.agent_executor.invoke(
+                {"input": question},
+                config={"callbacks": [LLMTracingHandler(), usage]},
+            )
+        except Exception as e:
+            return f"Error processing query: {str(e)}", False
+        finally:
+            usage.observe()
+        self.store_answer(question, version, result["output"])
+        return result["output"], False
 
     def query(self, question: str) -> str:
+        return self.answer(question)[0]
+
+    async def aanswer(self, question: str) -> Tuple[str, bool]:
+        """Async :meth:`answer`, through the same caches and fast path.
+
+        Those blocking lookups run in a thread; the agent's tools run natively
+        via their ``_arun``, so tool calls the model emits in one step are
+        awaited concurrently.
+        """
+        usage = question_usage()
+        cached, version = await asyncio.to_thread(self.cached_answer, question)
+        if cached is not None:
+            _answered_by("cache", usage)
+            return cached, True
+        if self.fast_path is not None:
+            answer = await asyncio.to_thread(
+                self.fast_path.answer, question, callbacks=[usage]
+            )
+            if answer is not None:
+                _answered_by("fast_path", usage)
+                await asyncio.to_thread(self.store_answer, question, version, answer)
+                return answer, False
+        _answered_by("agent", usage)
         try:
-            result = self.agent_executor.invoke({"input": question})
-            return result["output"]
+            result = await self.agent_executor.ainvoke(
+                {"input": question},
+                config={"callbacks": [LLMTracingHandler(), usage]},
+            )
         except Exception as e:
-            return f"Error processing query: {str(e)}"
+            return f"Error processing query: {str(e)}", False
+        finally:
+            usage.observe()
+        await asyncio.to_thread(self.store_answer, question, version, result["output"])
+        return result["output"], False
+
+    async def aquery(self, question: str) -> str:
+        return (await self.aanswer(question))[0]
+
+    def warm_up(self) -> Dict[str, str]:
+        """Do the one-off work the first question would otherwise pay for.
+
+        Builds the streaming executor (converting the tool schemas again for
+        the streaming LLM), loads the tokenizer and opens pooled connections
+        to the Django API and the LLM endpoint. Returns a status per
+        connection; failures are reported, not raised.
+        """
+        _ = self.streaming_executor
+        count_tokens("")
+        checks = {"django_api": "ok" if data_version() is not None else "unreachable"}
+        try:
+            # Listing models costs no tokens; any HTTP answer leaves an open
+            # TLS connection in the client's pool
+            self.llm.root_client.with_options(timeout=5, max_retries=0).models.list()
+            checks["llm"] = "ok"
+        except openai.APIStatusError:
+            checks["llm"] = "ok"
+        except Exception as e:
+            checks["llm"] = f"unreachable: {e}"
+        return checks
+
+    @property
+    def streaming_executor(self) -> ParallelAgentExecutor:
+        """Executor whose LLM streams tokens, built on first use."""
+        if self._streaming_executor is None:
+            # Without stream_usage, streamed calls report no token usage
+            llm = self.llm.model_copy(update={"streaming": True, "stream_usage": True})
+            agent = create_openai_tools_agent(llm, self.tools, self.prompt)
+            self._streaming_executor = ParallelAgentExecutor(
+                agent=agent, tools=self.tools, handle_parsing_errors=True
+            )
+        return self._streaming_executor
+
+    def stream(self, question: str) -> Iterator[dict]:
+        """Yield tool and token events while the agent runs, then the answer.
+
+        Events are dicts with a ``type`` of ``tool_start``, ``tool_end``,
+        ``token``, ``answer`` or ``error``. The agent runs in a background
+        thread (a greenlet under gevent) and reports through callbacks; closing
+        the generator early stops it before its next LLM or tool call. A
+        cached answer is yielded alone, with ``cached`` set; a fast-path
+        answer follows the events of its single tool call.
+        """
+        usage = question_usage()
+        cached, version = self.cached_answer(question)
+        if cached is not None:
+            _answered_by("cache", usage)
+            yield {"type": "answer", "answer": cached, "cached": True}
+            return
+        if self.fast_path is not None:
+            tool_events = []
+            answer = self.fast_path.answer(
+                question,
+                callbacks=[StreamingEventHandler(tool_events.append), usage],
+            )
+            if answer is not None:
+                _answered_by("fast_path", usage)
+                self.store_answer(question, version, answer)
+                yield from tool_events
+                yield {"type": "answer", "answer": answer}
+                return
+
+        _answered_by("agent", usage)
+        events = queue.Queue()
+        stopped = threading.Event()
+        callbacks = [
+            StreamingEventHandler(events.put),
+            LLMTracingHandler(),
+            usage,
+            StopHandler(stopped),
+        ]
+
+        def run():
+            try:
+                result = self.streaming_executor.invoke(
+                    {"input": question}, config={"callbacks": callbacks}
+                )
+                self.store_answer(question, version, result["output"])
+                events.put({"type": "answer", "answer": result["output"]})
+            except Exception as e:
+                events.put(
+                    {"type": "error", "error": f"Error processing query: {str(e)}"}
+                )
+            finally:
+                usage.observe()
+                events.put(None)
+
+        # The copied context keeps tool spans under the question's trace
+        worker = threading.Thread(
+            target=contextvars.copy_context().run, args=(run,), daemon=True
+        )
+        worker.start()
+        try:
+            while (event := events.get()) is not None:
+                yield event
+        finally:
+            # If the caller stopped reading, end the agent at its next call and
+            # wait for the one in flight, so ``usage`` holds every token spent
+            stopped.set()
+            worker.join()
 
 
 def create_agent(
@@ -94,4 +537,13 @@ def create_agent(
     deployment_name: str,
     api_version: str = "2024-02-15-preview",
 ) -> BusinessDataAgent:
-    return BusinessDataAgent(api_key, azure_endpoint, deployment_name, api_version)
+    agent = BusinessDataAgent(api_key, azure_endpoint, deployment_name, api_version)
+    if settings.ANSWER_CACHE_ENABLED:
+        agent.answer_cache = AnswerCache()
+    if settings.SEMANTIC_CACHE_ENABLED:
+        agent.semantic_cache = SemanticAnswerCache(embedder=create_embedder())
+    if settings.FAST_PATH_ENABLED:
+        agent.fast_path = FastPathRouter(
+            agent.tools, llm=agent.llm if settings.FAST_PATH_SUMMARIZE else None
+        )
+    return agent
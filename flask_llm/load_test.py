@@ -0,0 +1,168 @@
+"""
+Load test comparing sync and gevent gunicorn workers on I/O-bound requests.
+
+Starts a stand-in upstream that answers after --latency seconds (like Azure
+OpenAI or the Django API), then serves a probe app through gunicorn.conf.py
+once per worker class and fires --requests requests with --concurrency
+clients at it. Each probe request makes one upstream call through the pooled
+http_client, so the numbers show how many slow calls a worker can keep in
+flight. No database or API keys are needed.
+
+    python load_test.py --workers 2 --concurrency 100 --latency 0.5
+"""
+
+import argparse
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def create_probe_app():
+    """Flask app whose only route waits on one upstream call."""
+    import http_client
+    from flask import Flask, jsonify
+
+    probe = Flask(__name__)
+    upstream = os.environ["LOAD_TEST_UPSTREAM"]
+
+    @probe.route("/probe")
+    def probe_route():
+        response = http_client.get(upstream)
+        return jsonify({"status": response.status_code})
+
+    return probe
+
+
+def start_upstream(latency):
+    class SlowHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            body = b'{"ok": true}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def wait_until_ready(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=5)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"gunicorn did not start serving {url}")
+
+
+def run(worker_class, args, upstream_url):
+    port = args.port
+    env = dict(
+        os.environ,
+        GUNICORN_WORKER_CLASS=worker_class,
+        LOAD_TEST_UPSTREAM=upstream_url,
+        DJANGO_API_POOL_MAXSIZE=str(args.concurrency),
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "-c",
+            "gunicorn.conf.py",
+            "--bind",
+            f"127.0.0.1:{port}",
+            "--workers",
+            str(args.workers),
+            "--access-logfile",
+            "/dev/null",
+            "--log-level",
+            "warning",
+            "load_test:create_probe_app()",
+        ],
+        cwd=HERE,
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}/probe"
+    try:
+        wait_until_ready(url)
+
+        def timed(_):
+            started = time.perf_counter()
+            try:
+                ok = requests.get(url, timeout=args.timeout).status_code == 200
+            except requests.RequestException:
+                ok = False
+            return time.perf_counter() - started, ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(timed, range(args.requests)))
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    timings = [t * 1000 for t, ok in results if ok]
+    return {
+        "worker_class": worker_class,
+        "ok": len(timings),
+        "errors": len(results) - len(timings),
+        "rps": round(len(timings) / elapsed, 1),
+        "p50_ms": round(percentile(timings, 50), 1) if timings else None,
+        "p95_ms": round(percentile(timings, 95), 1) if timings else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--worker-class", nargs="+", default=["sync", "gevent"])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args(argv)
+
+    upstream = start_upstream(args.latency)
+    upstream_url = f"http://127.0.0.1:{upstream.server_address[1]}/"
+    try:
+        for worker_class in args.worker_class:
+            result = run(worker_class, args, upstream_url)
+            print(
+                f"{result['worker_class']:8} {result['rps']:8.1f} req/s  "
+                f"p50 {result['p50_ms']}ms  p95 {result['p95_ms']}ms  "
+                f"{result['ok']} ok, {result['errors']} errors"
+            )
+    finally:
+        upstream.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
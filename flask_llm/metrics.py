@@ -0,0 +1,180 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Tuple
+
+from flask import Flask, g, has_request_context, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Under gunicorn, PROMETHEUS_MULTIPROC_DIR is set by gunicorn.conf.py before
+# this module is imported, so every worker writes its samples to files there
+# and /metrics adds them up.
+
+REQUEST_DURATION = Histogram(
+    "flask_llm_http_request_duration_seconds",
+    "Time to handle a request (streamed responses until the last event)",
+    ["method", "route", "status"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "flask_llm_http_requests_in_progress",
+    "Requests being handled",
+    multiprocess_mode="livesum",
+)
+WORKER_CAPACITY = Gauge(
+    "flask_llm_worker_capacity",
+    "Requests the running workers can handle at once",
+    multiprocess_mode="livesum",
+)
+QUESTIONS = Counter(
+    "flask_llm_questions",
+    "Questions answered, by source (cache, fast_path or agent)",
+    ["source"],
+)
+AGENT_ITERATIONS = Histogram(
+    "flask_llm_agent_iterations",
+    "LLM calls the agent made to answer one question",
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15),
+)
+QUESTION_TOKENS = Histogram(
+    "flask_llm_question_tokens",
+    "LLM tokens used to answer one question, by kind (prompt or completion)",
+    ["kind"],
+    buckets=(100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000),
+)
+TOOL_CALLS = Counter(
+    "flask_llm_tool_calls",
+    "Tool calls that reached their backend, by outcome (ok, error, exception)",
+    ["tool", "outcome"],
+)
+TOOL_DURATION = Histogram(
+    "flask_llm_tool_call_duration_seconds",
+    "Time a tool call took, including its Django API requests",
+    ["tool"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+CACHE_REQUESTS = Counter(
+    "flask_llm_cache_requests",
+    "Lookups in the answer, semantic and tool result caches",
+    ["cache", "result"],
+)
+DB_QUERIES = Counter(
+    "flask_llm_db_queries",
+    "SQL statements sent to PostgreSQL, by route",
+    ["route"],
+)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+class ToolTimer:
+    """Outcome of one tool call; ``done`` marks results starting "Error"."""
+
+    def __init__(self):
+        self.outcome = "exception"
+
+    def done(self, result: str) -> str:
+        self.outcome = "error" if result.startswith("Error") else "ok"
+        return result
+
+
+@contextmanager
+def tool_timer(tool: str) -> Iterator[ToolTimer]:
+    timer = ToolTimer()
+    start = time.perf_counter()
+    try:
+        yield timer
+    finally:
+        TOOL_DURATION.labels(tool).observe(time.perf_counter() - start)
+        TOOL_CALLS.labels(tool, timer.outcome).inc()
+
+
+def token_usage(response) -> Tuple[int, int]:
+    """``(prompt, completion)`` tokens of an LLMResult, 0 when not reported."""
+    usage = (response.llm_output or {}).get("token_usage")
+    if usage:
+        return usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0
+    # Streamed responses report usage on the message, if at all
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(
+                getattr(generation, "message", None), "usage_metadata", None
+            )
+            if metadata:
+                prompt += metadata.get("input_tokens", 0)
+                completion += metadata.get("output_tokens", 0)
+    return prompt, completion
+
+
+def observe_question(iterations: int, prompt_tokens: int, completion_tokens: int):
+    """Record the LLM calls and tokens the agent used for one question."""
+    AGENT_ITERATIONS.observe(iterations)
+    QUESTION_TOKENS.labels("prompt").observe(prompt_tokens)
+    QUESTION_TOKENS.labels("completion").observe(completion_tokens)
+
+
+def _route() -> str:
+    rule = request.url_rule
+    return rule.rule if rule is not None else "unmatched"
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    DB_QUERIES.labels(_route() if has_request_context() else "none").inc()
+
+
+def _start_request():
+    REQUESTS_IN_PROGRESS.inc()
+    g.metrics_start = time.perf_counter()
+
+
+def _record_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+
+def _finish_request(exc=None):
+    start = g.pop("metrics_start", None)
+    if start is None:
+        return
+    REQUESTS_IN_PROGRESS.dec()
+    status = g.pop("metrics_status", 500)
+    REQUEST_DURATION.labels(request.method, _route(), status).observe(
+        time.perf_counter() - start
+    )
+
+
+def init_app(app: Flask):
+    """Time every request of ``app`` and count its SQL statements.
+
+    Teardown runs after a streamed response's last event, so SSE requests
+    are timed in full.
+    """
+    app.before_request(_start_request)
+    app.after_request(_record_status)
+    app.teardown_request(_finish_request)
+    if not event.contains(Engine, "before_cursor_execute", _count_query):
+        event.listen(Engine, "before_cursor_execute", _count_query)
+
+
+def metrics_response():
+    """Body and content type of /metrics, across all workers."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
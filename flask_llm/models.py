@@ -1,12 +1,20 @@
 from datetime import datetime
+from typing import Dict, Optional, Tuple
 
 from flask_login import UserMixin
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects import postgresql, sqlite
 from werkzeug.security import check_password_hash, generate_password_hash
 
 db = SQLAlchemy()
 
 
+def _insert(model):
+    """INSERT supporting ON CONFLICT on PostgreSQL and SQLite (in tests)."""
+    dialect = postgresql if db.engine.dialect.name == "postgresql" else sqlite
+    return dialect.insert(model)
+
+
 class User(UserMixin, db.Model):
     __tablename__ = "users"
 
@@ -42,6 +50,8 @@ class Counter(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
     date = db.Column(db.Date, default=datetime.utcnow().date, nullable=False)
     count = db.Column(db.Integer, default=0, nullable=False)
+    # LLM tokens used by today's questions
+    tokens = db.Column(db.Integer, default=0, nullable=False)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -49,17 +59,160 @@ class Counter(db.Model):
     user = db.relationship("User", backref=db.backref("counter", uselist=False))
 
     @classmethod
-    def increment(cls, user_id: int):
-        today = datetime.utcnow().date()
-        counter = cls.query.filter_by(user_id=user_id, date=today).first()
+    def increment(
+        cls,
+        user_id: int,
+        limit: Optional[int] = None,
+        token_limit: Optional[int] = None,
+    ) -> Optional[int]:
+        """Count one query for today and return the new count.
+
+        A single INSERT ... ON CONFLICT DO UPDATE ... RETURNING, so concurrent
+        workers neither race on ``uq_user_date_counter`` nor overshoot
+        ``limit``: once today's count has reached it, or today's tokens have
+        reached ``token_limit``, nothing is changed and None is returned.
+        """
+        if (limit is not None and limit < 1) or (
+            token_limit is not None and token_limit < 1
+        ):
+            return None
+        conditions = []
+        if limit is not None:
+            conditions.append(cls.count < limit)
+        if token_limit is not None:
+            conditions.append(cls.tokens < token_limit)
+        now = datetime.utcnow()
+        statement = _insert(cls).values(
+            user_id=user_id,
+            date=now.date(),
+            count=1,
+            tokens=0,
+            created_at=now,
+            updated_at=now,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[cls.user_id, cls.date],
+            set_={"count": cls.count + 1, "updated_at": now},
+            where=db.and_(*conditions) if conditions else None,
+        ).returning(cls.count)
+        count = db.session.execute(statement).scalar()
+        db.session.commit()
+        return count
 
-        if not counter:
-            counter = cls(user_id=user_id, date=today, count=1)
-            db.session.add(counter)
-        else:
-            counter.count += 1
-            counter.updated_at = datetime.utcnow()
+    @classmethod
+    def release(cls, user_id: int):
+        """Give back a query counted by :meth:`increment` that was not charged."""
+        cls.query.filter(
+            cls.user_id == user_id,
+            cls.date == datetime.utcnow().date(),
+            cls.count > 0,
+        ).update(
+            {"count": cls.count - 1, "updated_at": datetime.utcnow()},
+            synchronize_session=False,
+        )
+        db.session.commit()
 
+    @classmethod
+    def add_tokens(cls, user_id: int, tokens: int):
+        """Add the LLM tokens of an answered question to today's counter."""
+        now = datetime.utcnow()
+        statement = _insert(cls).values(
+            user_id=user_id,
+            date=now.date(),
+            count=0,
+            tokens=tokens,
+            created_at=now,
+            updated_at=now,
+        )
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[cls.user_id, cls.date],
+                set_={"tokens": cls.tokens + tokens, "updated_at": now},
+            )
+        )
+        db.session.commit()
+
+    @classmethod
+    def apply_deltas(
+        cls, source: str, batch: int, deltas: Dict[Tuple, Tuple[int, int]]
+    ) -> bool:
+        """Add ``{(user_id, date): (count, tokens)}`` to the counters as
+        ``batch`` of ``source``.
+
+        The batch number is recorded in the same transaction, so a batch that
+        was already applied (its sender crashed before noting that) is
+        skipped and False is returned.
+        """
+        db.session.execute(
+            _insert(QuotaFlush)
+            .values(source=source, batch=0, flushed_at=datetime.utcnow())
+            .on_conflict_do_nothing()
+        )
+        flushed = db.session.execute(
+            db.select(QuotaFlush).filter_by(source=source).with_for_update()
+        ).scalar_one()
+        if flushed.batch >= batch:
+            db.session.rollback()
+            return False
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                "user_id": user_id,
+                "date": day,
+                "count": count,
+                "tokens": tokens,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for (user_id, day), (count, tokens) in deltas.items()
+            if count or tokens
+        ]
+        if rows:
+            statement = _insert(cls).values(rows)
+            db.session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[cls.user_id, cls.date],
+                    set_={
+                        "count": cls.count + statement.excluded.count,
+                        "tokens": cls.tokens + statement.excluded.tokens,
+                        "updated_at": now,
+                    },
+                )
+            )
+        flushed.batch = batch
+        flushed.flushed_at = now
         db.session.commit()
-        return counter
+        return True
 
+
+class QuotaFlush(db.Model):
+    """Last batch of usage deltas applied from each local quota store."""
+
+    __tablename__ = "quota_flushes"
+
+    source = db.Column(db.String(255), primary_key=True)
+    batch = db.Column(db.Integer, default=0, nullable=False)
+    flushed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class QuestionUsage(db.Model):
+    """LLM calls, tokens, latency and cost of one answered question."""
+
+    __tablename__ = "question_usage"
+    __table_args__ = (
+        db.Index("ix_question_usage_user_id_created_at", "user_id", "created_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    # "agent" or "fast_path"; cached answers cost nothing and are not recorded
+    source = db.Column(db.String(20), nullable=False)
+    llm_calls = db.Column(db.Integer, default=0, nullable=False)
+    prompt_tokens = db.Column(db.Integer, default=0, nullable=False)
+    completion_tokens = db.Column(db.Integer, default=0, nullable=False)
+    # Sum of the LLM calls' latency; ``calls`` has each call's
+    latency_ms = db.Column(db.Integer, default=0, nullable=False)
+    cost = db.Column(db.Numeric(12, 6), default=0, nullable=False)
+    calls = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
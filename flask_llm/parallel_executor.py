@@ -0,0 +1,151 @@
+import asyncio
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, Iterator, Optional, Union
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentFinish, AgentStep
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForChainRun,
+    CallbackManagerForChainRun,
+)
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from langchain_core.tools import BaseTool
+from settings import settings
+
+
+class _StepBatch(dict):
+    """Tool map handed to one agent step, carrying that step's tool calls.
+
+    AgentExecutor yields every action of a step before performing the first
+    one, so by the first ``_perform_agent_action`` call the batch is complete
+    and all of it can be submitted at once.
+    """
+
+    def __init__(self, tools):
+        super().__init__(tools)
+        self.actions = []
+        self.futures = None
+        self.deadlines = None
+        self.pool = None
+        self.performed = 0
+
+    def close(self):
+        if self.pool is not None:
+            for future in self.futures:
+                future.cancel()
+            self.pool.shutdown(wait=False)
+
+
+class ParallelAgentExecutor(AgentExecutor):
+    """AgentExecutor that runs the tool calls of one step concurrently.
+
+    The OpenAI tools agent often asks for several independent lookups at once
+    (invoices, contracts and services of one customer). They run on at most
+    ``max_concurrency`` threads, so the step takes as long as its slowest
+    call instead of their sum. A call still running after its timeout,
+    counted from when the step's calls are dispatched, is reported to the
+    agent as an error and left to finish in the background.
+
+    ``ainvoke`` already gathers the calls of a step; the timeouts apply there
+    too.
+    """
+
+    max_concurrency: int = settings.AGENT_TOOL_CONCURRENCY
+    tool_timeout: Optional[float] = settings.AGENT_TOOL_TIMEOUT
+    tool_timeouts: Dict[str, float] = settings.AGENT_TOOL_TIMEOUTS
+
+    def timeout_for(self, tool_name: str) -> Optional[float]:
+        return self.tool_timeouts.get(tool_name, self.tool_timeout)
+
+    @staticmethod
+    def _timed_out(agent_action: AgentAction, timeout: float) -> AgentStep:
+        return AgentStep(
+            action=agent_action,
+            observation=(
+                f"Error: {agent_action.tool} did not respond within {timeout:g} "
+                "seconds. Answer with the other results or try a narrower query."
+            ),
+        )
+
+    def _iter_next_step(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        inputs: Dict[str, str],
+        intermediate_steps: list,
+        run_manager: Optional[CallbackManagerForChainRun] = None,
+    ) -> Iterator[Union[AgentFinish, AgentAction, AgentStep]]:
+        batch = _StepBatch(name_to_tool_map)
+        try:
+            for step in super()._iter_next_step(
+                batch, color_mapping, inputs, intermediate_steps, run_manager
+            ):
+                if isinstance(step, AgentAction):
+                    batch.actions.append(step)
+                yield step
+        finally:
+            batch.close()
+
+    def _perform_agent_action(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        agent_action: AgentAction,
+        run_manager: Optional[CallbackManagerForChainRun] = None,
+    ) -> AgentStep:
+        batch = name_to_tool_map
+        if not isinstance(batch, _StepBatch) or self.max_concurrency < 1:
+            return super()._perform_agent_action(
+                name_to_tool_map, color_mapping, agent_action, run_manager
+            )
+
+        if batch.pool is None:
+            batch.pool = ContextThreadPoolExecutor(
+                max_workers=min(self.max_concurrency, len(batch.actions))
+            )
+            perform = super()._perform_agent_action
+            started = time.monotonic()
+            batch.futures = [
+                batch.pool.submit(
+                    perform,
+                    dict(batch),
+                    color_mapping,
+                    action,
+                    run_manager,
+                )
+                for action in batch.actions
+            ]
+            batch.deadlines = [
+                (self.timeout_for(action.tool), started) for action in batch.actions
+            ]
+
+        # Steps are returned in the order the agent asked for them
+        index = batch.performed
+        batch.performed += 1
+        timeout, started = batch.deadlines[index]
+        remaining = None
+        if timeout is not None:
+            remaining = max(0.0, started + timeout - time.monotonic())
+        try:
+            return batch.futures[index].result(timeout=remaining)
+        except FutureTimeoutError:
+            return self._timed_out(agent_action, timeout)
+
+    async def _aperform_agent_action(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        agent_action: AgentAction,
+        run_manager: Optional[AsyncCallbackManagerForChainRun] = None,
+    ) -> AgentStep:
+        timeout = self.timeout_for(agent_action.tool)
+        try:
+            return await asyncio.wait_for(
+                super()._aperform_agent_action(
+                    name_to_tool_map, color_mapping, agent_action, run_manager
+                ),
+                timeout,
+            )
+        except asyncio.TimeoutError:
+            return self._timed_out(agent_action, timeout)
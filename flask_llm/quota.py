@@ -0,0 +1,335 @@
+import contextlib
+import os
+import socket
+import sqlite3
+import time
+from datetime import date, datetime
+from typing import Optional, Tuple
+
+from models import Counter, QuotaFlush, db
+from settings import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    user_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    pending INTEGER NOT NULL DEFAULT 0,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    pending_tokens INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, date)
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    batch INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    delta INTEGER NOT NULL,
+    tokens INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# Columns added since the first version of the store, for existing files
+ADDED_COLUMNS = (
+    ("usage", "tokens"),
+    ("usage", "pending_tokens"),
+    ("outbox", "tokens"),
+)
+
+
+def _today() -> str:
+    return datetime.utcnow().date().isoformat()
+
+
+class DatabaseQuota:
+    """Daily question quota kept directly in the ``counters`` table.
+
+    ``limit`` caps today's questions and ``token_limit`` today's LLM tokens;
+    either may be None.
+    """
+
+    def __init__(
+        self,
+        limit: Optional[int] = settings.DAILY_QUERY_LIMIT,
+        token_limit: Optional[int] = None,
+    ):
+        self.limit = limit
+        self.token_limit = token_limit
+
+    def reserve(self, user_id: int) -> Optional[int]:
+        """Count a question; returns the new count, or None over the limit."""
+        return Counter.increment(
+            user_id, limit=self.limit, token_limit=self.token_limit
+        )
+
+    def release(self, user_id: int):
+        Counter.release(user_id)
+
+    def charge(self, user_id: int, tokens: int):
+        """Add the LLM tokens an answered question used."""
+        Counter.add_tokens(user_id, tokens)
+
+    def today(self, user_id: int) -> Tuple[int, int]:
+        """Today's question count and LLM tokens, read from one row."""
+        row = (
+            db.session.query(Counter.count, Counter.tokens)
+            .filter_by(user_id=user_id, date=datetime.utcnow().date())
+            .first()
+        )
+        return tuple(row) if row else (0, 0)
+
+    def usage(self, user_id: int) -> int:
+        return self.today(user_id)[0]
+
+    def tokens(self, user_id: int) -> int:
+        return self.today(user_id)[1]
+
+    def flush(self) -> int:
+        return 0
+
+
+class LocalQuota:
+    """Daily question quota enforced from a SQLite file on the host.
+
+    Every worker on the host checks and counts questions (and their tokens)
+    in the same file, so the limits hold across them without touching
+    PostgreSQL. A user's count starts from the ``counters`` table on their
+    first question of the day; the questions and tokens counted here since
+    then are kept as ``pending`` and sent to ``counters`` as one batch every
+    ``flush_interval`` seconds (and when a worker exits).
+
+    A flush first moves the pending deltas into a numbered batch in the
+    file, then applies the batch and records its number in PostgreSQL in
+    one transaction, then deletes it. If a worker dies in between, the next
+    flush resends the batch and PostgreSQL skips it if it was already
+    applied, so no usage is lost or counted twice. Counts on other hosts are
+    only seen when a user's count is first read each day.
+    """
+
+    def __init__(
+        self,
+        path: str = settings.QUOTA_STORE_PATH,
+        limit: Optional[int] = settings.DAILY_QUERY_LIMIT,
+        token_limit: Optional[int] = None,
+        flush_interval: float = settings.QUOTA_FLUSH_INTERVAL,
+        source: Optional[str] = None,
+    ):
+        self.path = path
+        self.limit = limit
+        self.token_limit = token_limit
+        self.flush_interval = flush_interval
+        self.source = source or f"{socket.gethostname()}:{os.path.abspath(path)}"
+        self._ready = False
+        self._next_flush = time.monotonic() + flush_interval
+
+    def _connect(self) -> sqlite3.Connection:
+        # A short-lived connection per call is fork- and thread-safe
+        connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        if not self._ready:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._add_columns(connection)
+            self._ready = True
+        return connection
+
+    def _add_columns(self, connection):
+        for table, column in ADDED_COLUMNS:
+            columns = {
+                row[1] for row in connection.execute(f"PRAGMA table_info({table})")
+            }
+            if column not in columns:
+                # Another worker may add it first
+                with contextlib.suppress(sqlite3.OperationalError):
+                    connection.execute(
+                        f"ALTER TABLE {table} ADD COLUMN {column} "
+                        "INTEGER NOT NULL DEFAULT 0"
+                    )
+
+    def _usage(self, connection, user_id: int, day: str) -> Optional[Tuple[int, int]]:
+        return connection.execute(
+            "SELECT count, tokens FROM usage WHERE user_id = ? AND date = ?",
+            (user_id, day),
+        ).fetchone()
+
+    def _seed(self, connection, user_id: int, day: str):
+        counter = Counter.query.filter_by(
+            user_id=user_id, date=date.fromisoformat(day)
+        ).first()
+        connection.execute(
+            "INSERT OR IGNORE INTO usage (user_id, date, count, tokens) "
+            "VALUES (?, ?, ?, ?)",
+            (
+                user_id,
+                day,
+                counter.count if counter else 0,
+                counter.tokens if counter else 0,
+            ),
+        )
+
+    def _increment(self, connection, user_id: int, day: str) -> list:
+        checks, limits = [], []
+        if self.limit is not None:
+            checks.append("count < ?")
+            limits.append(self.limit)
+        if self.token_limit is not None:
+            checks.append("tokens < ?")
+            limits.append(self.token_limit)
+        return connection.execute(
+            "UPDATE usage SET count = count + 1, pending = pending + 1 "
+            "WHERE user_id = ? AND date = ? "
+            + "".join(f"AND {check} " for check in checks)
+            + "RETURNING count",
+            (user_id, day, *limits),
+        ).fetchall()
+
+    def reserve(self, user_id: int) -> Optional[int]:
+        """Count a question; returns the new count, or None over the limit."""
+        day = _today()
+        connection = self._connect()
+        try:
+            rows = self._increment(connection, user_id, day)
+            if not rows and self._usage(connection, user_id, day) is None:
+                self._seed(connection, user_id, day)
+                rows = self._increment(connection, user_id, day)
+        finally:
+            connection.close()
+        self._flush_if_due()
+        return rows[0][0] if rows else None
+
+    def release(self, user_id: int):
+        connection = self._connect()
+        try:
+            connection.execute(
+                "UPDATE usage SET count = count - 1, pending = pending - 1 "
+                "WHERE user_id = ? AND date = ? AND count > 0",
+                (user_id, _today()),
+            )
+        finally:
+            connection.close()
+
+    def charge(self, user_id: int, tokens: int):
+        """Add the LLM tokens an answered question used."""
+        day = _today()
+        connection = self._connect()
+        try:
+            if self._usage(connection, user_id, day) is None:
+                self._seed(connection, user_id, day)
+            connection.execute(
+                "UPDATE usage SET tokens = tokens + ?, "
+                "pending_tokens = pending_tokens + ? WHERE user_id = ? AND date = ?",
+                (tokens, tokens, user_id, day),
+            )
+        finally:
+            connection.close()
+
+    def today(self, user_id: int) -> Tuple[int, int]:
+        """Today's question count and LLM tokens, read from one row."""
+        day = _today()
+        connection = self._connect()
+        try:
+            row = self._usage(connection, user_id, day)
+            if row is None:
+                self._seed(connection, user_id, day)
+                row = self._usage(connection, user_id, day)
+            return row
+        finally:
+            connection.close()
+
+    def usage(self, user_id: int) -> int:
+        return self.today(user_id)[0]
+
+    def tokens(self, user_id: int) -> int:
+        return self.today(user_id)[1]
+
+    def _flush_if_due(self):
+        if time.monotonic() < self._next_flush:
+            return
+        self._next_flush = time.monotonic() + self.flush_interval
+        # On failure the batch stays in the outbox and is resent next time
+        with contextlib.suppress(Exception):
+            self.flush()
+
+    def _last_batch(self, connection) -> int:
+        row = connection.execute(
+            "SELECT value FROM meta WHERE key = 'batch'"
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        # A new file for a known source continues after its applied batches
+        flushed = db.session.get(QuotaFlush, self.source)
+        return flushed.batch if flushed else 0
+
+    def _take_batch(self, connection) -> int:
+        """Number of the batch to send: a leftover one, or pending moved into
+        a new one. 0 when there is nothing to send."""
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            batch = connection.execute("SELECT MAX(batch) FROM outbox").fetchone()[0]
+            if batch is not None:
+                return batch
+            connection.execute(
+                "DELETE FROM usage WHERE date < ? AND pending = 0 "
+                "AND pending_tokens = 0",
+                (_today(),),
+            )
+            if not connection.execute(
+                "SELECT 1 FROM usage WHERE pending != 0 OR pending_tokens != 0 LIMIT 1"
+            ).fetchone():
+                return 0
+            batch = self._last_batch(connection) + 1
+            connection.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('batch', ?)", (batch,)
+            )
+            connection.execute(
+                "INSERT INTO outbox (batch, user_id, date, delta, tokens) "
+                "SELECT ?, user_id, date, pending, pending_tokens FROM usage "
+                "WHERE pending != 0 OR pending_tokens != 0",
+                (batch,),
+            )
+            connection.execute(
+                "UPDATE usage SET pending = 0, pending_tokens = 0 "
+                "WHERE pending != 0 OR pending_tokens != 0"
+            )
+            return batch
+
+    def _clear_batch(self, connection, batch: int):
+        connection.execute("DELETE FROM outbox WHERE batch = ?", (batch,))
+
+    def flush(self) -> int:
+        """Send pending usage to the ``counters`` table; returns rows sent."""
+        connection = self._connect()
+        try:
+            batch = self._take_batch(connection)
+            if not batch:
+                return 0
+            deltas = {
+                (user_id, date.fromisoformat(day)): (delta, tokens)
+                for user_id, day, delta, tokens in connection.execute(
+                    "SELECT user_id, date, SUM(delta), SUM(tokens) FROM outbox "
+                    "WHERE batch = ? GROUP BY user_id, date",
+                    (batch,),
+                )
+            }
+            Counter.apply_deltas(self.source, batch, deltas)
+            self._clear_batch(connection, batch)
+            return len(deltas)
+        finally:
+            connection.close()
+
+
+def create_quota():
+    limits = {
+        "limit": settings.DAILY_QUERY_LIMIT,
+        "token_limit": settings.DAILY_TOKEN_LIMIT,
+    }
+    if settings.QUOTA_LIMIT_BY == "tokens":
+        limits["limit"] = None
+    elif settings.QUOTA_LIMIT_BY != "both":
+        limits["token_limit"] = None
+    if settings.QUOTA_ENGINE == "local":
+        return LocalQuota(**limits)
+    return DatabaseQuota(**limits)
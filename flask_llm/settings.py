@@ -1,24 +1,161 @@
 import os
+import tempfile
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+def _seconds_by_name(variable: str) -> dict:
+    """Parse "name=seconds,..." pairs, e.g. "web_search=60,customer_search=10"."""
+    return {
+        name.strip(): float(seconds)
+        for name, seconds in (
+            pair.split("=", 1)
+            for pair in os.getenv(variable, "").split(",")
+            if "=" in pair
+        )
+    }
+
+
 class Settings:
     # DJANGO_API_URL = os.getenv("DJANGO_API_URL", "http://localhost:8000")
     DJANGO_API_URL = os.getenv("DJANGO_API_URL")
     FIRECRAWL_API_KEY = os.getenv("FIRECRAWL_API_KEY")
 
+    # Pooled HTTP client used by the Django API tools
+    DJANGO_API_POOL_CONNECTIONS = int(os.getenv("DJANGO_API_POOL_CONNECTIONS", "4"))
+    DJANGO_API_POOL_MAXSIZE = int(os.getenv("DJANGO_API_POOL_MAXSIZE", "10"))
+    DJANGO_API_POOL_BLOCK = (
+        os.getenv("DJANGO_API_POOL_BLOCK", "False").lower() == "true"
+    )
+    DJANGO_API_CONNECT_TIMEOUT = float(os.getenv("DJANGO_API_CONNECT_TIMEOUT", "3.05"))
+    DJANGO_API_READ_TIMEOUT = float(os.getenv("DJANGO_API_READ_TIMEOUT", "30"))
+    DJANGO_API_MAX_RETRIES = int(os.getenv("DJANGO_API_MAX_RETRIES", "2"))
+    # URLs whose ETag and body are kept for conditional GETs (0 disables)
+    DJANGO_API_VALIDATOR_CACHE_SIZE = int(
+        os.getenv("DJANGO_API_VALIDATOR_CACHE_SIZE", "256")
+    )
+
+    # Cursor pagination budget for tools: rows per page and pages followed
+    DJANGO_API_PAGE_SIZE = int(os.getenv("DJANGO_API_PAGE_SIZE", "25"))
+    DJANGO_API_MAX_PAGES = int(os.getenv("DJANGO_API_MAX_PAGES", "4"))
+
+    # Maximum number of matches returned by the customer_search tool
+    CUSTOMER_SEARCH_LIMIT = int(os.getenv("CUSTOMER_SEARCH_LIMIT", "10"))
+
+    # Tool results sent to the LLM: "compact" CSV within a token budget, or
+    # "repr" for the raw Python representation
+    TOOL_RESULT_FORMAT = os.getenv("TOOL_RESULT_FORMAT", "compact").lower()
+    TOOL_RESULT_TOKEN_BUDGET = int(os.getenv("TOOL_RESULT_TOKEN_BUDGET", "1500"))
+    TOOL_RESULT_TOKENIZER = os.getenv("TOOL_RESULT_TOKENIZER", "cl100k_base")
+
+    # Tool calls the agent emits in one step run in parallel, at most
+    # AGENT_TOOL_CONCURRENCY at a time. A call still running after its timeout
+    # (seconds) is reported to the agent as timed out.
+    AGENT_TOOL_CONCURRENCY = int(os.getenv("AGENT_TOOL_CONCURRENCY", "4"))
+    AGENT_TOOL_TIMEOUT = float(os.getenv("AGENT_TOOL_TIMEOUT", "30"))
+    # Per-tool overrides, e.g. "web_search=60,customer_search=10"
+    AGENT_TOOL_TIMEOUTS = _seconds_by_name("AGENT_TOOL_TIMEOUTS")
+
+    # Per-worker memo of tool results, keyed on tool name and arguments.
+    # TTLs are seconds per tool (0 disables); TOOL_CACHE_TTLS overrides them.
+    TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "True").lower() == "true"
+    TOOL_CACHE_TTL = float(os.getenv("TOOL_CACHE_TTL", "120"))
+    TOOL_CACHE_TTLS = {
+        "customer_invoices": 60.0,
+        "invoice_search": 60.0,
+        "customer_services": 120.0,
+        "service_history": 120.0,
+        "customer_search": 300.0,
+        "customer_contracts": 300.0,
+        "active_contracts": 300.0,
+        "serial_lookup": 600.0,
+        "web_search": 900.0,
+        "item_search": 3600.0,
+        **_seconds_by_name("TOOL_CACHE_TTLS"),
+    }
+    TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "512"))
+
+    # Answers to repeated questions, shared by all workers through SQLite and
+    # keyed on the Django API data version (re-read every DATA_VERSION_TTL s)
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "True").lower() == "true"
+    ANSWER_CACHE_PATH = os.getenv(
+        "ANSWER_CACHE_PATH", os.path.join(tempfile.gettempdir(), "llm_poc_answers.db")
+    )
+    ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+    DATA_VERSION_TTL = float(os.getenv("DATA_VERSION_TTL", "5"))
+    # Optional per-worker cache that also matches reworded questions: "hashing"
+    # (local, word overlap) or "azure" (AZURE_OPENAI_EMBEDDING_DEPLOYMENT)
+    SEMANTIC_CACHE_ENABLED = (
+        os.getenv("SEMANTIC_CACHE_ENABLED", "False").lower() == "true"
+    )
+    SEMANTIC_CACHE_EMBEDDER = os.getenv("SEMANTIC_CACHE_EMBEDDER", "hashing").lower()
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+    SEMANTIC_CACHE_MAX_SIZE = int(os.getenv("SEMANTIC_CACHE_MAX_SIZE", "2000"))
+
+    # Common single-lookup questions ("What contracts are currently active?")
+    # are answered by one direct tool call and one summarising LLM call; with
+    # FAST_PATH_SUMMARIZE off the tool's raw rows are shown in a template
+    FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "True").lower() == "true"
+    FAST_PATH_SUMMARIZE = os.getenv("FAST_PATH_SUMMARIZE", "True").lower() == "true"
+
     AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
     AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
     AZURE_OPENAI_DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
     AZURE_OPENAI_API_VERSION = os.getenv(
         "AZURE_OPENAI_API_VERSION", "2024-02-15-preview"
     )
+    AZURE_OPENAI_EMBEDDING_DEPLOYMENT = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT")
 
     # Flask application configuration
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
+    # Seconds each worker reuses a logged-in user without querying (0 disables)
+    USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+    USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "1024"))
+    # Questions per user per UTC day answered by the LLM
+    DAILY_QUERY_LIMIT = int(os.getenv("DAILY_QUERY_LIMIT", "50"))
+    # "database" counts every question in PostgreSQL; "local" enforces the
+    # limit from a SQLite file shared by the workers on the host and sends
+    # the counts to PostgreSQL every QUOTA_FLUSH_INTERVAL seconds
+    QUOTA_ENGINE = os.getenv("QUOTA_ENGINE", "database").lower()
+    QUOTA_STORE_PATH = os.getenv(
+        "QUOTA_STORE_PATH", os.path.join(tempfile.gettempdir(), "llm_poc_quota.db")
+    )
+    QUOTA_FLUSH_INTERVAL = float(os.getenv("QUOTA_FLUSH_INTERVAL", "10"))
+    # What the daily quota limits: "requests" (DAILY_QUERY_LIMIT questions),
+    # "tokens" (DAILY_TOKEN_LIMIT LLM tokens, checked before each question, so
+    # the question that crosses it is still answered) or "both"
+    QUOTA_LIMIT_BY = os.getenv("QUOTA_LIMIT_BY", "requests").lower()
+    DAILY_TOKEN_LIMIT = int(os.getenv("DAILY_TOKEN_LIMIT", "200000"))
+
+    # Token usage, latency and cost of each answered question are kept in the
+    # question_usage table, inserted USAGE_BATCH_SIZE rows at a time or every
+    # USAGE_FLUSH_INTERVAL seconds. Prices are per 1K tokens of the deployment.
+    USAGE_BATCH_SIZE = int(os.getenv("USAGE_BATCH_SIZE", "50"))
+    USAGE_FLUSH_INTERVAL = float(os.getenv("USAGE_FLUSH_INTERVAL", "30"))
+    LLM_PROMPT_PRICE_PER_1K = float(os.getenv("LLM_PROMPT_PRICE_PER_1K", "0"))
+    LLM_COMPLETION_PRICE_PER_1K = float(os.getenv("LLM_COMPLETION_PRICE_PER_1K", "0"))
+
+    # Tracing: one trace per question with spans for LLM calls, tool calls and
+    # the Django API's requests and queries. TRACING_EXPORTERS is a comma list
+    # of "log" (JSON lines on the "tracing" logger), "file" (JSON lines in
+    # TRACING_FILE) and "otlp" (an OpenTelemetry collector over HTTP). Off by
+    # default: spans hold questions and tool arguments as users typed them.
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "False").lower() == "true"
+    TRACING_EXPORTERS = [
+        name.strip().lower()
+        for name in os.getenv("TRACING_EXPORTERS", "log").split(",")
+        if name.strip()
+    ]
+    TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "flask_llm")
+    TRACING_FILE = os.getenv(
+        "TRACING_FILE", os.path.join(tempfile.gettempdir(), "flask_llm_traces.jsonl")
+    )
+    TRACING_OTLP_ENDPOINT = os.getenv(
+        "TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"
+    )
 
     # Database configuration
     DB_HOST = os.getenv("DB_HOST", "localhost")
@@ -32,6 +169,13 @@ class Settings:
         f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connections are only held for the quota check and the usage update,
+    # never while the agent runs, so a small pool serves many requests
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_pre_ping": True,
+    }
 
 
 settings = Settings()
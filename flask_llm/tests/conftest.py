@@ -1,8 +1,28 @@
+import os
 from unittest.mock import Mock
 
-import pytest
-from app import app, db
-from models import User
+# Record spans without exporting them; tests attach their own exporter
+os.environ.setdefault("TRACING_ENABLED", "True")
+os.environ.setdefault("TRACING_EXPORTERS", "")
+
+import pytest  # noqa: E402
+from app import app, db, usage_log  # noqa: E402
+from auth_utils import user_cache  # noqa: E402
+from models import User  # noqa: E402
+from tool_cache import tool_cache  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Keep memoized tool results, cached users and buffered usage rows from
+    leaking between tests."""
+    tool_cache.clear()
+    user_cache.clear()
+    usage_log.clear()
+    yield
+    tool_cache.clear()
+    user_cache.clear()
+    usage_log.clear()
 
 
 @pytest.fixture
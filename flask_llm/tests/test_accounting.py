@@ -0,0 +1,174 @@
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from accounting import UsageHandler, UsageLog, track_usage
+from app import app
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from llm_agent import BusinessDataAgent
+from models import QuestionUsage, User, db
+from sqlalchemy import event
+
+
+def llm_call(usage, prompt, completion):
+    """Report one LLM call to ``usage`` the way LangChain does."""
+    run_id = uuid4()
+    usage.on_chat_model_start({}, [], run_id=run_id)
+    usage.on_llm_end(
+        LLMResult(
+            generations=[],
+            llm_output={
+                "token_usage": {
+                    "prompt_tokens": prompt,
+                    "completion_tokens": completion,
+                }
+            },
+        ),
+        run_id=run_id,
+    )
+
+
+class TestUsageHandler:
+    @patch("accounting.settings.LLM_COMPLETION_PRICE_PER_1K", 0.01)
+    @patch("accounting.settings.LLM_PROMPT_PRICE_PER_1K", 0.0025)
+    def test_tokens_latency_and_cost_per_call(self):
+        """Test that each LLM call is recorded with its tokens and latency."""
+        usage = UsageHandler()
+
+        llm_call(usage, 1000, 100)
+        llm_call(usage, 2000, 300)
+
+        assert [call["prompt_tokens"] for call in usage.calls] == [1000, 2000]
+        assert all(call["latency_ms"] >= 0 for call in usage.calls)
+        assert usage.total_tokens == 3400
+        assert usage.cost == pytest.approx(0.0075 + 0.004)
+
+    @patch("llm_agent.AzureChatOpenAI")
+    @patch("llm_agent.create_openai_tools_agent")
+    @patch("llm_agent.ParallelAgentExecutor")
+    def test_agent_reports_to_tracked_usage(
+        self, mock_agent_executor, mock_create_agent, mock_azure_openai
+    ):
+        """Test that the agent's LLM calls land in the caller's handler."""
+
+        def fake_invoke(inputs, config):
+            for _ in range(4):
+                llm_call(config["callbacks"][-1], 500, 50)
+            return {"output": "answer"}
+
+        mock_agent_executor.return_value.invoke.side_effect = fake_invoke
+        agent = BusinessDataAgent("key", "https://test.openai.azure.com/", "gpt")
+
+        with track_usage() as usage:
+            agent.answer("Which customers have overdue invoices?")
+
+        assert usage.source == "agent"
+        assert len(usage.calls) == 4
+        assert (usage.prompt_tokens, usage.completion_tokens) == (2000, 200)
+
+
+class TestUsageLog:
+    @pytest.fixture
+    def user_id(self):
+        with app.app_context():
+            db.create_all()
+            user = User(username="usageuser", email="usage@example.com")
+            user.set_password("testpassword")
+            db.session.add(user)
+            db.session.commit()
+            yield user.id
+            db.session.remove()
+            db.drop_all()
+
+    @staticmethod
+    def usage(prompt=300, completion=30):
+        usage = UsageHandler()
+        usage.source = "agent"
+        llm_call(usage, prompt, completion)
+        return usage
+
+    def test_rows_are_inserted_in_batches(self, user_id):
+        """Test that questions are written together once a batch is full."""
+        log = UsageLog(batch_size=3, flush_interval=3600)
+        inserts = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("INSERT"):
+                inserts.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            log.record(user_id, self.usage())
+            log.record(user_id, self.usage())
+            assert QuestionUsage.query.count() == 0
+
+            log.record(user_id, self.usage(completion=70))
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        assert len(inserts) == 1
+        rows = QuestionUsage.query.filter_by(user_id=user_id).all()
+        assert [row.completion_tokens for row in rows] == [30, 30, 70]
+        assert rows[0].llm_calls == 1
+        assert rows[0].calls[0]["prompt_tokens"] == 300
+        assert len(log) == 0
+
+    @patch("llm_agent.create_openai_tools_agent")
+    @patch("llm_agent.ParallelAgentExecutor")
+    def test_streamed_question_records_tokens(
+        self, mock_agent_executor, mock_create_agent, user_id
+    ):
+        """Test that a streamed question is stored with the tokens it used."""
+
+        def fake_invoke(inputs, config):
+            run_id = uuid4()
+            usage = next(h for h in config["callbacks"] if isinstance(h, UsageHandler))
+            usage.on_chat_model_start({}, [], run_id=run_id)
+            # Streamed calls report usage on the message, not in llm_output
+            message = AIMessage(
+                content="answer",
+                usage_metadata={
+                    "input_tokens": 800,
+                    "output_tokens": 40,
+                    "total_tokens": 840,
+                },
+            )
+            usage.on_llm_end(
+                LLMResult(generations=[[ChatGeneration(message=message)]]),
+                run_id=run_id,
+            )
+            return {"output": "answer"}
+
+        mock_agent_executor.return_value.invoke.side_effect = fake_invoke
+        agent = BusinessDataAgent("key", "https://test.openai.azure.com/", "gpt")
+        log = UsageLog(batch_size=50, flush_interval=3600)
+
+        with track_usage() as usage:
+            events = list(agent.stream("Which customers have overdue invoices?"))
+        log.record(user_id, usage)
+        log.flush()
+
+        assert events[-1] == {"type": "answer", "answer": "answer"}
+        streaming_llm = mock_create_agent.call_args[0][0]
+        assert streaming_llm.streaming and streaming_llm.stream_usage
+        row = QuestionUsage.query.filter_by(user_id=user_id).one()
+        assert (row.prompt_tokens, row.completion_tokens) == (800, 40)
+
+    def test_failed_batch_is_retried(self, user_id):
+        """Test that rows survive a failed insert and go with the next one."""
+        log = UsageLog(batch_size=50, flush_interval=3600)
+        log.record(user_id, self.usage())
+
+        with patch("accounting.db.insert", side_effect=RuntimeError), pytest.raises(
+            RuntimeError
+        ):
+            log.flush()
+        log.record(user_id, self.usage())
+
+        assert log.flush() == 2
+        assert QuestionUsage.query.filter_by(user_id=user_id).count() == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
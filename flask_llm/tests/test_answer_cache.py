@@ -0,0 +1,93 @@
+from unittest.mock import Mock, patch
+
+import answer_cache
+import pytest
+from answer_cache import AnswerCache, data_version, normalize_question
+
+
+class TestAnswerCache:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return AnswerCache(path=str(tmp_path / "answers.db"), ttl=60, max_entries=3)
+
+    def test_normalize_question(self):
+        """Test that case, spacing and trailing punctuation are ignored."""
+        assert (
+            normalize_question("  What contracts are\tcurrently ACTIVE?? ")
+            == "what contracts are currently active"
+        )
+
+    def test_hit_on_equivalent_question(self, cache):
+        """Test that a normalized repeat of a question is a hit."""
+        cache.set("What contracts are active?", "v1", "Two contracts.")
+
+        assert cache.get("what contracts are  active", "v1") == "Two contracts."
+        assert cache.get("What items are active?", "v1") is None
+
+    def test_new_data_version_misses(self, cache):
+        """Test that answers are not served once the data changed."""
+        cache.set("Q", "v1", "old answer")
+
+        assert cache.get("Q", "v2") is None
+
+    def test_expired_entries_miss(self, cache):
+        """Test that entries older than the TTL are not served."""
+        with patch("answer_cache.time.time", return_value=1000.0):
+            cache.set("Q", "v1", "answer")
+        with patch("answer_cache.time.time", return_value=1061.0):
+            assert cache.get("Q", "v1") is None
+
+    def test_least_recently_read_is_evicted(self, cache):
+        """Test that the cache stays within max_entries."""
+        for n, now in enumerate((1.0, 2.0, 3.0)):
+            with patch("answer_cache.time.time", return_value=now):
+                cache.set(f"Q{n}", "v1", f"A{n}")
+        with patch("answer_cache.time.time", return_value=4.0):
+            cache.get("Q0", "v1")
+        with patch("answer_cache.time.time", return_value=5.0):
+            cache.set("Q3", "v1", "A3")
+
+        assert len(cache) == 3
+        with patch("answer_cache.time.time", return_value=6.0):
+            assert cache.get("Q1", "v1") is None
+            assert cache.get("Q0", "v1") == "A0"
+
+    def test_shared_between_instances(self, cache):
+        """Test that another worker's instance sees the same entries."""
+        cache.set("Q", "v1", "answer")
+
+        other = AnswerCache(path=cache.path)
+
+        assert other.get("Q", "v1") == "answer"
+
+
+class TestDataVersion:
+    def setup_method(self):
+        answer_cache.reset_data_version()
+
+    def teardown_method(self):
+        answer_cache.reset_data_version()
+
+    @patch("answer_cache.http_client.get")
+    def test_version_is_reused_within_ttl(self, mock_get):
+        """Test that the version is fetched once per DATA_VERSION_TTL."""
+        mock_get.return_value = Mock(status_code=200)
+        mock_get.return_value.json.return_value = {"version": "abc"}
+
+        assert data_version() == "abc"
+        assert data_version() == "abc"
+        mock_get.assert_called_once()
+        assert mock_get.call_args[0][0].endswith("/api/cache/version/")
+
+    @patch("answer_cache.http_client.get")
+    def test_unreachable_api_disables_cache(self, mock_get):
+        """Test that no version (and so no caching) is used when the API fails."""
+        mock_get.side_effect = Exception("connection refused")
+
+        assert data_version() is None
+        assert data_version() is None
+        assert mock_get.call_count == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -1,9 +1,12 @@
-from unittest.mock import Mock, patch
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 import requests
 from api_tools import (
     ActiveContractsTool,
+    APIError,
+    CustomerContractsTool,
     CustomerInvoicesTool,
     CustomerSearchTool,
     InvoiceSearchTool,
@@ -11,14 +14,321 @@ from api_tools import (
     SerialLookupTool,
     ServiceHistoryTool,
     WebSearchTool,
+    afetch_results,
+    count_tokens,
+    encode_results,
+    fetch_results,
+    format_results,
+    run_api_query,
 )
 
 
+class TestFetchResults:
+    @staticmethod
+    def _page(results, next_url=None):
+        response = Mock()
+        response.status_code = 200
+        response.json.return_value = {
+            "next": next_url,
+            "previous": None,
+            "results": results,
+        }
+        return response
+
+    @patch("api_tools.http_client.get")
+    def test_follows_next_links(self, mock_get):
+        """Test that pages are followed until the last page."""
+        mock_get.side_effect = [
+            self._page([{"id": 1}], "http://api/x/?cursor=a"),
+            self._page([{"id": 2}]),
+        ]
+
+        results, has_more = fetch_results("http://api/x/", {"q": "a"}, max_pages=5)
+
+        assert results == [{"id": 1}, {"id": 2}]
+        assert has_more is False
+        assert mock_get.call_args_list[0][1]["params"]["q"] == "a"
+        assert "page_size" in mock_get.call_args_list[0][1]["params"]
+        # The cursor link already carries the query string
+        assert mock_get.call_args_list[1][0][0] == "http://api/x/?cursor=a"
+        assert mock_get.call_args_list[1][1]["params"] is None
+
+    @patch("api_tools.http_client.get")
+    def test_stops_at_page_budget(self, mock_get):
+        """Test that only max_pages pages are requested."""
+        mock_get.side_effect = [
+            self._page([{"id": 1}], "http://api/x/?cursor=a"),
+            self._page([{"id": 2}], "http://api/x/?cursor=b"),
+        ]
+
+        results, has_more = fetch_results("http://api/x/", max_pages=1)
+
+        assert results == [{"id": 1}]
+        assert has_more is True
+        assert mock_get.call_count == 1
+
+    @patch("api_tools.http_client.get")
+    def test_truncation_is_reported(self, mock_get):
+        """Test that tools tell the agent when more results exist."""
+        mock_get.return_value = self._page([{"id": 1}], "http://api/x/?cursor=a")
+
+        result = run_api_query("http://api/x/", max_pages=1)
+
+        assert "more are available" in result
+
+    @patch("api_tools.http_client.get")
+    def test_error_status_raises(self, mock_get):
+        """Test that non-200 responses raise APIError."""
+        mock_get.return_value = Mock(status_code=503)
+
+        with pytest.raises(APIError) as exc_info:
+            fetch_results("http://api/x/")
+        assert exc_info.value.status_code == 503
+
+
+class TestAsyncTools:
+    @staticmethod
+    def _page(results, next_url=None):
+        response = Mock()
+        response.status_code = 200
+        response.json.return_value = {"next": next_url, "results": results}
+        return response
+
+    @patch("api_tools.http_client.aget", new_callable=AsyncMock)
+    def test_afetch_results_follows_next_links(self, mock_aget):
+        """Test that the async fetch pages like the sync one."""
+        mock_aget.side_effect = [
+            self._page([{"id": 1}], "http://api/x/?cursor=a"),
+            self._page([{"id": 2}], "http://api/x/?cursor=b"),
+        ]
+
+        results, has_more = asyncio.run(afetch_results("http://api/x/", max_pages=2))
+
+        assert results == [{"id": 1}, {"id": 2}]
+        assert has_more is True
+        assert mock_aget.await_args_list[1][1]["params"] is None
+
+    @patch("api_tools.http_client.get")
+    @patch("api_tools.http_client.aget", new_callable=AsyncMock)
+    def test_arun_uses_async_client(self, mock_aget, mock_get):
+        """Test that _arun awaits the async client instead of the sync one."""
+        mock_aget.return_value = self._page([{"invoice_number": "INV-001"}])
+
+        result = asyncio.run(CustomerInvoicesTool()._arun(customer_id=1))
+
+        assert "INV-001" in result
+        assert "/api/customers/1/invoices/" in mock_aget.await_args[0][0]
+        mock_get.assert_not_called()
+
+    @patch("api_tools.http_client.aget", new_callable=AsyncMock)
+    def test_arun_reports_api_errors(self, mock_aget):
+        """Test that async API errors are returned like sync ones."""
+        mock_aget.return_value = Mock(status_code=404)
+
+        result = asyncio.run(ActiveContractsTool().ainvoke({}))
+
+        assert result == "Error: 404"
+
+    def test_parallel_tool_calls_run_concurrently(self):
+        """Test that gathered tool calls overlap instead of queueing."""
+        started = []
+        both_started = asyncio.Event()
+
+        async def slow_get(url, **kwargs):
+            started.append(url)
+            if len(started) == 2:
+                both_started.set()
+            # Deadlocks (and times out) if the calls ran one after another
+            await asyncio.wait_for(both_started.wait(), timeout=2)
+            return self._page([{"id": len(started)}])
+
+        async def run_both():
+            return await asyncio.gather(
+                CustomerInvoicesTool().ainvoke({"customer_id": 1}),
+                CustomerContractsTool().ainvoke({"customer_id": 1}),
+            )
+
+        with patch("api_tools.http_client.aget", new=slow_get):
+            results = asyncio.run(run_both())
+
+        assert len(started) == 2
+        assert all("id" in result for result in results)
+
+    @patch("api_tools.settings.FIRECRAWL_API_KEY", "test_api_key")
+    @patch("api_tools.AsyncFirecrawl")
+    def test_web_search_arun(self, mock_async_firecrawl):
+        """Test that web search awaits the async Firecrawl client."""
+        mock_firecrawl = Mock()
+        mock_firecrawl.search = AsyncMock(
+            return_value=Mock(
+                web=[Mock(title="Result", url="https://example.com", description="")]
+            )
+        )
+        mock_async_firecrawl.return_value = mock_firecrawl
+
+        result = asyncio.run(WebSearchTool()._arun(query="printers"))
+
+        assert "https://example.com" in result
+        mock_firecrawl.search.assert_awaited_once_with(query="printers", limit=5)
+
+    @patch("api_tools.settings.FIRECRAWL_API_KEY", "test_api_key")
+    @patch("api_tools.AsyncFirecrawl")
+    def test_web_scrape_arun(self, mock_async_firecrawl):
+        """Test that scraping awaits the async Firecrawl client."""
+        mock_firecrawl = Mock()
+        mock_firecrawl.scrape = AsyncMock(return_value=Mock(markdown="# Page"))
+        mock_async_firecrawl.return_value = mock_firecrawl
+
+        result = asyncio.run(
+            WebSearchTool()._arun(query="https://example.com", search_type="scrape")
+        )
+
+        assert "# Page" in result
+
+
+def _invoice(n, details=3):
+    """An invoice shaped like the API's InvoiceSerializer output."""
+    return {
+        "id": n,
+        "invoice_number": f"INV-{n:03d}",
+        "customer": 1,
+        "customer_name": "Company A",
+        "invoice_date": "2024-01-15",
+        "total_amount": "4500.00",
+        "total_amount_formatted": "RM 4500.00",
+        "status": "paid",
+        "details": [
+            {
+                "id": n * 10 + i,
+                "item": i,
+                "item_name": "Color Printer",
+                "item_brand": "Ricoh",
+                "item_model": "P3000",
+                "quantity": 1,
+                "unit_price": "1500.00",
+                "unit_price_formatted": "RM 1500.00",
+                "total_price": "1500.00",
+                "total_price_formatted": "RM 1500.00",
+            }
+            for i in range(details)
+        ],
+    }
+
+
+class TestEncodeResults:
+    def test_header_row_and_dropped_nulls(self):
+        """Test that rows share one header and empty columns are dropped."""
+        result = encode_results(
+            [
+                {"id": 1, "name": "Company A", "email": None, "phone": ""},
+                {"id": 2, "name": "Company B", "email": None, "phone": "123"},
+            ]
+        )
+
+        assert result.splitlines() == [
+            "id,name,phone",
+            "1,Company A,",
+            "2,Company B,123",
+        ]
+
+    def test_formatted_duplicates_are_merged(self):
+        """Test that *_formatted copies are dropped and the unit kept."""
+        result = encode_results(
+            [{"id": 1, "price": "1500.00", "price_formatted": "RM 1500.00"}]
+        )
+
+        assert result.splitlines() == ["id,price (RM)", "1,1500.00"]
+
+    def test_nested_objects_and_child_tables(self):
+        """Test that nested objects flatten and nested lists become child rows."""
+        result = encode_results(
+            [
+                {
+                    "id": 7,
+                    "customer": {"name": "Company A"},
+                    "contact_details": [
+                        {"id": 1, "contact_person": "John", "contract": 7},
+                        {"id": 2, "contact_person": "Jane", "contract": 7},
+                    ],
+                }
+            ]
+        )
+
+        assert result.splitlines() == [
+            "id,customer.name",
+            "7,Company A",
+            "[contact_details]",
+            "parent_id,id,contact_person",
+            "7,1,John",
+            "7,2,Jane",
+        ]
+
+    def test_values_with_commas_are_quoted(self):
+        """Test that CSV quoting keeps values with commas intact."""
+        result = encode_results([{"address": "1, Jalan Ampang"}])
+
+        assert result.splitlines()[1] == '"1, Jalan Ampang"'
+
+    def test_token_budget_truncates_whole_rows(self):
+        """Test that rows beyond the budget are replaced by a marker."""
+        invoices = [_invoice(n) for n in range(20)]
+
+        result = encode_results(invoices, token_budget=200)
+
+        assert count_tokens(result) < 300
+        assert "INV-000" in result
+        assert "INV-019" not in result
+        shown = result.count("INV-")
+        assert f"... {20 - shown} more rows not shown." in result
+        assert "more are available" in result
+
+    def test_has_more_is_reported(self):
+        """Test that pagination truncation is surfaced to the agent."""
+        result = encode_results([{"id": 1}], has_more=True)
+
+        assert "more are available" in result
+
+    def test_empty_and_scalar_results(self):
+        """Test that empty and non-tabular results are still readable."""
+        assert encode_results([]) == "No results."
+        assert encode_results(["a", "b"]) == "['a', 'b']"
+        assert encode_results({"status": "healthy"}) == "status\nhealthy"
+
+    @patch("api_tools.settings.TOOL_RESULT_FORMAT", "repr")
+    def test_repr_format_setting(self):
+        """Test that the previous repr output can be restored."""
+        assert format_results([{"id": 1}]) == "[{'id': 1}]"
+
+    def test_token_savings_on_tool_outputs(self):
+        """Measure token savings of the compact encoding over repr."""
+        payloads = {
+            "invoices": [_invoice(n) for n in range(25)],
+            "items": [
+                {
+                    "id": n,
+                    "name": f"Color Printer {n}",
+                    "model": "P3000",
+                    "brand": "Ricoh",
+                    "item_group": 1,
+                    "item_group_name": "Printers",
+                    "price": "1500.00",
+                    "price_formatted": "RM 1500.00",
+                }
+                for n in range(25)
+            ],
+        }
+
+        for results in payloads.values():
+            before = count_tokens(str(results))
+            after = count_tokens(encode_results(results, token_budget=10**6))
+            assert after < before * 0.5
+
+
 class TestCustomerSearchTool:
     def setup_method(self):
         self.tool = CustomerSearchTool()
 
-    @patch("api_tools.requests.get")
+    @patch("api_tools.http_client.get")
     def test_customer_search_all(self, mock_get):
         """Test searching for all customers."""
         mock_response = Mock()
@@ -34,24 +344,28 @@ class TestCustomerSearchTool:
         assert "Company A" in result
         assert "Company B" in result
         mock_get.assert_called_once()
+        assert "name" not in mock_get.call_args[1]["params"]
 
-    @patch("api_tools.requests.get")
+    @patch("api_tools.http_client.get")
     def test_customer_search_filtered(self, mock_get):
-        """Test searching for customers with filter."""
+        """Test that name filtering is delegated to the search endpoint."""
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.json.return_value = [
             {"id": 1, "name": "Company A", "email": "a@company.com"},
-            {"id": 2, "name": "Another Company", "email": "b@company.com"},
         ]
         mock_get.return_value = mock_response
 
         result = self.tool._run(customer_name="Company A")
 
         assert "Company A" in result
-        assert "Another Company" not in result
+        called_url = mock_get.call_args[0][0]
+        assert called_url.endswith("/api/customers/search/")
+        params = mock_get.call_args[1]["params"]
+        assert params["name"] == "Company A"
+        assert params["limit"] > 0
 
-    @patch("api_tools.requests.get")
+    @patch("api_tools.http_client.get")
     def test_customer_search_api_error(self, mock_get):
         """Test handling API errors."""
         mock_response = Mock()
@@ -61,7 +375,7 @@ class TestCustomerSearchTool:
         result = self.tool._run()
         assert "Error: 500" in result
 
-    @patch("api_tools.requests.get")
+    @patch("api_tools.http_client.get")
     def test_customer_search_connection_error(self, mock_get):
         """Test handling connection errors."""
         mock_get.side_effect = requests.ConnectionError("Connection failed")
@@ -74,7 +388,7 @@ class TestCustomerInvoicesTool:
     def setup_method(self):
         self.tool = CustomerInvoicesTool()
 
-    @patch("api_tools.requests.get")
+    @patch("api_tools.http_client.get")
     def test_customer_invoices_success(self, mock_get):
         """Test successful invoice retrieval."""
         mock_response = Mock()
@@ -89,7 +403,7 @@ class TestCustomerInvoicesTool:
         assert "INV-001" in result
         mock_get.assert_called_once()
 
-    @patch("api_tools.requests.get")
+    @patch("api_tools.http_client.get")
     def test_customer_invoices_not_found(self, mock_get):
         """Test customer invoices not found."""
         mock_response = Mock()
@@ -104,7 +418,7 @@ class TestItemSearchTool:
     def setup_method(self):
         self.tool = ItemSearchTool()
 
-    @patch("api_tools.requests.get")
+    @patch("api_tools.http_client.get")
     def test_item_search_by_query(self, mock_get):
         """Test item search by query."""
         mock_response = Mock()
@@ -122,7 +436,7 @@ class TestItemSearchTool:
         call_args = mock_get.call_args
         assert call_args[1]["params"]["q"] == "printer"
 
-    @patch("api_tools.requests.get")
+    @patch("api_tools.http_client.get")
     def test_item_search_by_brand(self, mock_get):
         """Test item search by brand."""
         mock_response = Mock()
@@ -138,7 +452,7 @@ class TestItemSearchTool:
         call_args = mock_get.call_args
         assert call_args[1]["params"]["brand"] == "Ricoh"
 
-    @patch("api_tools.requests.get")
+    @patch("api_tools.http_client.get")
     def test_item_search_both_params(self, mock_get):
         """Test item search with both query and brand."""
         mock_response = Mock()
@@ -158,7 +472,7 @@ class TestInvoiceSearchTool:
     def setup_method(self):
         self.tool = InvoiceSearchTool()
 
-    @patch("api_tools.requests.get")
+    @patch("api_tools.http_client.get")
     def test_invoice_search_all(self, mock_get):
         """Test searching all invoices."""
         mock_response = Mock()
@@ -175,7 +489,7 @@ class TestInvoiceSearchTool:
         mock_get.assert_called_once()
         assert "by_customer" not in mock_get.call_args[0][0]
 
-    @patch("api_tools.requests.get")
+    @patch("api_tools.http_client.get")
     def test_invoice_search_by_customer(self, mock_get):
         """Test searching invoices by customer."""
         mock_response = Mock()
@@ -199,7 +513,7 @@ class TestActiveContractsTool:
     def setup_method(self):
         self.tool = ActiveContractsTool()
 
-    @patch("api_tools.requests.get")
+    @patch("api_tools.http_client.get")
     def test_active_contracts_success(self, mock_get):
         """Test successful active contracts retrieval."""
         mock_response = Mock()
@@ -224,7 +538,7 @@ class TestSerialLookupTool:
     def setup_method(self):
         self.tool = SerialLookupTool()
 
-    @patch("api_tools.requests.get")
+    @patch("api_tools.http_client.get")
     def test_serial_lookup_all(self, mock_get):
         """Test looking up all serials."""
         mock_response = Mock()
@@ -240,9 +554,9 @@ class TestSerialLookupTool:
         mock_get.assert_called_once()
         # Should not have item_id parameter
         call_args = mock_get.call_args
-        assert call_args[1]["params"] == {}
+        assert "item_id" not in call_args[1]["params"]
 
-    @patch("api_tools.requests.get")
+    @patch("api_tools.http_client.get")
     def test_serial_lookup_by_item(self, mock_get):
         """Test looking up serials by item ID."""
         mock_response = Mock()
@@ -263,7 +577,7 @@ class TestServiceHistoryTool:
     def setup_method(self):
         self.tool = ServiceHistoryTool()
 
-    @patch("api_tools.requests.get")
+    @patch("api_tools.http_client.get")
     def test_service_history_all(self, mock_get):
         """Test getting all service history."""
         mock_response = Mock()
@@ -280,7 +594,7 @@ class TestServiceHistoryTool:
         # Should not use date_range endpoint
         assert "by_date_range" not in mock_get.call_args[0][0]
 
-    @patch("api_tools.requests.get")
+    @patch("api_tools.http_client.get")
     def test_service_history_date_range(self, mock_get):
         """Test getting service history with date range."""
         mock_response = Mock()
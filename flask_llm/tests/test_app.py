@@ -1,9 +1,10 @@
 import json
 import os
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, call, patch
 
 import pytest
-from app import app, get_agent
+from accounting import question_usage
+from app import app, get_agent, usage_log, warm_up, warmup_status
 from models import User, db
 
 
@@ -50,6 +51,22 @@ class TestFlaskApp:
         assert data["message"] == "LLM Business Data API is running"
         assert "/query" in data["endpoints"]
 
+    @patch("app.tool_cache")
+    def test_tool_cache_stats(self, mock_cache, client):
+        """Test that tool cache counters are exposed for monitoring."""
+        mock_cache.__len__.return_value = 1
+        mock_cache.max_entries = 512
+        mock_cache.stats.return_value = {
+            "customer_invoices": {"hits": 3, "misses": 1, "entries": 1}
+        }
+
+        response = client.get("/tools/cache")
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["entries"] == 1
+        assert data["tools"]["customer_invoices"]["hits"] == 3
+
     def test_examples_endpoint(self, client):
         """Test the examples endpoint."""
         response = client.get("/examples")
@@ -85,7 +102,7 @@ class TestFlaskApp:
         """Test successful query endpoint."""
         # Mock the agent
         mock_agent = Mock()
-        mock_agent.query.return_value = "Test response"
+        mock_agent.answer.return_value = ("Test response", False)
         mock_get_agent.return_value = mock_agent
 
         # Disable login requirement for this test
@@ -101,14 +118,14 @@ class TestFlaskApp:
         data = json.loads(response.data)
         assert data["question"] == "Test question"
         assert data["answer"] == "Test response"
-        mock_agent.query.assert_called_once_with("Test question")
+        mock_agent.answer.assert_called_once_with("Test question")
 
     @patch("app.get_agent")
     def test_query_endpoint_agent_error(self, mock_get_agent, client):
         """Test query endpoint when agent throws an error."""
         # Mock the agent to raise an exception
         mock_agent = Mock()
-        mock_agent.query.side_effect = Exception("Agent error")
+        mock_agent.answer.side_effect = Exception("Agent error")
         mock_get_agent.return_value = mock_agent
 
         app.config["LOGIN_DISABLED"] = True
@@ -170,6 +187,260 @@ class TestFlaskApp:
         assert "/login" in response.location
 
 
+class TestQueryStream:
+    @pytest.fixture
+    def stream_client(self):
+        """A logged-in client that does not preserve request contexts."""
+        app.config["TESTING"] = True
+        with app.app_context():
+            db.create_all()
+            user = User(username="streamuser", email="stream@example.com")
+            user.set_password("testpassword")
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(self.user_id)
+            sess["_fresh"] = True
+        yield client
+
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    @staticmethod
+    def parse_events(body):
+        events = []
+        for message in body.strip().split("\n\n"):
+            lines = dict(line.split(": ", 1) for line in message.splitlines())
+            events.append((lines["event"], json.loads(lines["data"])))
+        return events
+
+    @patch("app.get_agent")
+    def test_stream_sends_events_in_order(self, mock_get_agent, stream_client):
+        """Test that agent events are relayed as Server-Sent Events."""
+        mock_agent = Mock()
+        mock_agent.stream.return_value = iter(
+            [
+                {"type": "tool_start", "tool": "active_contracts", "input": {}},
+                {"type": "tool_end", "tool": "active_contracts", "output": "[]"},
+                {"type": "token", "text": "No "},
+                {"type": "answer", "answer": "No active contracts"},
+            ]
+        )
+        mock_get_agent.return_value = mock_agent
+
+        response = stream_client.post(
+            "/query/stream",
+            data=json.dumps({"question": "Active contracts?"}),
+            content_type="application/json",
+        )
+
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+        assert response.headers["X-Accel-Buffering"] == "no"
+        events = self.parse_events(response.get_data(as_text=True))
+        assert [name for name, _ in events] == [
+            "start",
+            "tool_start",
+            "tool_end",
+            "token",
+            "answer",
+            "done",
+        ]
+        assert events[0][1] == {"question": "Active contracts?"}
+        assert events[4][1] == {"answer": "No active contracts"}
+        mock_agent.stream.assert_called_once_with("Active contracts?")
+
+    @patch("app.quota.release")
+    @patch("app.quota.reserve", return_value=1)
+    @patch("app.get_agent")
+    def test_stream_counts_answered_questions(
+        self, mock_get_agent, mock_reserve, mock_release, stream_client
+    ):
+        """Test that usage is only counted when an answer is produced."""
+        mock_agent = Mock()
+        mock_agent.stream.side_effect = [
+            iter([{"type": "answer", "answer": "ok"}]),
+            iter([{"type": "error", "error": "boom"}]),
+        ]
+        mock_get_agent.return_value = mock_agent
+
+        for _ in range(2):
+            stream_client.post(
+                "/query/stream",
+                data=json.dumps({"question": "Q"}),
+                content_type="application/json",
+            ).get_data()
+
+        # Each question takes a slot up front; the failed one gives it back
+        assert mock_reserve.call_count == 2
+        mock_reserve.assert_called_with(self.user_id)
+        mock_release.assert_called_once_with(self.user_id)
+
+    @patch("app.quota.release")
+    @patch("app.quota.reserve", return_value=1)
+    @patch("app.get_agent")
+    def test_responses_carry_trace_id(
+        self, mock_get_agent, mock_reserve, mock_release, stream_client
+    ):
+        """Test that each question gets its own trace id for log correlation."""
+        mock_agent = Mock()
+        mock_agent.answer.return_value = ("answer", False)
+        mock_agent.stream.side_effect = lambda question: iter(
+            [{"type": "answer", "answer": "answer"}]
+        )
+        mock_get_agent.return_value = mock_agent
+
+        trace_ids = []
+        for url in ("/query", "/query", "/query/stream"):
+            response = stream_client.post(
+                url,
+                data=json.dumps({"question": "Q"}),
+                content_type="application/json",
+            )
+            response.get_data()
+            trace_ids.append(response.headers["X-Trace-Id"])
+
+        assert all(len(trace_id) == 32 for trace_id in trace_ids)
+        assert len(set(trace_ids)) == 3
+
+    @patch("app.quota.reserve", return_value=None)
+    @patch("app.get_agent")
+    def test_requests_over_the_limit_are_rejected(
+        self, mock_get_agent, mock_reserve, stream_client
+    ):
+        """Test that the agent is not run once today's limit is reached."""
+        for url in ("/query", "/query/stream"):
+            response = stream_client.post(
+                url,
+                data=json.dumps({"question": "Q"}),
+                content_type="application/json",
+            )
+
+            assert response.status_code == 403
+            assert "limit has been exceeded" in response.get_json()["error"]
+        mock_get_agent.assert_not_called()
+
+    @patch("app.quota.release")
+    @patch("app.quota.reserve", return_value=1)
+    @patch("app.get_agent")
+    def test_cached_answers_are_not_counted(
+        self, mock_get_agent, mock_reserve, mock_release, stream_client
+    ):
+        """Test that answers served from the cache do not use up the quota."""
+        mock_agent = Mock()
+        mock_agent.answer.return_value = ("cached answer", True)
+        mock_agent.stream.return_value = iter(
+            [{"type": "answer", "answer": "cached answer", "cached": True}]
+        )
+        mock_get_agent.return_value = mock_agent
+
+        response = stream_client.post(
+            "/query",
+            data=json.dumps({"question": "Q"}),
+            content_type="application/json",
+        )
+        stream_client.post(
+            "/query/stream",
+            data=json.dumps({"question": "Q"}),
+            content_type="application/json",
+        ).get_data()
+
+        assert response.get_json()["cached"] is True
+        assert mock_release.call_count == mock_reserve.call_count == 2
+
+    @patch("app.quota.charge")
+    @patch("app.quota.release")
+    @patch("app.quota.reserve", return_value=1)
+    @patch("app.get_agent")
+    def test_answered_questions_record_token_usage(
+        self, mock_get_agent, mock_reserve, mock_release, mock_charge, stream_client
+    ):
+        """Test that the tokens of each answered question are charged and logged."""
+
+        def llm_call():
+            usage = question_usage()
+            usage.source = "agent"
+            usage.calls.append(
+                {"prompt_tokens": 900, "completion_tokens": 100, "latency_ms": 5}
+            )
+
+        def answer(question):
+            llm_call()
+            return "answer", False
+
+        def stream(question):
+            llm_call()
+            yield {"type": "answer", "answer": "answer"}
+
+        mock_agent = Mock()
+        mock_agent.answer.side_effect = answer
+        mock_agent.stream.side_effect = stream
+        mock_get_agent.return_value = mock_agent
+
+        for url in ("/query", "/query/stream"):
+            stream_client.post(
+                url,
+                data=json.dumps({"question": "Q"}),
+                content_type="application/json",
+            ).get_data()
+
+        mock_release.assert_not_called()
+        assert mock_charge.call_args_list == [call(self.user_id, 1000)] * 2
+        assert len(usage_log) == 2
+
+    @patch("app.quota.charge")
+    @patch("app.quota.release")
+    @patch("app.quota.reserve", return_value=1)
+    @patch("app.get_agent")
+    def test_abandoned_stream_charges_tokens_spent(
+        self, mock_get_agent, mock_reserve, mock_release, mock_charge, stream_client
+    ):
+        """Test that a failed or abandoned stream still pays for its LLM calls."""
+        closed = []
+
+        def stream(question):
+            try:
+                usage = question_usage()
+                usage.calls.append(
+                    {"prompt_tokens": 700, "completion_tokens": 0, "latency_ms": 5}
+                )
+                yield {"type": "token", "text": "Two"}
+                yield {"type": "error", "error": "boom"}
+            finally:
+                closed.append(question)
+
+        mock_agent = Mock()
+        mock_agent.stream.side_effect = stream
+        mock_get_agent.return_value = mock_agent
+
+        response = stream_client.post(
+            "/query/stream",
+            data=json.dumps({"question": "Q"}),
+            content_type="application/json",
+        )
+        # The client disconnects after the first token
+        body = iter(response.response)
+        assert [next(body), next(body)][-1].startswith(b"event: token")
+        response.close()
+
+        assert closed == ["Q"]
+        mock_release.assert_not_called()
+        mock_charge.assert_called_once_with(self.user_id, 700)
+
+    def test_stream_missing_question(self, stream_client):
+        """Test that a missing question is rejected before streaming."""
+        response = stream_client.post(
+            "/query/stream", data=json.dumps({}), content_type="application/json"
+        )
+
+        assert response.status_code == 400
+        assert "Missing 'question'" in response.get_json()["error"]
+
+
 class TestGetAgent:
     """Test the get_agent function."""
 
@@ -270,5 +541,42 @@ class TestGetAgent:
         mock_create_agent.assert_called_once()
 
 
+class TestWarmUp:
+    """Test the per-worker warm-up and the readiness endpoint."""
+
+    def teardown_method(self):
+        warmup_status.update(ready=False, checks={})
+
+    @patch("app.get_agent")
+    def test_ready_only_after_warm_up(self, mock_get_agent, client):
+        """Test that /ready answers 503 until the agent is warmed up."""
+        mock_get_agent.return_value.warm_up.return_value = {
+            "django_api": "ok",
+            "llm": "unreachable: timed out",
+        }
+
+        assert client.get("/ready").status_code == 503
+        assert warm_up() is True
+
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.get_json()["checks"] == {
+            "agent": "ok",
+            "django_api": "ok",
+            "llm": "unreachable: timed out",
+        }
+
+    @patch("app.get_agent")
+    def test_failed_warm_up_is_not_ready(self, mock_get_agent, client):
+        """Test that a worker whose agent cannot be built is not ready."""
+        mock_get_agent.side_effect = ValueError("Missing configuration")
+
+        assert warm_up() is False
+
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert "Missing configuration" in response.get_json()["checks"]["agent"]
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
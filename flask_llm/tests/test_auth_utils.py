@@ -0,0 +1,117 @@
+from contextlib import contextmanager
+
+import pytest
+from app import app
+from auth_utils import UserCache, user_cache
+from models import User, db
+from sqlalchemy import event
+
+
+@contextmanager
+def count_user_queries():
+    """Count statements that read the users table."""
+    queries = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if (
+            statement.lstrip().upper().startswith("SELECT")
+            and "FROM users" in statement
+        ):
+            queries.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+class TestUserCache:
+    @pytest.fixture
+    def user_id(self):
+        with app.app_context():
+            db.create_all()
+            user = User(username="cacheduser", email="cached@example.com")
+            user.set_password("testpassword")
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+        yield user_id
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    @pytest.fixture
+    def logged_in(self, user_id):
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(user_id)
+            sess["_fresh"] = True
+        return client
+
+    def test_repeated_loads_skip_database(self, user_id):
+        """Test that a cached user is returned without a query."""
+        cache = UserCache(ttl=60)
+        with app.app_context(), count_user_queries() as queries:
+            first = cache.load(user_id)
+            db.session.remove()
+            second = cache.load(user_id)
+
+            assert second.username == first.username == "cacheduser"
+            assert second in db.session
+            assert len(queries) == 1
+
+    def test_update_invalidates(self, user_id):
+        """Test that deactivating a user is seen on the next load."""
+        with app.app_context():
+            user_cache.load(user_id)
+            db.session.get(User, user_id).is_active = False
+            db.session.commit()
+            db.session.remove()
+
+            assert len(user_cache) == 0
+            assert user_cache.load(user_id).is_active is False
+
+    def test_zero_ttl_disables_cache(self, user_id):
+        """Test that USER_CACHE_TTL=0 queries every time."""
+        cache = UserCache(ttl=0)
+        with app.app_context(), count_user_queries() as queries:
+            cache.load(user_id)
+            cache.load(user_id)
+
+            assert len(queries) == 2
+
+    def test_authenticated_requests_query_user_once(self, user_id, logged_in):
+        """Test per-request user queries before (no cache) and after."""
+        ttl = user_cache.ttl
+        try:
+            user_cache.ttl = 0
+            with count_user_queries() as uncached:
+                for _ in range(5):
+                    assert logged_in.get("/").status_code == 200
+            user_cache.ttl = 60
+            with count_user_queries() as cached:
+                for _ in range(5):
+                    assert logged_in.get("/").status_code == 200
+        finally:
+            user_cache.ttl = ttl
+
+        assert len(uncached) == 5
+        assert len(cached) == 1
+
+    def test_logout_invalidates(self, user_id, logged_in):
+        """Test that logging out drops the cached user."""
+        logged_in.get("/")
+        with count_user_queries() as queries:
+            logged_in.get("/logout")
+            logged_in.get("/")
+
+        # /logout reuses the cached user; the next request is anonymous
+        assert len(queries) == 0
+        assert len(user_cache) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,99 @@
+from unittest.mock import Mock, patch
+
+import pytest
+from api_tools import (
+    ActiveContractsTool,
+    CustomerSearchTool,
+    InvoiceSearchTool,
+    ItemSearchTool,
+)
+from fast_path import FastPathRouter
+
+
+class TestFastPathRouter:
+    @pytest.fixture
+    def router(self):
+        return FastPathRouter(
+            [
+                ActiveContractsTool(),
+                ItemSearchTool(),
+                InvoiceSearchTool(),
+                CustomerSearchTool(),
+            ]
+        )
+
+    @pytest.mark.parametrize(
+        "question, tool, args",
+        [
+            ("What contracts are currently active?", "active_contracts", {}),
+            ("list active contracts", "active_contracts", {}),
+            ("Find all items from Ricoh brand", "item_search", {"brand": "Ricoh"}),
+            ("show me Canon brand products", "item_search", {"brand": "Canon"}),
+            (
+                "Show me invoices for Acme Corp",
+                "invoice_search",
+                {"customer_name": "Acme Corp"},
+            ),
+            (
+                "Find customer Company B",
+                "customer_search",
+                {"customer_name": "Company B"},
+            ),
+        ],
+    )
+    def test_common_questions_match(self, router, question, tool, args):
+        """Test that common single-lookup questions map onto one tool call."""
+        route, matched_args = router.match(question)
+
+        assert route.tool == tool
+        assert matched_args == args
+
+    @pytest.mark.parametrize(
+        "question",
+        [
+            "What is the SLA agreement for Company A?",
+            "What model did Company A purchase from Ricoh?",
+            "Show me the service history for customer Company B",
+        ],
+    )
+    def test_other_questions_fall_back(self, router, question):
+        """Test that questions needing reasoning are left to the agent."""
+        assert router.match(question) is None
+        assert router.answer(question) is None
+
+    @patch("api_tools.run_api_query", return_value="id,brand\n1,Ricoh")
+    def test_answer_uses_template(self, mock_run, router):
+        """Test that the tool result is returned through the route's template."""
+        answer = router.answer("Find all items from Ricoh brand")
+
+        assert answer == "Items from Ricoh:\n\nid,brand\n1,Ricoh"
+        assert mock_run.call_args.kwargs["params"] == {"brand": "Ricoh"}
+
+    @pytest.mark.parametrize("result", ["Error: 503", "No results."])
+    @patch("api_tools.run_api_query")
+    def test_failed_or_empty_lookup_falls_back(self, mock_run, router, result):
+        """Test that errors and empty results are left to the agent."""
+        mock_run.return_value = result
+
+        assert router.answer("Find all items from Stock brand") is None
+
+    @patch("api_tools.run_api_query", return_value="id,status\n1,active")
+    def test_optional_summary(self, mock_run):
+        """Test that a given LLM summarises the data in one call."""
+        llm = Mock()
+        llm.invoke.return_value = Mock(content="One contract is active.")
+        router = FastPathRouter([ActiveContractsTool()], llm=llm)
+
+        assert router.answer("Which contracts are active?") == "One contract is active."
+        prompt = llm.invoke.call_args[0][0]
+        assert "Which contracts are active?" in prompt and "1,active" in prompt
+
+    def test_routes_need_their_tool(self):
+        """Test that routes whose tool is missing are skipped."""
+        router = FastPathRouter([ActiveContractsTool()])
+
+        assert router.match("Find all items from Ricoh brand") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
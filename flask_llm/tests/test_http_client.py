@@ -0,0 +1,282 @@
+import asyncio
+from unittest.mock import Mock, patch
+
+import http_client
+import httpx
+import pytest
+import requests
+from http_client import AsyncPooledHTTPClient, PooledHTTPClient
+
+
+class TestPooledHTTPClient:
+    def test_session_is_reused(self):
+        """Test that repeated calls share one keep-alive session."""
+        client = PooledHTTPClient()
+        assert client.session is client.session
+
+    def test_adapter_pool_configuration(self):
+        """Test that pool size and per-host limits are applied to the adapter."""
+        client = PooledHTTPClient(pool_connections=3, pool_maxsize=7, pool_block=True)
+        adapter = client.session.get_adapter("http://django-api:8000/api/")
+
+        assert adapter._pool_connections == 3
+        assert adapter._pool_maxsize == 7
+        assert adapter._pool_block is True
+
+    def test_session_recreated_after_fork(self):
+        """Test that a new session is built when the process id changes."""
+        client = PooledHTTPClient()
+        parent_session = client.session
+
+        with patch("http_client.os.getpid", return_value=-1):
+            child_session = client.session
+
+        assert child_session is not parent_session
+
+    def test_reset_drops_session(self):
+        """Test that reset forgets the inherited session."""
+        client = PooledHTTPClient()
+        session = client.session
+
+        client.reset()
+
+        assert client.session is not session
+
+    def test_default_timeouts_applied(self):
+        """Test that connect/read timeouts are passed to every request."""
+        client = PooledHTTPClient(connect_timeout=1.5, read_timeout=9)
+        mock_session = Mock()
+        client._session = mock_session
+        client._pid = http_client.os.getpid()
+
+        client.get("http://django-api:8000/api/customers/", params={"a": 1})
+
+        mock_session.get.assert_called_once_with(
+            "http://django-api:8000/api/customers/", params={"a": 1}, timeout=(1.5, 9)
+        )
+
+    def test_explicit_timeout_wins(self):
+        """Test that a caller supplied timeout is not overridden."""
+        client = PooledHTTPClient()
+        mock_session = Mock()
+        client._session = mock_session
+        client._pid = http_client.os.getpid()
+
+        client.get("http://django-api:8000/api/", timeout=2)
+
+        assert mock_session.get.call_args[1]["timeout"] == 2
+
+
+class TestValidatorCache:
+    URL = "http://django-api:8000/api/contracts/active/"
+
+    def make_client(self, responses, size=8):
+        client = PooledHTTPClient(validator_cache_size=size)
+        client._session = Mock()
+        client._session.get.side_effect = responses
+        client._pid = http_client.os.getpid()
+        return client
+
+    def make_response(self, status, etag=None, content=b'{"results": []}'):
+        response = requests.Response()
+        response.status_code = status
+        response._content = content
+        if etag:
+            response.headers["ETag"] = etag
+        response.headers["Content-Type"] = "application/json"
+        return response
+
+    def test_revalidates_with_stored_etag(self):
+        """Test that a 304 is answered with the stored body."""
+        body = b'{"results": [{"id": 1}]}'
+        client = self.make_client(
+            [self.make_response(200, '"v1"', body), self.make_response(304, '"v1"')]
+        )
+
+        first = client.get(self.URL, params={"page_size": 5})
+        second = client.get(self.URL, params={"page_size": 5})
+
+        headers = client._session.get.call_args_list[1][1]["headers"]
+        assert headers["If-None-Match"] == '"v1"'
+        assert second.status_code == 200
+        assert second.json() == first.json() == {"results": [{"id": 1}]}
+
+    def test_validators_are_per_url(self):
+        """Test that different query params do not share a validator."""
+        client = self.make_client(
+            [self.make_response(200, '"v1"'), self.make_response(200, '"v2"')]
+        )
+
+        client.get(self.URL, params={"page_size": 5})
+        client.get(self.URL, params={"page_size": 10})
+
+        assert "headers" not in client._session.get.call_args_list[1][1]
+
+    def test_changed_resource_replaces_validator(self):
+        """Test that a fresh 200 updates the stored ETag and body."""
+        client = self.make_client(
+            [
+                self.make_response(200, '"v1"'),
+                self.make_response(200, '"v2"', b'{"results": [1]}'),
+                self.make_response(304, '"v2"'),
+            ]
+        )
+
+        client.get(self.URL)
+        client.get(self.URL)
+        third = client.get(self.URL)
+
+        headers = client._session.get.call_args_list[2][1]["headers"]
+        assert headers["If-None-Match"] == '"v2"'
+        assert third.json() == {"results": [1]}
+
+    def test_least_recently_used_url_is_evicted(self):
+        """Test that the validator cache stays within its size."""
+        client = self.make_client(
+            [self.make_response(200, f'"{n}"') for n in range(3)], size=2
+        )
+
+        for page in range(3):
+            client.get(self.URL, params={"cursor": page})
+
+        assert len(client.validators) == 2
+        assert not any("cursor=0" in url for url in client.validators)
+
+    def test_disabled_validator_cache(self):
+        """Test that a size of 0 sends plain requests."""
+        client = self.make_client([self.make_response(200, '"v1"')] * 2, size=0)
+
+        client.get(self.URL)
+        client.get(self.URL)
+
+        assert "headers" not in client._session.get.call_args_list[1][1]
+
+
+class TestAsyncPooledHTTPClient:
+    URL = "http://django-api:8000/api/contracts/active/"
+
+    def make_client(self, handler, **kwargs):
+        client = AsyncPooledHTTPClient(**kwargs)
+        client._build_client = lambda: httpx.AsyncClient(
+            transport=httpx.MockTransport(handler)
+        )
+        return client
+
+    def test_client_reused_within_loop(self):
+        """Test that requests on one event loop share one client."""
+        client = AsyncPooledHTTPClient()
+
+        async def two_clients():
+            return client.client, client.client
+
+        first, second = asyncio.run(two_clients())
+        assert first is second
+
+    def test_client_rebuilt_for_new_loop(self):
+        """Test that a client bound to a finished loop is not reused."""
+        client = AsyncPooledHTTPClient()
+
+        async def current():
+            return client.client
+
+        assert asyncio.run(current()) is not asyncio.run(current())
+
+    def test_client_closed_with_its_loop(self):
+        """Test that each finished loop's client releases its connections."""
+        client = self.make_client(lambda request: httpx.Response(200, json={}))
+
+        async def fetch():
+            await client.get(self.URL)
+            return client.client
+
+        built = [asyncio.run(fetch()) for _ in range(3)]
+
+        assert len(set(map(id, built))) == 3
+        assert all(http.is_closed for http in built)
+        # Nothing is kept for loops that have finished
+        assert len(client._clients) == len(client._closers) == 0
+
+    def test_aclose_closes_running_loop_client(self):
+        """Test that aclose closes the client at once and forgets the loop."""
+        client = self.make_client(lambda request: httpx.Response(200, json={}))
+
+        async def fetch_and_close():
+            await client.get(self.URL)
+            http = client.client
+            await client.aclose()
+            return http, len(client._clients)
+
+        http, remaining = asyncio.run(fetch_and_close())
+
+        assert http.is_closed and remaining == 0
+
+    def test_pool_limits_and_timeouts(self):
+        """Test that pool size and timeouts mirror the sync client settings."""
+        client = AsyncPooledHTTPClient(
+            pool_connections=2, pool_maxsize=5, connect_timeout=1.5, read_timeout=9
+        )
+        built = client._build_client()
+
+        pool = built._transport._pool
+        assert pool._max_connections == 10
+        assert pool._max_keepalive_connections == 5
+        assert built.timeout == httpx.Timeout(9, connect=1.5)
+
+    def test_revalidates_with_stored_etag(self):
+        """Test that a 304 is answered with the stored body."""
+        seen = []
+
+        def handler(request):
+            seen.append(request.headers.get("If-None-Match"))
+            if seen[-1] == '"v1"':
+                return httpx.Response(304, headers={"ETag": '"v1"'})
+            return httpx.Response(200, json={"results": [1]}, headers={"ETag": '"v1"'})
+
+        client = self.make_client(handler)
+
+        async def fetch_twice():
+            await client.get(self.URL)
+            return await client.get(self.URL)
+
+        second = asyncio.run(fetch_twice())
+
+        assert seen == [None, '"v1"']
+        assert second.status_code == 200
+        assert second.json() == {"results": [1]}
+
+    def test_shares_validators_with_sync_client(self):
+        """Test that a body fetched by the sync client answers an async 304."""
+        sync_client = PooledHTTPClient()
+        sync_client._session = Mock()
+        sync_client._pid = http_client.os.getpid()
+        cached = requests.Response()
+        cached.status_code = 200
+        cached._content = b'{"results": [2]}'
+        cached.headers["ETag"] = '"v2"'
+        sync_client._session.get.return_value = cached
+        sync_client.get(self.URL)
+
+        client = self.make_client(
+            lambda request: httpx.Response(304, headers={"ETag": '"v2"'}),
+            validators=sync_client.validators,
+        )
+
+        response = asyncio.run(client.get(self.URL))
+
+        assert response.json() == {"results": [2]}
+
+
+class TestModuleClient:
+    def test_get_client_is_process_wide(self):
+        """Test that all tools share the same module level client."""
+        assert http_client.get_client() is http_client.get_client()
+
+    @patch.object(http_client._client, "get")
+    def test_module_get_delegates(self, mock_get):
+        """Test that the module level get uses the shared client."""
+        http_client.get("http://django-api:8000/api/", params={})
+        mock_get.assert_called_once_with("http://django-api:8000/api/", params={})
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -1,7 +1,18 @@
-from unittest.mock import Mock, patch
+import asyncio
+from unittest.mock import ANY, AsyncMock, Mock, patch
 
 import pytest
-from llm_agent import BusinessDataAgent, create_agent
+from accounting import track_usage
+from answer_cache import AnswerCache
+from fast_path import FastPathRouter
+from langchain_core.callbacks import CallbackManager
+from llm_agent import (
+    BusinessDataAgent,
+    SemanticAnswerCache,
+    create_agent,
+    hashing_embedder,
+    key_terms,
+)
 
 
 class TestBusinessDataAgent:
@@ -14,7 +25,7 @@ class TestBusinessDataAgent:
 
     @patch("llm_agent.AzureChatOpenAI")
     @patch("llm_agent.create_openai_tools_agent")
-    @patch("llm_agent.AgentExecutor")
+    @patch("llm_agent.ParallelAgentExecutor")
     def test_agent_initialization(
         self, mock_agent_executor, mock_create_agent, mock_azure_openai
     ):
@@ -75,7 +86,7 @@ class TestBusinessDataAgent:
 
     @patch("llm_agent.AzureChatOpenAI")
     @patch("llm_agent.create_openai_tools_agent")
-    @patch("llm_agent.AgentExecutor")
+    @patch("llm_agent.ParallelAgentExecutor")
     def test_query_success(
         self, mock_agent_executor, mock_create_agent, mock_azure_openai
     ):
@@ -92,12 +103,12 @@ class TestBusinessDataAgent:
 
         assert result == "Test response"
         mock_executor.invoke.assert_called_once_with(
-            {"input": "What are the active contracts?"}
+            {"input": "What are the active contracts?"}, config=ANY
         )
 
     @patch("llm_agent.AzureChatOpenAI")
     @patch("llm_agent.create_openai_tools_agent")
-    @patch("llm_agent.AgentExecutor")
+    @patch("llm_agent.ParallelAgentExecutor")
     def test_query_error_handling(
         self, mock_agent_executor, mock_create_agent, mock_azure_openai
     ):
@@ -114,9 +125,262 @@ class TestBusinessDataAgent:
 
         assert "Error processing query: LLM error" in result
 
+    @patch("llm_agent.data_version", return_value="v1")
     @patch("llm_agent.AzureChatOpenAI")
     @patch("llm_agent.create_openai_tools_agent")
-    @patch("llm_agent.AgentExecutor")
+    @patch("llm_agent.ParallelAgentExecutor")
+    def test_repeated_question_served_from_cache(
+        self,
+        mock_agent_executor,
+        mock_create_agent,
+        mock_azure_openai,
+        mock_data_version,
+        tmp_path,
+    ):
+        """Test that a repeated question skips the LLM for query and stream."""
+        mock_executor = Mock()
+        mock_executor.invoke.return_value = {"output": "Two contracts"}
+        mock_agent_executor.return_value = mock_executor
+
+        agent = BusinessDataAgent(
+            self.api_key, self.azure_endpoint, self.deployment_name
+        )
+        agent.answer_cache = AnswerCache(path=str(tmp_path / "answers.db"))
+
+        assert agent.answer("What contracts are active?") == ("Two contracts", False)
+        assert agent.answer("what contracts are active") == ("Two contracts", True)
+        assert list(agent.stream("What contracts are active?")) == [
+            {"type": "answer", "answer": "Two contracts", "cached": True}
+        ]
+        mock_executor.invoke.assert_called_once()
+
+    @patch("llm_agent.data_version", return_value="v1")
+    @patch("llm_agent.AzureChatOpenAI")
+    @patch("llm_agent.create_openai_tools_agent")
+    @patch("llm_agent.ParallelAgentExecutor")
+    def test_errors_are_not_cached(
+        self,
+        mock_agent_executor,
+        mock_create_agent,
+        mock_azure_openai,
+        mock_data_version,
+        tmp_path,
+    ):
+        """Test that failed answers are retried instead of cached."""
+        mock_executor = Mock()
+        mock_executor.invoke.side_effect = [Exception("LLM error"), {"output": "ok"}]
+        mock_agent_executor.return_value = mock_executor
+
+        agent = BusinessDataAgent(
+            self.api_key, self.azure_endpoint, self.deployment_name
+        )
+        agent.answer_cache = AnswerCache(path=str(tmp_path / "answers.db"))
+
+        assert agent.answer("Q")[1] is False
+        assert agent.answer("Q") == ("ok", False)
+
+    @patch("api_tools.run_api_query", return_value="id,status\n1,active")
+    @patch("llm_agent.AzureChatOpenAI")
+    @patch("llm_agent.create_openai_tools_agent")
+    @patch("llm_agent.ParallelAgentExecutor")
+    def test_fast_path_skips_agent(
+        self, mock_agent_executor, mock_create_agent, mock_azure_openai, mock_run
+    ):
+        """Test that a routed question is answered by its tool alone."""
+        mock_executor = Mock()
+        mock_executor.invoke.return_value = {"output": "Agent answer"}
+        mock_agent_executor.return_value = mock_executor
+
+        agent = BusinessDataAgent(
+            self.api_key, self.azure_endpoint, self.deployment_name
+        )
+        agent.fast_path = FastPathRouter(agent.tools)
+
+        answer, cached = agent.answer("What contracts are currently active?")
+        events = list(agent.stream("List active contracts"))
+
+        assert "1,active" in answer and cached is False
+        assert [event["type"] for event in events] == [
+            "tool_start",
+            "tool_end",
+            "answer",
+        ]
+        assert events[0]["tool"] == "active_contracts"
+        assert agent.query("Who is our biggest customer?") == "Agent answer"
+        mock_executor.invoke.assert_called_once()
+
+    @patch("llm_agent.data_version", return_value="v1")
+    @patch("llm_agent.AzureChatOpenAI")
+    @patch("llm_agent.create_openai_tools_agent")
+    @patch("llm_agent.ParallelAgentExecutor")
+    def test_warm_up(
+        self, mock_agent_executor, mock_create_agent, mock_azure_openai, _version
+    ):
+        """Test that warm-up builds the streaming executor and reports backends."""
+        llm = mock_azure_openai.return_value
+        llm.root_client.with_options.return_value.models.list.side_effect = Exception(
+            "timed out"
+        )
+
+        agent = BusinessDataAgent(
+            self.api_key, self.azure_endpoint, self.deployment_name
+        )
+
+        assert agent.warm_up() == {
+            "django_api": "ok",
+            "llm": "unreachable: timed out",
+        }
+        llm.model_copy.assert_called_once_with(
+            update={"streaming": True, "stream_usage": True}
+        )
+        llm.root_client.with_options.assert_called_once_with(timeout=5, max_retries=0)
+
+    @patch("llm_agent.AzureChatOpenAI")
+    @patch("llm_agent.create_openai_tools_agent")
+    @patch("llm_agent.ParallelAgentExecutor")
+    def test_aquery(self, mock_agent_executor, mock_create_agent, mock_azure_openai):
+        """Test that aquery awaits the executor without a thread."""
+        mock_executor = Mock()
+        mock_agent_executor.return_value = mock_executor
+        mock_executor.ainvoke = AsyncMock(return_value={"output": "Async response"})
+
+        agent = BusinessDataAgent(
+            self.api_key, self.azure_endpoint, self.deployment_name
+        )
+
+        assert asyncio.run(agent.aquery("Active contracts?")) == "Async response"
+        mock_executor.ainvoke.assert_awaited_once_with(
+            {"input": "Active contracts?"}, config=ANY
+        )
+        mock_executor.invoke.assert_not_called()
+
+    @patch("llm_agent.data_version", return_value="v1")
+    @patch("llm_agent.AzureChatOpenAI")
+    @patch("llm_agent.create_openai_tools_agent")
+    @patch("llm_agent.ParallelAgentExecutor")
+    def test_aquery_uses_answer_cache(
+        self,
+        mock_agent_executor,
+        mock_create_agent,
+        mock_azure_openai,
+        mock_data_version,
+        tmp_path,
+    ):
+        """Test that aquery shares the answer cache and usage source with answer."""
+        mock_executor = Mock()
+        mock_executor.ainvoke = AsyncMock(return_value={"output": "Two contracts"})
+        mock_agent_executor.return_value = mock_executor
+
+        agent = BusinessDataAgent(
+            self.api_key, self.azure_endpoint, self.deployment_name
+        )
+        agent.answer_cache = AnswerCache(path=str(tmp_path / "answers.db"))
+
+        with track_usage() as first:
+            assert asyncio.run(agent.aquery("Active contracts?")) == "Two contracts"
+        with track_usage() as second:
+            assert agent.answer("active contracts") == ("Two contracts", True)
+
+        mock_executor.ainvoke.assert_awaited_once()
+        assert (first.source, second.source) == ("agent", "cache")
+
+    @patch("llm_agent.AzureChatOpenAI")
+    @patch("llm_agent.create_openai_tools_agent")
+    @patch("llm_agent.ParallelAgentExecutor")
+    def test_stream_events(
+        self, mock_agent_executor, mock_create_agent, mock_azure_openai
+    ):
+        """Test that tool and token events are streamed before the answer."""
+
+        def fake_invoke(inputs, config):
+            handler = config["callbacks"][0]
+            handler.on_tool_start({"name": "active_contracts"}, "{}", run_id=1)
+            handler.on_tool_end("x" * 1000, run_id=1)
+            for token in ("", "Two ", "contracts"):
+                handler.on_llm_new_token(token)
+            return {"output": "Two contracts"}
+
+        mock_executor = Mock()
+        mock_executor.invoke.side_effect = fake_invoke
+        mock_agent_executor.return_value = mock_executor
+
+        agent = BusinessDataAgent(
+            self.api_key, self.azure_endpoint, self.deployment_name
+        )
+
+        events = list(agent.stream("What contracts are active?"))
+
+        assert [event["type"] for event in events] == [
+            "tool_start",
+            "tool_end",
+            "token",
+            "token",
+            "answer",
+        ]
+        assert events[1]["tool"] == "active_contracts"
+        assert len(events[1]["output"]) == 500
+        assert events[-1]["answer"] == "Two contracts"
+        # The streaming executor uses a copy of the LLM with streaming enabled
+        mock_azure_openai.return_value.model_copy.assert_called_once_with(
+            update={"streaming": True, "stream_usage": True}
+        )
+
+    @patch("llm_agent.AzureChatOpenAI")
+    @patch("llm_agent.create_openai_tools_agent")
+    @patch("llm_agent.ParallelAgentExecutor")
+    def test_stream_error(
+        self, mock_agent_executor, mock_create_agent, mock_azure_openai
+    ):
+        """Test that agent failures end the stream with an error event."""
+        mock_executor = Mock()
+        mock_executor.invoke.side_effect = Exception("LLM error")
+        mock_agent_executor.return_value = mock_executor
+
+        agent = BusinessDataAgent(
+            self.api_key, self.azure_endpoint, self.deployment_name
+        )
+
+        events = list(agent.stream("Test question"))
+
+        assert events == [
+            {"type": "error", "error": "Error processing query: LLM error"}
+        ]
+
+    @patch("llm_agent.AzureChatOpenAI")
+    @patch("llm_agent.create_openai_tools_agent")
+    @patch("llm_agent.ParallelAgentExecutor")
+    def test_closing_stream_stops_agent(
+        self, mock_agent_executor, mock_create_agent, mock_azure_openai
+    ):
+        """Test that the agent makes no further LLM call once the reader leaves."""
+        llm_calls = []
+
+        def fake_invoke(inputs, config):
+            manager = CallbackManager(handlers=config["callbacks"])
+            for _ in range(3):
+                manager.on_chat_model_start({}, [[]])
+                llm_calls.append(1)
+                manager.handlers[0].on_llm_new_token("token ")
+                config["callbacks"][-1].stopped.wait(5)
+            return {"output": "answer"}
+
+        mock_executor = Mock()
+        mock_executor.invoke.side_effect = fake_invoke
+        mock_agent_executor.return_value = mock_executor
+
+        agent = BusinessDataAgent(
+            self.api_key, self.azure_endpoint, self.deployment_name
+        )
+
+        events = agent.stream("Test question")
+        assert next(events)["type"] == "token"
+        events.close()
+
+        assert llm_calls == [1]
+
+    @patch("llm_agent.AzureChatOpenAI")
+    @patch("llm_agent.create_openai_tools_agent")
+    @patch("llm_agent.ParallelAgentExecutor")
     def test_default_api_version(
         self, mock_agent_executor, mock_create_agent, mock_azure_openai
     ):
@@ -131,7 +395,7 @@ class TestBusinessDataAgent:
 
     @patch("llm_agent.AzureChatOpenAI")
     @patch("llm_agent.create_openai_tools_agent")
-    @patch("llm_agent.AgentExecutor")
+    @patch("llm_agent.ParallelAgentExecutor")
     def test_prompt_template_content(
         self, mock_agent_executor, mock_create_agent, mock_azure_openai
     ):
@@ -156,7 +420,7 @@ class TestBusinessDataAgent:
         """Test that all tools in the agent are callable."""
         with patch("llm_agent.AzureChatOpenAI"), patch(
             "llm_agent.create_openai_tools_agent"
-        ), patch("llm_agent.AgentExecutor"):
+        ), patch("llm_agent.ParallelAgentExecutor"):
             agent = BusinessDataAgent(
                 self.api_key, self.azure_endpoint, self.deployment_name
             )
@@ -173,13 +437,144 @@ class TestBusinessDataAgent:
                 )
 
 
+# Words of the same topic share one axis, so paraphrases embed identically
+TOPICS = {
+    "invoice": 0,
+    "history": 0,
+    "buy": 0,
+    "bought": 0,
+    "purchase": 0,
+    "contracts": 1,
+    "active": 1,
+    "service": 2,
+    "repairs": 2,
+}
+
+
+def fake_embedder(texts):
+    vectors = []
+    for text in texts:
+        vector = [0.0, 0.0, 0.0, 0.1]
+        for word in text.lower().replace("?", "").split():
+            if word in TOPICS:
+                vector[TOPICS[word]] += 1.0
+        vectors.append(vector)
+    return vectors
+
+
+class TestSemanticAnswerCache:
+    def make_cache(self, **kwargs):
+        return SemanticAnswerCache(embedder=fake_embedder, threshold=0.95, **kwargs)
+
+    def test_paraphrase_reuses_answer(self):
+        """Test that a reworded question above the threshold is a hit."""
+        cache = self.make_cache()
+        cache.set("Invoice history for Company A", "v1", "Three invoices")
+
+        assert cache.get("What is the invoice history of Company A?", "v1") == (
+            "Three invoices"
+        )
+        assert cache.get("What service repairs did Company A get?", "v1") is None
+
+    def test_different_names_do_not_match(self):
+        """Test that the same question about another customer is a miss."""
+        cache = self.make_cache()
+        cache.set("Invoice history for Company A", "v1", "Three invoices")
+
+        assert cache.get("Invoice history for Company B", "v1") is None
+        assert key_terms("What did Company A buy?") == {"company", "a", "buy"}
+
+    @pytest.mark.parametrize(
+        "cached, asked",
+        [
+            ("list invoices for company a", "list invoices for company b"),
+            (
+                "What contracts are currently active?",
+                "What contracts are currently inactive?",
+            ),
+        ],
+    )
+    def test_similar_wording_with_another_meaning_misses(self, cached, asked):
+        """Test that lowercase names and negations keep near-identical questions
+        apart, even though the hashing embedder scores them above 0.9."""
+        cache = SemanticAnswerCache(threshold=0.9)
+        cache.set(cached, "v1", "cached answer")
+
+        assert cache.get(asked, "v1") is None
+        assert cache.get(cached.upper(), "v1") == "cached answer"
+
+    def test_new_data_version_clears_index(self):
+        """Test that answers about older data are dropped."""
+        cache = self.make_cache()
+        cache.set("Invoice history for Company A", "v1", "Three invoices")
+
+        assert cache.get("Invoice history for Company A", "v2") is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_evicted_at_max_size(self):
+        """Test that the index never grows beyond max_size."""
+        cache = self.make_cache(max_size=2)
+        with patch("llm_agent.time.time", return_value=1.0):
+            cache.set("Invoice history for Company A", "v1", "invoices")
+        with patch("llm_agent.time.time", return_value=2.0):
+            cache.set("Active contracts for Company A", "v1", "contracts")
+        with patch("llm_agent.time.time", return_value=3.0):
+            cache.get("The invoice history of Company A", "v1")
+        with patch("llm_agent.time.time", return_value=4.0):
+            cache.set("Service repairs for Company A", "v1", "services")
+
+        assert len(cache) == 2
+        with patch("llm_agent.time.time", return_value=5.0):
+            assert cache.get("Active contracts for Company A", "v1") is None
+            assert cache.get("Invoice history for Company A", "v1") == "invoices"
+
+    def test_expired_entries_miss(self):
+        """Test that entries older than the TTL are not reused."""
+        cache = self.make_cache(ttl=60)
+        with patch("llm_agent.time.time", return_value=0.0):
+            cache.set("Invoice history for Company A", "v1", "invoices")
+        with patch("llm_agent.time.time", return_value=61.0):
+            assert cache.get("Invoice history for Company A", "v1") is None
+        assert len(cache) == 0
+
+    def test_hashing_embedder_is_deterministic(self):
+        """Test that the local embedder needs no model and is stable."""
+        first = hashing_embedder(["What contracts are active?"])
+        second = hashing_embedder(["what contracts are  active"])
+
+        assert first.shape == (1, 512)
+        assert (first == second).all()
+
+    @patch("llm_agent.data_version", return_value="v1")
+    @patch("llm_agent.AzureChatOpenAI")
+    @patch("llm_agent.create_openai_tools_agent")
+    @patch("llm_agent.ParallelAgentExecutor")
+    def test_agent_uses_semantic_cache(
+        self, mock_agent_executor, mock_create_agent, mock_azure_openai, _version
+    ):
+        """Test that a paraphrased question skips the LLM."""
+        mock_executor = Mock()
+        mock_executor.invoke.return_value = {"output": "Three invoices"}
+        mock_agent_executor.return_value = mock_executor
+
+        agent = BusinessDataAgent("key", "https://test.openai.azure.com/", "gpt-4")
+        agent.semantic_cache = self.make_cache()
+
+        agent.answer("Invoice history for Company A")
+        assert agent.answer("Show the invoice history of Company A") == (
+            "Three invoices",
+            True,
+        )
+        mock_executor.invoke.assert_called_once()
+
+
 class TestCreateAgentFunction:
     """Test the create_agent factory function."""
 
     @patch("llm_agent.BusinessDataAgent")
     def test_create_agent_default_version(self, mock_business_agent):
         """Test create_agent with default API version."""
-        mock_instance = Mock()
+        mock_instance = Mock(tools=[])
         mock_business_agent.return_value = mock_instance
 
         result = create_agent("key", "endpoint", "deployment")
@@ -188,11 +583,13 @@ class TestCreateAgentFunction:
             "key", "endpoint", "deployment", "2024-02-15-preview"
         )
         assert result == mock_instance
+        # Fast-path answers are summarised by the LLM rather than shown raw
+        assert result.fast_path.llm is mock_instance.llm
 
     @patch("llm_agent.BusinessDataAgent")
     def test_create_agent_custom_version(self, mock_business_agent):
         """Test create_agent with custom API version."""
-        mock_instance = Mock()
+        mock_instance = Mock(tools=[])
         mock_business_agent.return_value = mock_instance
 
         result = create_agent("key", "endpoint", "deployment", "2024-05-01-preview")
@@ -208,7 +605,7 @@ class TestAgentIntegration:
 
     @patch("llm_agent.AzureChatOpenAI")
     @patch("llm_agent.create_openai_tools_agent")
-    @patch("llm_agent.AgentExecutor")
+    @patch("llm_agent.ParallelAgentExecutor")
     def test_agent_full_workflow(
         self, mock_agent_executor, mock_create_agent, mock_azure_openai
     ):
@@ -234,12 +631,12 @@ class TestAgentIntegration:
         mock_create_agent.assert_called_once()
         mock_agent_executor.assert_called_once()
         mock_executor.invoke.assert_called_once_with(
-            {"input": "Find all active contracts for Company A"}
+            {"input": "Find all active contracts for Company A"}, config=ANY
         )
 
     @patch("llm_agent.AzureChatOpenAI")
     @patch("llm_agent.create_openai_tools_agent")
-    @patch("llm_agent.AgentExecutor")
+    @patch("llm_agent.ParallelAgentExecutor")
     def test_multiple_queries_same_agent(
         self, mock_agent_executor, mock_create_agent, mock_azure_openai
     ):
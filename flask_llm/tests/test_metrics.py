@@ -0,0 +1,162 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from api_tools import ItemSearchTool
+from app import app
+from langchain_core.outputs import LLMResult
+from llm_agent import BusinessDataAgent
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+from tool_cache import ToolResultCache
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestMetrics:
+    @pytest.fixture
+    def client(self):
+        app.config["TESTING"] = True
+        with app.test_client() as client:
+            yield client
+
+    def test_requests_are_timed_per_route(self, client):
+        """Test that /metrics reports request latency by route and status."""
+        labels = {"method": "GET", "route": "/health", "status": "200"}
+        before = sample("flask_llm_http_request_duration_seconds_count", **labels)
+
+        client.get("/health")
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.content_type.startswith("text/plain")
+        names = {
+            family.name
+            for family in text_string_to_metric_families(response.get_data(True))
+        }
+        assert "flask_llm_http_request_duration_seconds" in names
+        assert (
+            sample("flask_llm_http_request_duration_seconds_count", **labels)
+            == before + 1
+        )
+        assert sample("flask_llm_http_requests_in_progress") == 0
+
+    @patch("llm_agent.AzureChatOpenAI")
+    @patch("llm_agent.create_openai_tools_agent")
+    @patch("llm_agent.ParallelAgentExecutor")
+    def test_agent_iterations_and_tokens_per_question(
+        self, mock_agent_executor, mock_create_agent, mock_azure_openai
+    ):
+        """Test that each question records its LLM calls and token usage."""
+
+        def fake_invoke(inputs, config):
+            usage = config["callbacks"][-1]
+            for _ in range(3):
+                run_id = uuid4()
+                usage.on_chat_model_start({}, [], run_id=run_id)
+                usage.on_llm_end(
+                    LLMResult(
+                        generations=[],
+                        llm_output={
+                            "token_usage": {
+                                "prompt_tokens": 200,
+                                "completion_tokens": 20,
+                            }
+                        },
+                    ),
+                    run_id=run_id,
+                )
+            return {"output": "answer"}
+
+        mock_agent_executor.return_value.invoke.side_effect = fake_invoke
+        agent = BusinessDataAgent("key", "https://test.openai.azure.com/", "gpt")
+        iterations = sample("flask_llm_agent_iterations_sum")
+        prompt = sample("flask_llm_question_tokens_sum", kind="prompt")
+        questions = sample("flask_llm_questions_total", source="agent")
+
+        agent.answer("Which customers have overdue invoices?")
+
+        assert sample("flask_llm_agent_iterations_sum") == iterations + 3
+        assert sample("flask_llm_question_tokens_sum", kind="prompt") == prompt + 600
+        assert sample("flask_llm_questions_total", source="agent") == questions + 1
+
+    @patch("api_tools.run_api_query")
+    def test_tool_calls_by_outcome(self, mock_run):
+        """Test that tool calls are counted and timed per tool and outcome."""
+        mock_run.side_effect = ["id\n1", "Error: 503"]
+        ok = sample("flask_llm_tool_calls_total", tool="item_search", outcome="ok")
+        errors = sample(
+            "flask_llm_tool_calls_total", tool="item_search", outcome="error"
+        )
+        timed = sample("flask_llm_tool_call_duration_seconds_count", tool="item_search")
+
+        ItemSearchTool().invoke({"brand": "Ricoh"})
+        ItemSearchTool().invoke({"brand": "Canon"})
+
+        assert (
+            sample("flask_llm_tool_calls_total", tool="item_search", outcome="ok")
+            == ok + 1
+        )
+        assert (
+            sample("flask_llm_tool_calls_total", tool="item_search", outcome="error")
+            == errors + 1
+        )
+        assert (
+            sample("flask_llm_tool_call_duration_seconds_count", tool="item_search")
+            == timed + 2
+        )
+
+    def test_cache_lookups(self):
+        """Test that tool cache hits and misses feed the hit ratio."""
+        cache = ToolResultCache(default_ttl=60, ttls={}, max_entries=10)
+        hits = sample("flask_llm_cache_requests_total", cache="tool", result="hit")
+        misses = sample("flask_llm_cache_requests_total", cache="tool", result="miss")
+
+        cache.get("item_search", "k")
+        cache.set("item_search", "k", "result")
+        cache.get("item_search", "k")
+
+        assert (
+            sample("flask_llm_cache_requests_total", cache="tool", result="hit")
+            == hits + 1
+        )
+        assert (
+            sample("flask_llm_cache_requests_total", cache="tool", result="miss")
+            == misses + 1
+        )
+
+    def test_samples_from_all_workers_are_added_up(self, client, tmp_path):
+        """Test that /metrics sums the samples written by each worker."""
+        script = (
+            "from metrics import QUESTIONS, WORKER_CAPACITY\n"
+            "QUESTIONS.labels('agent').inc(2)\n"
+            "WORKER_CAPACITY.set(1000)\n"
+        )
+        env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+        for _ in range(3):
+            subprocess.run(
+                [sys.executable, "-c", script], cwd=BASE_DIR, env=env, check=True
+            )
+
+        with patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}):
+            body = client.get("/metrics").get_data(True)
+
+        samples = {
+            (metric.name, tuple(metric.labels.items())): metric.value
+            for family in text_string_to_metric_families(body)
+            for metric in family.samples
+        }
+        assert samples[("flask_llm_questions_total", (("source", "agent"),))] == 6
+        assert samples[("flask_llm_worker_capacity", ())] == 3000
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
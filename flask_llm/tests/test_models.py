@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+from app import app
+from models import Counter, User, db
+
+
+class TestCounter:
+    @pytest.fixture
+    def user_id(self):
+        with app.app_context():
+            db.create_all()
+            user = User(username="counteruser", email="counter@example.com")
+            user.set_password("testpassword")
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+        yield user_id
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_increment_stops_at_limit(self, user_id):
+        """Test that the count rises until the limit, then stays put."""
+        with app.app_context():
+            counts = [Counter.increment(user_id, limit=3) for _ in range(5)]
+
+            assert counts == [1, 2, 3, None, None]
+            assert Counter.query.filter_by(user_id=user_id).one().count == 3
+
+    def test_increment_without_limit(self, user_id):
+        """Test that no limit always counts."""
+        with app.app_context():
+            assert [Counter.increment(user_id) for _ in range(3)] == [1, 2, 3]
+
+    def test_increment_stops_at_token_limit(self, user_id):
+        """Test that questions are refused once today's tokens reach the limit."""
+        with app.app_context():
+            assert Counter.increment(user_id, token_limit=1000) == 1
+            Counter.add_tokens(user_id, 600)
+            assert Counter.increment(user_id, token_limit=1000) == 2
+            Counter.add_tokens(user_id, 600)
+
+            assert Counter.increment(user_id, token_limit=1000) is None
+            counter = Counter.query.filter_by(user_id=user_id).one()
+            assert (counter.count, counter.tokens) == (2, 1200)
+
+    def test_release_gives_back_a_query(self, user_id):
+        """Test that a released query can be used again."""
+        with app.app_context():
+            Counter.increment(user_id, limit=1)
+            Counter.release(user_id)
+
+            assert Counter.increment(user_id, limit=1) == 1
+
+    def test_concurrent_increments_never_exceed_limit(self, user_id):
+        """Test that many workers at once get exactly ``limit`` queries."""
+        limit, threads, calls = 50, 10, 10
+        results, errors = [], []
+        start = threading.Barrier(threads)
+
+        def hammer():
+            try:
+                with app.app_context():
+                    start.wait()
+                    for _ in range(calls):
+                        results.append(Counter.increment(user_id, limit=limit))
+                    db.session.remove()
+            except Exception as e:
+                errors.append(e)
+
+        workers = [threading.Thread(target=hammer) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert errors == []
+        granted = [count for count in results if count is not None]
+        assert sorted(granted) == list(range(1, limit + 1))
+        assert results.count(None) == threads * calls - limit
+        with app.app_context():
+            assert Counter.query.filter_by(user_id=user_id).one().count == limit
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain.agents import create_openai_tools_agent
+from langchain.prompts import ChatPromptTemplate
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from parallel_executor import ParallelAgentExecutor
+from tool_benchmark import ScriptedChatModel, tool_calls
+
+PROMPT = ChatPromptTemplate.from_messages(
+    [("user", "{input}"), ("assistant", "{agent_scratchpad}")]
+)
+
+
+def make_executor(tools, calls, **kwargs):
+    llm = ScriptedChatModel(
+        responses=[tool_calls(*calls), AIMessage(content="Final answer")]
+    )
+    agent = create_openai_tools_agent(llm, tools, PROMPT)
+    return ParallelAgentExecutor(
+        agent=agent, tools=tools, return_intermediate_steps=True, **kwargs
+    )
+
+
+class TestParallelAgentExecutor:
+    def test_tool_calls_of_one_step_overlap(self):
+        """Test that all calls of a step are in flight at the same time."""
+        barrier = threading.Barrier(3, timeout=2)
+
+        @tool
+        def lookup(n: int) -> str:
+            """Look something up."""
+            # Raises BrokenBarrierError if the calls ran one after another
+            barrier.wait()
+            return f"result {n}"
+
+        executor = make_executor(
+            [lookup], [("lookup", {"n": n}) for n in range(3)], max_concurrency=3
+        )
+
+        result = executor.invoke({"input": "question"})
+
+        assert result["output"] == "Final answer"
+        assert [obs for _, obs in result["intermediate_steps"]] == [
+            "result 0",
+            "result 1",
+            "result 2",
+        ]
+
+    def test_concurrency_cap(self):
+        """Test that no more than max_concurrency calls run at once."""
+        lock = threading.Lock()
+        running = {"now": 0, "peak": 0}
+
+        @tool
+        def lookup(n: int) -> str:
+            """Look something up."""
+            with lock:
+                running["now"] += 1
+                running["peak"] = max(running["peak"], running["now"])
+            time.sleep(0.05)
+            with lock:
+                running["now"] -= 1
+            return str(n)
+
+        executor = make_executor(
+            [lookup], [("lookup", {"n": n}) for n in range(6)], max_concurrency=2
+        )
+
+        result = executor.invoke({"input": "question"})
+
+        assert len(result["intermediate_steps"]) == 6
+        assert running["peak"] == 2
+
+    def test_per_tool_timeout(self):
+        """Test that a slow tool is reported as timed out without delaying others."""
+        release = threading.Event()
+
+        @tool
+        def slow(n: int) -> str:
+            """Slow lookup."""
+            release.wait(5)
+            return "late"
+
+        @tool
+        def fast(n: int) -> str:
+            """Fast lookup."""
+            return "quick"
+
+        executor = make_executor(
+            [slow, fast],
+            [("slow", {"n": 1}), ("fast", {"n": 2})],
+            tool_timeout=5,
+            tool_timeouts={"slow": 0.1},
+        )
+
+        started = time.monotonic()
+        result = executor.invoke({"input": "question"})
+        release.set()
+
+        observations = [obs for _, obs in result["intermediate_steps"]]
+        assert "slow did not respond within 0.1 seconds" in observations[0]
+        assert observations[1] == "quick"
+        assert time.monotonic() - started < 2
+
+    def test_async_per_tool_timeout(self):
+        """Test that timeouts also apply to ainvoke."""
+
+        @tool
+        async def slow(n: int) -> str:
+            """Slow lookup."""
+            await asyncio.sleep(5)
+            return "late"
+
+        executor = make_executor([slow], [("slow", {"n": 1})], tool_timeout=0.1)
+
+        result = asyncio.run(executor.ainvoke({"input": "question"}))
+
+        assert "did not respond" in result["intermediate_steps"][0][1]
+
+    def test_unknown_tool_is_reported(self):
+        """Test that a call to a missing tool still yields an observation."""
+
+        @tool
+        def lookup(n: int) -> str:
+            """Look something up."""
+            return "found"
+
+        executor = make_executor(
+            [lookup], [("lookup", {"n": 1}), ("missing_tool", {"n": 2})]
+        )
+
+        result = executor.invoke({"input": "question"})
+
+        observations = [obs for _, obs in result["intermediate_steps"]]
+        assert observations[0] == "found"
+        assert "missing_tool is not a valid tool" in observations[1]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,199 @@
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from app import app
+from models import Counter, User, db
+from quota import DatabaseQuota, LocalQuota
+from sqlalchemy import event
+
+
+@contextmanager
+def count_writes(kinds=("INSERT", "UPDATE", "DELETE")):
+    """Count statements of the given kinds sent to the database."""
+    writes = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(kinds):
+            writes.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        yield writes
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+
+
+class TestLocalQuota:
+    @pytest.fixture
+    def user_id(self):
+        with app.app_context():
+            db.create_all()
+            user = User(username="quotauser", email="quota@example.com")
+            user.set_password("testpassword")
+            db.session.add(user)
+            db.session.commit()
+            yield user.id
+            db.session.remove()
+            db.drop_all()
+
+    @pytest.fixture
+    def make_quota(self, tmp_path):
+        def make(**kwargs):
+            kwargs.setdefault("limit", 50)
+            kwargs.setdefault("flush_interval", 3600)
+            return LocalQuota(path=str(tmp_path / "quota.db"), **kwargs)
+
+        return make
+
+    def stored_count(self, user_id):
+        counter = Counter.query.filter_by(user_id=user_id).first()
+        return counter.count if counter else 0
+
+    def test_limit_is_shared_by_workers(self, user_id, make_quota):
+        """Test that workers using the same store enforce one limit."""
+        first, second = make_quota(limit=3), make_quota(limit=3)
+
+        counts = [quota.reserve(user_id) for quota in (first, second, first, second)]
+
+        assert counts == [1, 2, 3, None]
+        assert second.usage(user_id) == 3
+
+    def test_count_starts_from_database(self, user_id, make_quota):
+        """Test that questions already counted in PostgreSQL are respected."""
+        Counter.increment(user_id)
+        Counter.increment(user_id)
+        quota = make_quota(limit=3)
+
+        assert quota.usage(user_id) == 2
+        assert quota.reserve(user_id) == 3
+        assert quota.reserve(user_id) is None
+
+    def test_flush_sends_aggregated_deltas(self, user_id, make_quota):
+        """Test that buffered questions reach the counters table in one batch."""
+        quota = make_quota()
+        for _ in range(5):
+            quota.reserve(user_id)
+        quota.release(user_id)
+
+        assert self.stored_count(user_id) == 0
+        assert quota.flush() == 1
+        assert self.stored_count(user_id) == 4
+        assert quota.flush() == 0
+
+    def test_flush_when_interval_elapsed(self, user_id, make_quota):
+        """Test that reserving flushes once the flush interval has passed."""
+        quota = make_quota(flush_interval=0)
+
+        quota.reserve(user_id)
+
+        assert self.stored_count(user_id) == 1
+
+    def test_crash_after_commit_is_not_counted_twice(self, user_id, make_quota):
+        """Test that a batch applied before a crash is not applied again."""
+        quota = make_quota()
+        quota.reserve(user_id)
+        quota.reserve(user_id)
+
+        with patch.object(
+            LocalQuota, "_clear_batch", side_effect=RuntimeError
+        ), pytest.raises(RuntimeError):
+            quota.flush()
+        assert self.stored_count(user_id) == 2
+
+        # A restarted worker resends the leftover batch, which is skipped
+        make_quota().flush()
+        quota.reserve(user_id)
+        quota.flush()
+
+        assert self.stored_count(user_id) == 3
+
+    def test_failed_flush_is_resent(self, user_id, make_quota):
+        """Test that usage is kept when PostgreSQL is unavailable."""
+        quota = make_quota()
+        quota.reserve(user_id)
+
+        with patch(
+            "quota.Counter.apply_deltas", side_effect=RuntimeError
+        ), pytest.raises(RuntimeError):
+            quota.flush()
+        quota.reserve(user_id)
+        quota.flush()
+        quota.flush()
+
+        assert self.stored_count(user_id) == 2
+
+    def test_token_limit_is_shared_by_workers(self, user_id, make_quota):
+        """Test that tokens charged by one worker count against the others."""
+        first = make_quota(limit=None, token_limit=1000)
+        second = make_quota(limit=None, token_limit=1000)
+
+        assert first.reserve(user_id) == 1
+        first.charge(user_id, 1200)
+
+        assert second.reserve(user_id) is None
+        assert second.tokens(user_id) == 1200
+        assert first.flush() == 1
+        counter = Counter.query.filter_by(user_id=user_id).one()
+        assert (counter.count, counter.tokens) == (1, 1200)
+
+    def test_store_without_token_columns_is_upgraded(self, user_id, tmp_path):
+        """Test that a store written before token accounting keeps working."""
+        path = tmp_path / "quota.db"
+        connection = sqlite3.connect(path)
+        connection.executescript(
+            "CREATE TABLE usage (user_id INTEGER NOT NULL, date TEXT NOT NULL, "
+            "count INTEGER NOT NULL, pending INTEGER NOT NULL DEFAULT 0, "
+            "PRIMARY KEY (user_id, date));"
+            "CREATE TABLE outbox (batch INTEGER NOT NULL, user_id INTEGER NOT NULL, "
+            "date TEXT NOT NULL, delta INTEGER NOT NULL);"
+        )
+        connection.execute(
+            "INSERT INTO usage VALUES (?, ?, 2, 2)",
+            (user_id, datetime.utcnow().date().isoformat()),
+        )
+        connection.commit()
+        connection.close()
+        quota = LocalQuota(path=str(path), limit=50, flush_interval=3600)
+
+        assert quota.reserve(user_id) == 3
+        quota.charge(user_id, 100)
+        quota.flush()
+
+        counter = Counter.query.filter_by(user_id=user_id).one()
+        assert (counter.count, counter.tokens) == (3, 100)
+
+    def test_database_writes_drop(self, user_id, make_quota):
+        """Test that buffering cuts database writes by orders of magnitude."""
+        questions = 500
+        with count_writes() as direct:
+            database = DatabaseQuota(limit=questions)
+            for _ in range(questions):
+                database.reserve(user_id)
+        with count_writes() as buffered:
+            local = make_quota(limit=2 * questions)
+            for _ in range(questions):
+                local.reserve(user_id)
+            local.flush()
+
+        assert len(direct) == questions
+        assert len(buffered) * 100 <= len(direct)
+        assert self.stored_count(user_id) == 2 * questions
+
+    def test_today_reads_one_row(self, user_id, make_quota):
+        """Test that the index page's count and tokens come from one query."""
+        Counter.increment(user_id)
+        Counter.add_tokens(user_id, 250)
+        local = make_quota(limit=None)
+
+        with count_writes(kinds=("SELECT",)) as selects:
+            assert DatabaseQuota().today(user_id) == (1, 250)
+        assert len(selects) == 1
+        assert local.today(user_id) == (1, 250)
+        assert DatabaseQuota().today(user_id + 1) == (0, 0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
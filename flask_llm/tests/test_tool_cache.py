@@ -0,0 +1,124 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from api_tools import CustomerInvoicesTool, ItemSearchTool
+from tool_cache import MemoizedTool, ToolResultCache, memoize_tools
+
+
+class TestToolResultCache:
+    @pytest.fixture
+    def cache(self):
+        return ToolResultCache(
+            default_ttl=60, ttls={"invoices": 10, "off": 0}, max_entries=2
+        )
+
+    def test_per_tool_ttl(self, cache):
+        """Test that each tool's entries expire after its own TTL."""
+        with patch("tool_cache.time.monotonic", return_value=100.0):
+            cache.set("invoices", "k", "short")
+            cache.set("items", "k", "long")
+        with patch("tool_cache.time.monotonic", return_value=111.0):
+            assert cache.get("invoices", "k") is None
+            assert cache.get("items", "k") == "long"
+
+    def test_zero_ttl_disables_caching(self, cache):
+        """Test that tools with a TTL of 0 are never cached."""
+        cache.set("off", "k", "result")
+
+        assert cache.get("off", "k") is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_is_evicted(self, cache):
+        """Test that the cache stays within max_entries."""
+        cache.set("items", "a", "A")
+        cache.set("items", "b", "B")
+        cache.get("items", "a")
+        cache.set("items", "c", "C")
+
+        assert len(cache) == 2
+        assert cache.get("items", "b") is None
+        assert cache.get("items", "a") == "A"
+
+    def test_stats(self, cache):
+        """Test that hits, misses and entries are counted per tool."""
+        cache.get("items", "a")
+        cache.set("items", "a", "A")
+        cache.get("items", "a")
+        cache.get("items", "a")
+
+        assert cache.stats() == {"items": {"hits": 2, "misses": 1, "entries": 1}}
+
+
+class TestMemoizedTool:
+    @pytest.fixture
+    def cache(self):
+        return ToolResultCache(default_ttl=60, ttls={}, max_entries=10)
+
+    def test_wrapper_keeps_tool_interface(self, cache):
+        """Test that the wrapper is presented to the LLM like the tool itself."""
+        tool = CustomerInvoicesTool()
+
+        (memoized,) = memoize_tools([tool], cache)
+
+        assert memoized.name == tool.name
+        assert memoized.description == tool.description
+        assert memoized.args == tool.args
+
+    @patch("api_tools.run_api_query")
+    def test_repeated_calls_hit_cache(self, mock_run, cache):
+        """Test that the same validated arguments reach the API once."""
+        mock_run.return_value = "id,name\n1,Ricoh MP"
+        tool = MemoizedTool(ItemSearchTool(), cache)
+
+        first = tool.invoke({"brand": "Ricoh"})
+        second = tool.invoke({"brand": "Ricoh", "query": None})
+        tool.invoke({"brand": "Canon"})
+
+        assert first == second == "id,name\n1,Ricoh MP"
+        assert mock_run.call_count == 2
+        assert cache.stats()["item_search"] == {"hits": 1, "misses": 2, "entries": 2}
+
+    @patch("tool_cache.data_version")
+    @patch("api_tools.run_api_query")
+    def test_data_version_change_misses(self, mock_run, mock_version, cache):
+        """Test that results read before a write in the API are not reused."""
+        mock_run.side_effect = ["id\n1", "id\n1\nid\n2"]
+        mock_version.return_value = "v1"
+        tool = MemoizedTool(CustomerInvoicesTool(), cache)
+        tool.invoke({"customer_id": 1})
+
+        mock_version.return_value = "v2"
+
+        assert tool.invoke({"customer_id": 1}) == "id\n1\nid\n2"
+        assert mock_run.call_count == 2
+
+    @patch("api_tools.run_api_query")
+    def test_errors_are_not_cached(self, mock_run, cache):
+        """Test that a failed lookup is retried on the next call."""
+        mock_run.side_effect = ["Error: 503", "id\n1"]
+        tool = MemoizedTool(CustomerInvoicesTool(), cache)
+
+        assert tool.invoke({"customer_id": 1}) == "Error: 503"
+        assert tool.invoke({"customer_id": 1}) == "id\n1"
+        assert mock_run.call_count == 2
+
+    @patch("api_tools.arun_api_query")
+    def test_async_calls_share_cache(self, mock_arun, cache):
+        """Test that ainvoke reads and fills the same cache."""
+
+        async def fake_query(*args, **kwargs):
+            return "id\n1"
+
+        mock_arun.side_effect = fake_query
+        tool = MemoizedTool(CustomerInvoicesTool(), cache)
+
+        async def run_twice():
+            return [await tool.ainvoke({"customer_id": 1}) for _ in range(2)]
+
+        assert asyncio.run(run_twice()) == ["id\n1", "id\n1"]
+        assert mock_arun.call_count == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import threading
+from unittest.mock import AsyncMock, Mock, PropertyMock, patch
+from uuid import uuid4
+
+import pytest
+import tracing
+from api_tools import CustomerInvoicesTool
+from http_client import AsyncPooledHTTPClient, PooledHTTPClient
+from langchain_core.outputs import LLMResult
+from opentelemetry import trace
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from tracing import FileSpanExporter, LLMTracingHandler, question_span
+
+_exporter = InMemorySpanExporter()
+tracing.provider.add_span_processor(SimpleSpanProcessor(_exporter))
+
+
+@pytest.fixture
+def spans():
+    """Finished spans by name, recorded while the test runs."""
+    _exporter.clear()
+
+    def finished():
+        return {span.name: span for span in _exporter.get_finished_spans()}
+
+    yield finished
+    _exporter.clear()
+
+
+def response(status_code=200, results=()):
+    mock = Mock(status_code=status_code, headers={})
+    mock.json.return_value = list(results)
+    return mock
+
+
+@patch("api_tools.settings.DJANGO_API_URL", "http://django")
+class TestTracing:
+    @patch.object(PooledHTTPClient, "session", new_callable=PropertyMock)
+    def test_tool_requests_continue_the_trace(self, mock_session, spans):
+        """Test that Django requests carry the tool span as their parent."""
+        mock_client = mock_session.return_value
+        mock_client.get.return_value = response(results=[{"id": 1}])
+
+        with question_span("query") as root:
+            CustomerInvoicesTool()._run(customer_id=1)
+
+        tool = spans()["tool customer_invoices"]
+        headers = mock_client.get.call_args[1]["headers"]
+        trace_id, span_id = headers["traceparent"].split("-")[1:3]
+        assert trace_id == tracing.trace_id(root)
+        assert span_id == trace.format_span_id(tool.context.span_id)
+        assert tool.parent.span_id == root.get_span_context().span_id
+        assert json.loads(tool.attributes["tool.arguments"]) == {"customer_id": 1}
+
+    @patch.object(AsyncPooledHTTPClient, "client", new_callable=PropertyMock)
+    def test_async_tool_requests_continue_the_trace(self, mock_property, spans):
+        """Test that the async tools propagate the trace too."""
+        mock_client = mock_property.return_value
+        mock_client.get = AsyncMock(return_value=response())
+
+        with question_span("query") as root:
+            asyncio.run(CustomerInvoicesTool()._arun(customer_id=1))
+
+        headers = mock_client.get.call_args[1]["headers"]
+        assert tracing.trace_id(root) in headers["traceparent"]
+        assert spans()["tool customer_invoices"].context.trace_id == (
+            root.get_span_context().trace_id
+        )
+
+    @patch.object(PooledHTTPClient, "session", new_callable=PropertyMock)
+    def test_failed_tool_call_is_marked(self, mock_session, spans):
+        """Test that a tool returning an error sets the span's status."""
+        mock_session.return_value.get.return_value = response(503)
+
+        with question_span("query"):
+            CustomerInvoicesTool()._run(customer_id=1)
+
+        status = spans()["tool customer_invoices"].status
+        assert status.status_code == trace.StatusCode.ERROR
+
+    def test_llm_spans_belong_to_the_question(self, spans):
+        """Test that LLM calls reported from another thread join the trace."""
+        with question_span("query") as root:
+            handler = LLMTracingHandler()
+
+        def call_llm():
+            run_id = uuid4()
+            handler.on_chat_model_start(
+                {"name": "AzureChatOpenAI"},
+                [],
+                run_id=run_id,
+                invocation_params={"model": "gpt-4o"},
+            )
+            handler.on_llm_end(
+                LLMResult(
+                    generations=[],
+                    llm_output={
+                        "token_usage": {"prompt_tokens": 120, "total_tokens": 130}
+                    },
+                ),
+                run_id=run_id,
+            )
+
+        thread = threading.Thread(target=call_llm)
+        thread.start()
+        thread.join()
+
+        llm = spans()["llm"]
+        assert llm.parent.span_id == root.get_span_context().span_id
+        assert llm.attributes["llm.model"] == "gpt-4o"
+        assert llm.attributes["llm.prompt_tokens"] == 120
+        assert "llm.completion_tokens" not in llm.attributes
+
+    def test_file_exporter_writes_json_lines(self, tmp_path, spans):
+        """Test that spans exported to a file can be read back line by line."""
+        with question_span("query", **{"user.id": 7}), tracing.tool_span(
+            "item_search", {"brand": "Ricoh"}
+        ):
+            pass
+        path = tmp_path / "traces.jsonl"
+
+        FileSpanExporter(str(path)).export(list(spans().values()))
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        by_name = {record["name"]: record for record in records}
+        assert by_name["tool item_search"]["parent_id"] == by_name["query"]["span_id"]
+        assert by_name["query"]["attributes"] == {"user.id": 7}
+        assert by_name["query"]["service"] == "flask_llm"
+        assert by_name["query"]["duration_ms"] >= 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,107 @@
+"""
+Wall-clock benchmark of sequential vs parallel tool calls in one agent step.
+
+A scripted model asks for the invoices, contracts and services of one
+customer in a single step, the way the OpenAI tools agent does, then
+answers. The real Django API tools call a stand-in upstream that responds
+after --latency seconds. The same question runs through the stock
+AgentExecutor and through ParallelAgentExecutor. No API keys are needed.
+
+    python tool_benchmark.py --latency 0.3 --repeat 5
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+from api_tools import CustomerContractsTool, CustomerInvoicesTool, CustomerServicesTool
+from langchain.agents import AgentExecutor, create_openai_tools_agent
+from langchain.prompts import ChatPromptTemplate
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from load_test import start_upstream
+from parallel_executor import ParallelAgentExecutor
+from settings import settings
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that replays ``responses`` in order, cycling forever."""
+
+    responses: list
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self.responses[self.calls % len(self.responses)]
+        self.calls += 1
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def tool_calls(*calls):
+    """AIMessage asking for several ``(tool name, args)`` calls at once."""
+    return AIMessage(
+        content="",
+        tool_calls=[
+            {"name": name, "args": args, "id": f"call_{i}"}
+            for i, (name, args) in enumerate(calls)
+        ],
+    )
+
+
+def build_executor(executor_class, **kwargs):
+    tools = [CustomerInvoicesTool(), CustomerContractsTool(), CustomerServicesTool()]
+    llm = ScriptedChatModel(
+        responses=[
+            tool_calls(*((tool.name, {"customer_id": 1}) for tool in tools)),
+            AIMessage(content="Customer 1 summary."),
+        ]
+    )
+    prompt = ChatPromptTemplate.from_messages(
+        [("user", "{input}"), ("assistant", "{agent_scratchpad}")]
+    )
+    agent = create_openai_tools_agent(llm, tools, prompt)
+    return executor_class(agent=agent, tools=tools, **kwargs)
+
+
+def measure(executor, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        executor.invoke({"input": "Summarise customer 1"})
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    upstream = start_upstream(args.latency)
+    settings.DJANGO_API_URL = f"http://127.0.0.1:{upstream.server_address[1]}"
+    try:
+        sequential = measure(build_executor(AgentExecutor), args.repeat)
+        parallel = measure(
+            build_executor(ParallelAgentExecutor, max_concurrency=args.concurrency),
+            args.repeat,
+        )
+    finally:
+        upstream.shutdown()
+
+    print(f"sequential {sequential:8.1f} ms")
+    print(f"parallel   {parallel:8.1f} ms")
+    print(
+        f"saved      {sequential - parallel:8.1f} ms ({1 - parallel / sequential:.0%})"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
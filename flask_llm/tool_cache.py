@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional
+
+from answer_cache import data_version
+from langchain_core.tools import BaseTool
+from metrics import record_cache
+from settings import settings
+
+
+class ToolResultCache:
+    """Bounded, per-worker cache of tool results with per-tool TTLs.
+
+    Results are keyed on the tool name and its validated arguments, so the
+    same lookup is served from memory within one agent run and across runs
+    of different users. Tools with a TTL of 0 are never cached. Beyond
+    ``max_entries`` the least recently used results are evicted. Hits and
+    misses are counted per tool for monitoring.
+    """
+
+    def __init__(
+        self,
+        default_ttl: float = settings.TOOL_CACHE_TTL,
+        ttls: Optional[Dict[str, float]] = None,
+        max_entries: int = settings.TOOL_CACHE_MAX_ENTRIES,
+    ):
+        self.default_ttl = default_ttl
+        self.ttls = dict(settings.TOOL_CACHE_TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+        # (tool name, key) -> (expiry, result), least recently used first
+        self._entries = OrderedDict()
+        self._hits: Dict[str, int] = defaultdict(int)
+        self._misses: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def ttl_for(self, tool_name: str) -> float:
+        return self.ttls.get(tool_name, self.default_ttl)
+
+    def get(self, tool_name: str, key: str) -> Optional[str]:
+        if self.ttl_for(tool_name) <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((tool_name, key))
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end((tool_name, key))
+                self._hits[tool_name] += 1
+                record_cache("tool", hit=True)
+                return entry[1]
+            if entry is not None:
+                del self._entries[(tool_name, key)]
+            self._misses[tool_name] += 1
+            record_cache("tool", hit=False)
+            return None
+
+    def set(self, tool_name: str, key: str, result: str):
+        ttl = self.ttl_for(tool_name)
+        if ttl <= 0 or self.max_entries < 1:
+            return
+        with self._lock:
+            self._entries[(tool_name, key)] = (time.monotonic() + ttl, result)
+            self._entries.move_to_end((tool_name, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Hits, misses and cached entries per tool."""
+        with self._lock:
+            sizes: Dict[str, int] = defaultdict(int)
+            for tool_name, _ in self._entries:
+                sizes[tool_name] += 1
+            return {
+                name: {
+                    "hits": self._hits[name],
+                    "misses": self._misses[name],
+                    "entries": sizes[name],
+                }
+                for name in sorted(set(self._hits) | set(self._misses) | set(sizes))
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._hits.clear()
+            self._misses.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class MemoizedTool(BaseTool):
+    """Wraps a tool so that repeated calls are answered from ``cache``.
+
+    Results are keyed on the Django API's data version as well as the
+    arguments. Error results are never stored, so a failed lookup is retried
+    on the next call.
+    """
+
+    tool: BaseTool
+    cache: ToolResultCache
+
+    def __init__(self, tool: BaseTool, cache: ToolResultCache, **kwargs):
+        super().__init__(
+            tool=tool,
+            cache=cache,
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            **kwargs,
+        )
+
+    def key(self, kwargs: dict) -> str:
+        # Validate again so that omitted defaults and explicit ones match
+        args = kwargs
+        if isinstance(self.args_schema, type):
+            args = self.args_schema(**kwargs).model_dump()
+        # Results read before a write in the Django API are not reused after
+        # it, nor stored by the answer cache under the new version
+        return json.dumps([data_version(), args], sort_keys=True, default=str)
+
+    def _store(self, key: str, result):
+        if isinstance(result, str) and not result.startswith("Error"):
+            self.cache.set(self.name, key, result)
+
+    def _run(self, *args, **kwargs) -> str:
+        key = self.key(kwargs)
+        result = self.cache.get(self.name, key)
+        if result is None:
+            result = self.tool._run(*args, **kwargs)
+            self._store(key, result)
+        return result
+
+    async def _arun(self, *args, **kwargs) -> str:
+        key = self.key(kwargs)
+        result = self.cache.get(self.name, key)
+        if result is None:
+            result = await self.tool._arun(*args, **kwargs)
+            self._store(key, result)
+        return result
+
+
+# Shared by every agent in the worker process
+tool_cache = ToolResultCache()
+
+
+def memoize_tools(
+    tools: List[BaseTool], cache: ToolResultCache = tool_cache
+) -> List[BaseTool]:
+    return [MemoizedTool(tool, cache) for tool in tools]
@@ -0,0 +1,200 @@
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Sequence
+
+from langchain_core.callbacks import BaseCallbackHandler
+from opentelemetry import context, propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.sampling import ALWAYS_OFF, ALWAYS_ON
+from settings import settings
+
+logger = logging.getLogger("tracing")
+
+
+def span_record(span: ReadableSpan) -> dict:
+    """One finished span as a flat, JSON-serialisable dict."""
+    parent = span.parent.span_id if span.parent is not None else None
+    return {
+        "service": span.resource.attributes.get("service.name"),
+        "trace_id": trace.format_trace_id(span.context.trace_id),
+        "span_id": trace.format_span_id(span.context.span_id),
+        "parent_id": trace.format_span_id(parent) if parent else None,
+        "name": span.name,
+        "start": span.start_time / 1e9,
+        "duration_ms": round((span.end_time - span.start_time) / 1e6, 3),
+        "status": span.status.status_code.name,
+        "attributes": dict(span.attributes or {}),
+    }
+
+
+class LogSpanExporter(SpanExporter):
+    """Write each span as one JSON log line on the ``tracing`` logger."""
+
+    def __init__(self):
+        # The app configures no logging, so give the logger its own handler
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        for span in spans:
+            logger.info(json.dumps(span_record(span), default=str))
+        return SpanExportResult.SUCCESS
+
+
+class FileSpanExporter(SpanExporter):
+    """Append spans to ``path`` as JSON lines, one span per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(
+            json.dumps(span_record(span), default=str) + "\n" for span in spans
+        )
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+        return SpanExportResult.SUCCESS
+
+
+def create_exporter(name: str) -> SpanExporter:
+    if name == "log":
+        return LogSpanExporter()
+    if name == "file":
+        return FileSpanExporter(settings.TRACING_FILE)
+    if name == "otlp":
+        # Imported here so the protobuf stack only loads when it is used
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    raise ValueError(f"Unknown tracing exporter: {name}")
+
+
+def create_provider(
+    enabled: bool = settings.TRACING_ENABLED,
+    exporters: Sequence[str] = settings.TRACING_EXPORTERS,
+) -> TracerProvider:
+    """Tracer provider exporting to each of ``exporters`` in the background.
+
+    With tracing disabled spans are not recorded, but trace ids are still
+    generated and propagated so responses and logs can be correlated.
+    """
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME}),
+        sampler=ALWAYS_ON if enabled else ALWAYS_OFF,
+    )
+    if enabled:
+        for name in exporters:
+            provider.add_span_processor(BatchSpanProcessor(create_exporter(name)))
+    return provider
+
+
+provider = create_provider()
+tracer = provider.get_tracer("flask_llm")
+
+
+def trace_id(span: Optional[trace.Span] = None) -> str:
+    """Hex trace id of ``span`` (the current span by default)."""
+    span = span or trace.get_current_span()
+    return trace.format_trace_id(span.get_span_context().trace_id)
+
+
+def inject_headers(headers: Optional[dict] = None) -> dict:
+    """Copy of ``headers`` with the current trace context (``traceparent``)."""
+    headers = dict(headers or {})
+    propagate.inject(headers)
+    return headers
+
+
+def start_question(name: str, **attributes) -> trace.Span:
+    """Root span of one question; every span it leads to shares its trace id.
+
+    The span is not made current; wrap the work in ``trace.use_span(span,
+    end_on_exit=True)``, or use :func:`question_span`.
+    """
+    return tracer.start_span(name, context=context.Context(), attributes=attributes)
+
+
+@contextmanager
+def question_span(name: str, **attributes) -> Iterator[trace.Span]:
+    with trace.use_span(start_question(name, **attributes), end_on_exit=True) as span:
+        yield span
+
+
+@contextmanager
+def tool_span(name: str, arguments: dict) -> Iterator[trace.Span]:
+    """Span around one tool call, current while the tool makes its requests."""
+    with tracer.start_as_current_span(
+        f"tool {name}",
+        attributes={
+            "tool.name": name,
+            "tool.arguments": json.dumps(arguments, default=str, sort_keys=True),
+        },
+    ) as span:
+        yield span
+
+
+def tool_result(span: trace.Span, result: str) -> str:
+    """Record a tool's result on its span and pass it through."""
+    span.set_attribute("tool.result_chars", len(result))
+    if result.startswith("Error"):
+        span.set_status(trace.Status(trace.StatusCode.ERROR, result[:200]))
+    return result
+
+
+class LLMTracingHandler(BaseCallbackHandler):
+    """Record a span for each LLM call the agent makes.
+
+    Spans are children of the span current when the handler is created (the
+    question's), whichever thread or event loop the callbacks run on.
+    """
+
+    def __init__(self):
+        self.parent = context.get_current()
+        self.spans: Dict = {}
+
+    def _start(self, serialized, run_id, kwargs):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("deployment_name")
+        self.spans[run_id] = tracer.start_span(
+            "llm",
+            context=self.parent,
+            attributes={"llm.model": str(model or (serialized or {}).get("name"))},
+        )
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(serialized, run_id, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(serialized, run_id, kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        span = self.spans.pop(run_id, None)
+        if span is None:
+            return
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            if usage.get(key) is not None:
+                span.set_attribute(f"llm.{key}", usage[key])
+        span.end()
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        span = self.spans.pop(run_id, None)
+        if span is not None:
+            span.record_exception(error)
+            span.set_status(trace.Status(trace.StatusCode.ERROR, str(error)))
+            span.end()